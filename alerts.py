@@ -0,0 +1,160 @@
+import bisect
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# ================== Price Alert Engine ==================
+# Rules watch one metric of one ticker:
+#   price_above        price crosses up through the threshold
+#   price_below        price crosses down through the threshold
+#   percent_move       |move from the previous close| reaches the threshold (%)
+#   prediction_change  |predicted next-day change| reaches the threshold (%)
+# Rules fire on crossings: each update compares the new metric value with
+# the previous one for that ticker, and the first value only sets the
+# baseline. Rules are indexed by (ticker, metric, direction) in lists sorted
+# by threshold, so an update bisects out exactly the thresholds between the
+# old and new value: O(log n + fired), never a scan of the ticker's rules.
+# One-shot rules leave the index when they fire; repeat rules stay armed.
+ALERT_KINDS = {
+    "price_above": ("price", "above"),
+    "price_below": ("price", "below"),
+    "percent_move": ("move", "above"),
+    "prediction_change": ("prediction", "above")
+}
+
+
+class ThresholdIndex:
+    def __init__(self):
+        """Rule ids kept sorted by threshold (parallel lists)"""
+        self.thresholds = []
+        self.ids = []
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, threshold, rule_id):
+        position = bisect.bisect_right(self.thresholds, threshold)
+        self.thresholds.insert(position, threshold)
+        self.ids.insert(position, rule_id)
+
+    def remove(self, threshold, rule_id):
+        position = bisect.bisect_left(self.thresholds, threshold)
+        while position < len(self.ids) and self.thresholds[position] == threshold:
+            if self.ids[position] == rule_id:
+                del self.thresholds[position], self.ids[position]
+                return True
+            position += 1
+        return False
+
+    def crossed(self, previous, value, direction):
+        """[lo, hi) positions of the thresholds crossed moving from previous to value in `direction`"""
+        if direction == "above":
+            if value <= previous:
+                return 0, 0
+            # previous < threshold <= value
+            return bisect.bisect_right(self.thresholds, previous), bisect.bisect_right(self.thresholds, value)
+        if value >= previous:
+            return 0, 0
+        # value <= threshold < previous
+        return bisect.bisect_left(self.thresholds, value), bisect.bisect_left(self.thresholds, previous)
+
+    def keep(self, lo, hi, positions):
+        """Replace the [lo, hi) run with only the given positions from it, in one slice assignment"""
+        self.ids[lo:hi] = [self.ids[p] for p in positions]
+        self.thresholds[lo:hi] = [self.thresholds[p] for p in positions]
+
+
+class AlertEngine:
+    def __init__(self, rules=()):
+        """rules: dicts with id, user_id, ticker, kind, threshold and optional repeat"""
+        self.rules = {}
+        self._index = {}
+        self._last = {}
+        self._lock = threading.Lock()
+        for rule in rules:
+            self.add(rule)
+
+    def __len__(self):
+        return len(self.rules)
+
+    def add(self, rule):
+        if rule["kind"] not in ALERT_KINDS:
+            raise ValueError(f"kind must be one of {list(ALERT_KINDS)}")
+        metric, direction = ALERT_KINDS[rule["kind"]]
+        rule = {**rule, "threshold": float(rule["threshold"]), "repeat": bool(rule.get("repeat", False))}
+        with self._lock:
+            if rule["id"] in self.rules:
+                self._remove(rule["id"])
+            self.rules[rule["id"]] = rule
+            self._index.setdefault((rule["ticker"], metric, direction), ThresholdIndex()).add(rule["threshold"], rule["id"])
+
+    def _remove(self, rule_id):
+        rule = self.rules.pop(rule_id, None)
+        if rule is None:
+            return False
+        metric, direction = ALERT_KINDS[rule["kind"]]
+        key = (rule["ticker"], metric, direction)
+        index = self._index[key]
+        index.remove(rule["threshold"], rule_id)
+        if not index:
+            del self._index[key]
+        return True
+
+    def remove(self, rule_id):
+        with self._lock:
+            return self._remove(rule_id)
+
+    def update(self, ticker, metric, value):
+        """Record a new metric value for ticker; returns the rules it fired"""
+        fired = []
+        with self._lock:
+            previous = self._last.get((ticker, metric))
+            self._last[(ticker, metric)] = value
+            if previous is None:
+                return fired
+            for direction in ("above", "below"):
+                key = (ticker, metric, direction)
+                index = self._index.get(key)
+                if index is None:
+                    continue
+                lo, hi = index.crossed(previous, value, direction)
+                if lo == hi:
+                    continue
+                rules = [self.rules[rule_id] for rule_id in index.ids[lo:hi]]
+                fired.extend(rules)
+
+                # One-shot rules leave the index together, so a tick that fires
+                # many of them still moves the lists only once
+                repeat = [lo + i for i, rule in enumerate(rules) if rule["repeat"]]
+                if len(repeat) < len(rules):
+                    index.keep(lo, hi, repeat)
+                    for rule in rules:
+                        if not rule["repeat"]:
+                            del self.rules[rule["id"]]
+                    if not index:
+                        del self._index[key]
+        return fired
+
+    def on_price(self, ticker, price, previous_close=None):
+        """Price tick; with the previous close the percent move is evaluated too"""
+        fired = self.update(ticker, "price", price)
+        if previous_close:
+            fired += self.update(ticker, "move", abs(price - previous_close) / previous_close * 100)
+        return fired
+
+    def on_prediction(self, ticker, change_percent):
+        """New next-day forecast, as percent change from the current price"""
+        return self.update(ticker, "prediction", abs(change_percent))
+
+
+def alert_message(rule, value):
+    """Human-readable text for a fired rule"""
+    ticker, threshold = rule["ticker"], rule["threshold"]
+    if rule["kind"] == "price_above":
+        return f"{ticker} rose above ${threshold:,.2f} (now ${value:,.2f})"
+    if rule["kind"] == "price_below":
+        return f"{ticker} fell below ${threshold:,.2f} (now ${value:,.2f})"
+    if rule["kind"] == "percent_move":
+        return f"{ticker} moved more than {threshold:g}% today"
+    return f"The {ticker} forecast now calls for a move of more than {threshold:g}%"
@@ -1,10 +1,8 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-import yfinance as yf
 import numpy as np
-import tensorflow as tf
 from pydantic import BaseModel
 from sklearn.preprocessing import MinMaxScaler
 import pandas as pd
@@ -12,18 +10,45 @@ import os
 import logging
 import glob
 import json
+import contextlib
 from datetime import datetime, timedelta
+from window_store import open_window_store, FEATURES
+from market_data import get_provider
+from sentiment import analyze_sentiment
+from forecasting import forecast_prices, forecast_tickers, DEFAULT_FORECAST_DAYS, MAX_FORECAST_DAYS
+from uncertainty import mc_forecast, has_dropout, load_mc_scale, MAX_MC_SAMPLES
+from response_encoding import CompressionMiddleware, encoded_response, compact_prediction
+from tflite_export import load_tflite_models
+from numpy_lstm import ModelBank, load_numpy_models, export_weights
+from async_logging import configure_logging
+from tracing import TracingMiddleware, span, profile_breakdown, metrics_response, REGISTRY
+from valuation import TTLCache, value_portfolio
+from market_summary import MarketSummaryAggregator
+from correlation import CorrelationService, DEFAULT_CORRELATION_WINDOW
+from optimizer import mean_variance, risk_parity, allocation_summary, blended_returns, DEFAULT_RISK_AVERSION, OPTIMIZER_METHODS, MAX_OPTIMIZER_TICKERS
+from risk import CovarianceCache, portfolio_risk, DEFAULT_RISK_WINDOW, RISK_CONFIDENCE, RISK_SCENARIOS, MAX_RISK_SCENARIOS, MAX_RISK_HORIZON
+from explanations import ExplanationEngine
+from explainability import AttributionCache, summarize, model_version, DEFAULT_TOP_K
+from screener import ScreenerSnapshot, ScreenerCache, indicator_columns, store_matrix, parse_filter, parse_sort, FIELDS as SCREENER_FIELDS, DEFAULT_SCREENER_LIMIT, MAX_SCREENER_LIMIT
+from candles import PyramidCache, pyramid_from_frame, pyramid_from_store, RANGE_DAYS, DEFAULT_CANDLE_POINTS, MAX_CANDLE_POINTS
+from symbol_search import DEFAULT_SYMBOL_MASTER, load_symbol_master
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO, 
-    format='%(asctime)s - %(levelname)s: %(message)s'
-)
+# Configure logging (console, written by a background thread)
+log_handler = configure_logging()
+REGISTRY.counter("velora_log_records_dropped_total", "Log records dropped because the logging queue was full",
+                 lambda: log_handler.dropped)
 
 logger = logging.getLogger(__name__)
 
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    """Keep the market summary refreshing while the server runs"""
+    market_summary_aggregator.start()
+    yield
+    market_summary_aggregator.stop()
+
 # Initialize FastAPI
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Enable CORS
 app.add_middleware(
@@ -34,7 +59,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON/MessagePack bodies once they pass the size threshold
+COMPRESSION_MIN_SIZE = int(os.getenv("VELORA_COMPRESSION_MIN_SIZE", "1024"))
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+
+# Outermost, so request latency includes compression
+app.add_middleware(TracingMiddleware)
+
 # ================== Load Trained LSTM Models ==================
+# "keras" loads the .keras models with TensorFlow; "numpy" serves the weights
+# exported by numpy_lstm.py and never imports TensorFlow
+SERVING_BACKEND = os.getenv("VELORA_SERVING_BACKEND", "keras")
+
+# Attempt to import TensorFlow with graceful fallback to the NumPy kernel
+try:
+    if SERVING_BACKEND == "numpy":
+        raise ImportError("NumPy serving backend selected")
+    import tensorflow as tf
+    TENSORFLOW_AVAILABLE = True
+except ImportError:
+    logger.info("Serving LSTM models with the NumPy inference kernel.")
+    TENSORFLOW_AVAILABLE = False
+
 models = {}
 
 def load_models():
@@ -47,6 +93,11 @@ def load_models():
         logger.warning(f"Created models directory. No models found.")
         return
     
+    if not TENSORFLOW_AVAILABLE:
+        models.update(load_numpy_models(model_path))
+        logger.info(f"✅ Loaded {len(models)} NumPy models.")
+        return
+    
     # Try to load models
     model_files = glob.glob(os.path.join(model_path, "*.keras")) + glob.glob(os.path.join(model_path, "*.h5"))
     
@@ -68,6 +119,10 @@ def load_models():
 
 def create_dummy_models(tickers):
     """Create dummy LSTM models for testing when no models exist"""
+    if not TENSORFLOW_AVAILABLE:
+        logger.warning("TensorFlow not available. Cannot create dummy models.")
+        return
+    
     logger.info("Creating dummy models for testing")
     
     for ticker in tickers:
@@ -85,6 +140,7 @@ def create_dummy_models(tickers):
         os.makedirs("models", exist_ok=True)
         model_path = f"models/{ticker}_best_model.keras"
         model.save(model_path)
+        export_weights(model, ticker)
         
         # Add to models dictionary
         models[ticker] = model
@@ -95,6 +151,85 @@ def create_dummy_models(tickers):
 # Call load_models at startup
 load_models()
 
+# Quantized TFLite exports (tflite_export.py) serve point forecasts when present;
+# the Keras models are kept for MC dropout sampling
+lite_models = load_tflite_models() if TENSORFLOW_AVAILABLE else {}
+if lite_models:
+    logger.info(f"✅ Loaded {len(lite_models)} TFLite models.")
+
+# NumPy weights stack into cross-ticker models for batched portfolio valuation
+model_bank = ModelBank(models) if not TENSORFLOW_AVAILABLE else None
+
+# ================== Memory-Mapped Window Store ==================
+# Built by `python window_store.py` or train_set.py; serving reads the latest
+# 60-day window as a zero-copy slice instead of refetching market data.
+window_store = open_window_store()
+WINDOW_STORE_MAX_AGE_DAYS = int(os.getenv("VELORA_WINDOW_STORE_MAX_AGE_DAYS", "4"))
+
+if window_store is not None:
+    logger.info(f"✅ Opened window store with {len(window_store)} tickers.")
+
+def store_has_recent_data(ticker):
+    """Check that the window store covers a ticker and is fresh enough to serve"""
+    if window_store is None or ticker not in window_store:
+        return False
+    age = (np.datetime64('today', 'D') - window_store.last_date(ticker)).astype(int)
+    return age <= WINDOW_STORE_MAX_AGE_DAYS
+
+# ================== Market Summary ==================
+# Trending is ranked across every modelled or stored ticker plus the symbol master
+summary_universe = {ticker: ticker for ticker in list(models) + (window_store.tickers if window_store is not None else [])}
+if os.path.exists(DEFAULT_SYMBOL_MASTER):
+    summary_universe.update({r["ticker"]: r["name"] for r in load_symbol_master(DEFAULT_SYMBOL_MASTER)})
+market_summary_aggregator = MarketSummaryAggregator(summary_universe)
+
+# ================== Return Correlations ==================
+# Seeded from the window store; each summary refresh appends any new daily bars
+correlation_service = CorrelationService.from_store(window_store) if window_store is not None else None
+if correlation_service is not None:
+    market_summary_aggregator.listeners.append(correlation_service.append_histories)
+    logger.info(f"✅ Correlation service over {len(correlation_service.tickers)} tickers, {len(correlation_service)} days.")
+
+# ================== OHLC Candles ==================
+# Daily/weekly/monthly pyramids, precomputed for every window-store ticker and
+# built on demand (then cached) from the market data provider for the rest
+candle_cache = PyramidCache()
+if window_store is not None:
+    for _ticker in window_store.tickers:
+        candle_cache.pin(_ticker, pyramid_from_store(window_store, _ticker))
+    # Daily bars from each market summary refresh keep the store pyramids current
+    market_summary_aggregator.listeners.append(candle_cache.append_histories)
+    logger.info(f"✅ Precomputed candle pyramids for {len(candle_cache)} tickers.")
+
+def candle_pyramid(ticker):
+
+    def build():
+        data = get_provider().history(ticker, period="max")
+        if data.empty:
+            raise HTTPException(status_code=404, detail=f"No price history for {ticker}")
+        return pyramid_from_frame(data)
+    return candle_cache.get(ticker, build)
+
+# ================== Stock Screener ==================
+# Columnar snapshot of every window-store ticker: latest prices, indicators,
+# sentiment and next-day forecasts (one batched rollout), rebuilt after
+# VELORA_SCREENER_TTL seconds
+def build_screener_snapshot():
+    tickers = window_store.tickers
+    closes = store_matrix(window_store, tickers, 'Close')
+    volumes = store_matrix(window_store, tickers, 'Volume') if 'Volume' in window_store.features else np.zeros_like(closes)
+    columns = indicator_columns(closes, volumes)
+    columns["sentiment"] = [analyze_sentiment(t)["sentiment_score"] for t in tickers]
+
+    windows = {t: window_store.latest_window(t, 60) for t in tickers if t in models}
+    forecasts = forecast_tickers({**models, **lite_models}, windows, 1, model_bank)
+    predicted = np.array([forecasts[t]["price"][0] if t in forecasts else np.nan for t in tickers], dtype=np.float64)
+    columns["predicted_price"] = predicted
+    columns["predicted_change"] = (predicted / columns["price"] - 1) * 100
+    return ScreenerSnapshot(tickers, columns)
+
+screener_cache = ScreenerCache(build_screener_snapshot) if window_store is not None else None
+
 # ================== Serve static files (HTML, CSS, JS) ==================
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -105,14 +240,18 @@ def serve_homepage():
 # Request Body Format
 class StockRequest(BaseModel):
     ticker: str
+    days: int = DEFAULT_FORECAST_DAYS
+    samples: int = 0  # > 0 enables MC dropout uncertainty with this many passes
 
 # ================== Fetch Stock Data ==================
 def fetch_stock_data(ticker):
     """Fetch historical stock data for prediction with improved error handling"""
     try:
+        if store_has_recent_data(ticker):
+            return fetch_stock_data_from_store(ticker)
+        
         logger.info(f"Fetching data for {ticker}")
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period="60d")  # Get 60 days for prediction
+        hist = get_provider().history(ticker, period="60d")  # Get 60 days for prediction
         
         if hist.empty:
             logger.error(f"No data found for ticker {ticker}")
@@ -133,6 +272,7 @@ def fetch_stock_data(ticker):
         result = {
             "historical": historical_data,
             "values": close_prices.tolist(),
+            "window": hist.reindex(columns=FEATURES).fillna(0).values[-60:],
             "current_price": float(hist["Close"].values[-1]),
             "volume": f"{int(hist['Volume'].values[-1]/1000000)}M" if 'Volume' in hist.columns else "N/A",
             "market_cap": "N/A"  # Placeholder, would need additional API for this
@@ -162,6 +302,31 @@ def fetch_stock_data(ticker):
         }
         
         return result
+
+def fetch_stock_data_from_store(ticker):
+    """Build the fetch_stock_data result from window store slices"""
+    window = window_store.latest_window(ticker, 60)
+    close_prices = window[:, window_store.column('Close')]
+    dates = window_store.dates(ticker)[-30:]
+    
+    historical_data = [
+        {"date": str(np.datetime64(int(day), 'D')), "price": float(price)}
+        for day, price in zip(dates, close_prices[-30:])
+    ]
+    
+    volume = "N/A"
+    if 'Volume' in window_store.features:
+        volume = f"{int(window[-1, window_store.column('Volume')]/1000000)}M"
+    
+    return {
+        "historical": historical_data,
+        "values": close_prices,
+        "window": window,
+        "current_price": float(close_prices[-1]),
+        "volume": volume,
+        "market_cap": "N/A"
+    }
+
 def generate_mock_data(ticker, days=60):
     """Generate mock stock data when API fails"""
     logger.info(f"Generating mock data for {ticker}")
@@ -181,8 +346,8 @@ def generate_mock_data(ticker, days=60):
     return prices
 
 # ================== Predict Stock Price ==================
-def predict_stock_price(ticker):
-    """Generate stock price prediction using LSTM model with improved accuracy"""
+def predict_stock_price(ticker, days=DEFAULT_FORECAST_DAYS, samples=0):
+    """Generate multi-day stock price forecast using LSTM model with per-step uncertainty"""
     # If ticker not in models, use AAPL as fallback or create a new one
     if ticker not in models:
         if 'AAPL' in models:
@@ -197,10 +362,13 @@ def predict_stock_price(ticker):
     
     try:
         # Fetch real stock data
-        stock_data = fetch_stock_data(ticker)
+        with span("fetch"):
+            stock_data = fetch_stock_data(ticker)
         
-        if "values" in stock_data:
-            data = np.array(stock_data["values"])
+        if "window" in stock_data:
+            data = np.asarray(stock_data["window"])
+        elif "values" in stock_data:
+            data = np.asarray(stock_data["values"])
         elif "historical" in stock_data:
             data = np.array([item["price"] for item in stock_data["historical"]])
         else:
@@ -209,112 +377,42 @@ def predict_stock_price(ticker):
         # Ensure we have enough data
         if len(data) < 60:
             logger.error(f"Insufficient data for {ticker}, need at least 60 days")
-            # Pad with synthetic data if needed
-            padding = np.array([data[0]] * (60 - len(data)))
-            data = np.concatenate((padding, data))
         
-        # Use the most recent 60 days of data
-        data = data[-60:]
-        
-        # Normalize Data
-        scaler = MinMaxScaler(feature_range=(0, 1))
-        data = scaler.fit_transform(np.array(data).reshape(-1, 1))
-        
-        # Reshape for LSTM (samples, time steps, features)
-        data = np.reshape(data, (1, 60, 1))
-        
-        # Generate prediction
-        predicted_price = models[model_ticker].predict(data, verbose=0)[0][0]
-        
-        # Inverse transform to get actual price
-        predicted_price = scaler.inverse_transform([[predicted_price]])[0][0]
+        # Roll the model forward for every requested day in one batched call;
+        # short windows are padded with their first row
+        model = models[model_ticker]
+        with span("forecast"):
+            if samples and has_dropout(model):
+                forecast = mc_forecast(model, data[-60:], days, samples, load_mc_scale(model_ticker))
+                uncertainty = {"method": "mc_dropout", "samples": samples}
+            else:
+                forecast = forecast_prices(lite_models.get(model_ticker, model), data[-60:], days)
+                uncertainty = {"method": "volatility", "samples": 0}
         
         # Get the current price (last day)
         current_price = stock_data["current_price"]
         
-        # Calculate percent change
-        percent_change = ((predicted_price - current_price) / current_price) * 100
-        
-        # Generate recommendation based on percent change
-        if percent_change > 2:
-            recommendation = "BUY"
-        elif percent_change < -2:
-            recommendation = "SELL"
-        else:
-            recommendation = "HOLD"
-        
-        # Calculate confidence based on model characteristics and market volatility
-        # Higher confidence for well-known stocks, lower for less predictable ones
-        base_confidence = 75
-        volatility_factor = min(20, abs(percent_change) * 2)
-        confidence = min(95, base_confidence + volatility_factor)
-        
-        # Generate 3-day predictions with decreasing confidence
-        day1_price = predicted_price
-        day1_change = percent_change
-        day1_confidence = confidence
-        
-        # Day 2 prediction builds on Day 1 with more uncertainty
-        day2_price = day1_price * (1 + (day1_change / 200))
-        day2_change = day1_change * 1.1
-        day2_confidence = day1_confidence * 0.9
-        
-        # Day 3 prediction builds on Day 2 with even more uncertainty
-        day3_price = day2_price * (1 + (day2_change / 200))
-        day3_change = day2_change * 1.1
-        day3_confidence = day2_confidence * 0.9
-        
-        return {
-            "ticker": ticker,
-            "current_price": float(current_price),
-            "predicted_price": float(predicted_price),
-            "percent_change": float(percent_change),
-            "recommendation": recommendation,
-            "confidence": float(confidence),
-            "historical": stock_data.get("historical", []),
-            "day1": {
-                "price": float(day1_price),
-                "percent": float(day1_change),
-                "confidence": float(day1_confidence)
-            },
-            "day2": {
-                "price": float(day2_price),
-                "percent": float(day2_change),
-                "confidence": float(day2_confidence)
-            },
-            "day3": {
-                "price": float(day3_price),
-                "percent": float(day3_change),
-                "confidence": float(day3_confidence)
-            }
-        }
+        result = format_forecast(
+            ticker,
+            current_price,
+            forecast["price"],
+            forecast["confidence"],
+            stock_data.get("historical", []),
+            lower=forecast["lower"],
+            upper=forecast["upper"]
+        )
+        result["uncertainty"] = uncertainty
+        return result
         
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Prediction error for {ticker}: {str(e)}")
-        # Generate fallback prediction with mock data for resilience
+        # Fallback for resilience: a single next-day placeholder. Later days
+        # are not extrapolated from it; only a model rollout produces them
         current_price = 100 + hash(ticker) % 400
         day1_change = (hash(ticker) % 10) - 5  # -5% to +5%
         
-        if day1_change > 2:
-            recommendation = "BUY"
-        elif day1_change < -2:
-            recommendation = "SELL"
-        else:
-            recommendation = "HOLD"
-            
-        day1_price = current_price * (1 + (day1_change / 100))
-        day1_confidence = 75
-        
-        day2_price = day1_price * (1 + (day1_change / 200))
-        day2_change = day1_change * 1.1
-        day2_confidence = day1_confidence * 0.9
-        
-        day3_price = day2_price * (1 + (day2_change / 200))
-        day3_change = day2_change * 1.1
-        day3_confidence = day2_confidence * 0.9
-        
         # Generate historical data for charts
         historical_data = []
         for i in range(30):
@@ -325,30 +423,58 @@ def predict_stock_price(ticker):
                 "price": float(price)
             })
             
-        return {
-            "ticker": ticker,
-            "current_price": float(current_price),
-            "predicted_price": float(day1_price),
-            "percent_change": float(day1_change),
-            "recommendation": recommendation,
-            "confidence": float(day1_confidence),
-            "historical": historical_data,
-            "day1": {
-                "price": float(day1_price),
-                "percent": float(day1_change),
-                "confidence": float(day1_confidence)
-            },
-            "day2": {
-                "price": float(day2_price),
-                "percent": float(day2_change),
-                "confidence": float(day2_confidence)
-            },
-            "day3": {
-                "price": float(day3_price),
-                "percent": float(day3_change),
-                "confidence": float(day3_confidence)
-            }
+        result = format_forecast(ticker, current_price, [current_price * (1 + day1_change / 100)], [75], historical_data)
+        result["uncertainty"] = {"method": "fallback", "samples": 0}
+        return result
+
+def format_forecast(ticker, current_price, prices, confidences, historical, lower=None, upper=None):
+    """Build the prediction response with a dayN entry and a predictions list item per step"""
+    result = {
+        "ticker": ticker,
+        "current_price": float(current_price),
+        "historical": historical,
+        "predictions": []
+    }
+    
+    for i, (price, confidence) in enumerate(zip(prices, confidences)):
+        percent_change = ((price - current_price) / current_price) * 100
+        
+        # Generate recommendation based on percent change
+        if percent_change > 2:
+            recommendation = "BUY"
+        elif percent_change < -2:
+            recommendation = "SELL"
+        else:
+            recommendation = "HOLD"
+        
+        day = {
+            "price": float(price),
+            "percent": float(percent_change),
+            "confidence": float(confidence)
         }
+        if lower is not None and upper is not None:
+            day["lower"] = float(lower[i])
+            day["upper"] = float(upper[i])
+        result[f"day{i + 1}"] = day
+        
+        result["predictions"].append({
+            "date": (datetime.now() + timedelta(days=i + 1)).strftime('%Y-%m-%d'),
+            "price": day["price"],
+            "change_percent": day["percent"],
+            "confidence": day["confidence"],
+            "lower": day.get("lower"),
+            "upper": day.get("upper"),
+            "recommendation": recommendation
+        })
+    
+    # Headline numbers come from the first forecast step
+    first = result["predictions"][0]
+    result["predicted_price"] = first["price"]
+    result["percent_change"] = first["change_percent"]
+    result["recommendation"] = first["recommendation"]
+    result["confidence"] = first["confidence"]
+    
+    return result
 def generate_mock_prediction(ticker):
     """Generate mock prediction when model fails"""
     logger.info(f"Generating mock prediction for {ticker}")
@@ -429,194 +555,188 @@ def generate_mock_prediction(ticker):
     }
 
 # ================== AI Explanation Function ==================
+explanation_engine = ExplanationEngine()
+
 def generate_explanation(ticker, prediction_data):
     """Generate detailed explanation for stock prediction based on technical factors"""
-    current_price = prediction_data["current_price"]
-    predicted_price = prediction_data["predicted_price"]
-    percent_change = prediction_data["percent_change"]
-    recommendation = prediction_data["recommendation"]
-    
-    # Analyze recent price movements
-    historical = prediction_data.get("historical", [])
-    recent_prices = [item["price"] for item in historical[-10:]] if len(historical) >= 10 else []
-    
-    # Determine trend characteristics if we have data
-    if len(recent_prices) >= 5:
-        recent_trend = "upward" if recent_prices[-1] > recent_prices[0] else "downward"
-        
-        # Calculate volatility
-        price_changes = [abs(recent_prices[i] - recent_prices[i-1]) / recent_prices[i-1] * 100 
-                        for i in range(1, len(recent_prices))]
-        avg_volatility = sum(price_changes) / len(price_changes)
-        
-        if avg_volatility > 1.5:
-            volatility = "high"
-        elif avg_volatility > 0.7:
-            volatility = "moderate"
-        else:
-            volatility = "low"
-            
-        # Calculate momentum
-        short_momentum = (recent_prices[-1] - recent_prices[-3]) / recent_prices[-3] if len(recent_prices) >= 3 else 0
-        momentum = "increasing" if short_momentum > 0.01 else "decreasing" if short_momentum < -0.01 else "stable"
-    else:
-        # Fallbacks if we don't have enough data
-        recent_trend = "uncertain"
-        volatility = "unknown"
-        momentum = "uncertain"
-    
-    # Create detailed, confident explanations based on recommendation
-    if recommendation == "BUY":
-        explanation = (
-            f"Based on our AI model analysis, {ticker} shows strong bullish indicators "
-            f"with a predicted price increase of {percent_change:.2f}%. "
-            f"The model forecasts the price to rise from ${current_price:.2f} to ${predicted_price:.2f} "
-            f"in the short term. "
-        )
-        
-        # Add details based on available data
-        if recent_trend != "uncertain":
-            explanation += (
-                f"Recent price action shows a {recent_trend} trend with {volatility} volatility "
-                f"and {momentum} momentum. "
-            )
-            
-        explanation += (
-            f"Technical indicators suggest strong buying pressure, and our AI system detects favorable market conditions. "
-            f"Consider buying if aligned with your investment strategy and risk tolerance."
-        )
-    elif recommendation == "SELL":
-        explanation = (
-            f"Our AI model indicates potential bearish movement for {ticker}, "
-            f"with a predicted price decrease of {abs(percent_change):.2f}%. "
-            f"The forecast shows a decline from ${current_price:.2f} to ${predicted_price:.2f} "
-            f"in the short term. "
-        )
-        
-        # Add details based on available data
-        if recent_trend != "uncertain":
-            explanation += (
-                f"Recent price action shows a {recent_trend} trend with {volatility} volatility "
-                f"and {momentum} momentum. "
-            )
-            
-        explanation += (
-            f"Technical analysis reveals selling pressure, and our AI system identifies potential resistance levels ahead. "
-            f"Consider reducing exposure if this aligns with your investment goals and risk management strategy."
-        )
-    else:  # HOLD
-        explanation = (
-            f"For {ticker}, our AI model predicts relatively stable price action "
-            f"with a moderate change of {percent_change:.2f}%. "
-            f"The forecast suggests the price may move from ${current_price:.2f} to ${predicted_price:.2f}. "
-        )
-        
-        # Add details based on available data
-        if recent_trend != "uncertain":
-            explanation += (
-                f"Recent price action shows a {recent_trend} trend with {volatility} volatility "
-                f"and {momentum} momentum. "
-            )
-            
-        explanation += (
-            f"The analysis indicates a relatively balanced market with equilibrium between buying and selling pressure. "
-            f"Holding current positions may be appropriate while monitoring market developments."
-        )
-    
-    return explanation
-def analyze_sentiment(ticker):
-    """Simple mock sentiment analysis"""
-    # Set seed based on ticker for consistent results
-    np.random.seed(sum(ord(c) for c in ticker))
-    
-    # Generate sentiment score (0-1)
-    sentiment_score = np.random.beta(5, 2) if np.random.rand() > 0.3 else np.random.beta(2, 5)
-    
-    # Map score to sentiment label
-    if sentiment_score > 0.7:
-        sentiment = "Bullish"
-        sentiment_text = f"Market sentiment for {ticker} is very positive. Recent news and social media activity indicate strong investor confidence."
-    elif sentiment_score > 0.5:
-        sentiment = "Mildly Bullish"
-        sentiment_text = f"Market sentiment for {ticker} is cautiously optimistic. Recent coverage shows positive trends with some reservations."
-    elif sentiment_score > 0.4:
-        sentiment = "Neutral"
-        sentiment_text = f"Market sentiment for {ticker} is balanced. There is mixed news coverage without strong positive or negative signals."
-    elif sentiment_score > 0.25:
-        sentiment = "Mildly Bearish"
-        sentiment_text = f"Market sentiment for {ticker} is slightly negative. There are some concerns in recent news and social activity."
-    else:
-        sentiment = "Bearish"
-        sentiment_text = f"Market sentiment for {ticker} is negative. Recent news and social media analysis indicates significant investor concerns."
-    
-    # Generate mock news items
-    news_items = []
-    sentiment_words = {
-        "Bullish": ["gains", "growth", "outperform", "exceeds expectations", "strong results", "breakthrough", "upgrade"],
-        "Mildly Bullish": ["positive", "improving", "potential", "opportunity", "resilient", "steady growth"],
-        "Neutral": ["steady", "stable", "mixed results", "maintains", "as expected", "in line with expectations"],
-        "Mildly Bearish": ["challenges", "concerns", "slowing", "caution", "underperform", "fell short"],
-        "Bearish": ["decline", "losses", "warning", "downgrade", "risk", "sell-off", "disappointing"]
-    }
-    
-    sources = ["Bloomberg", "Financial Times", "CNBC", "Wall Street Journal", "Reuters", "Seeking Alpha", "MarketWatch"]
-    
-    # Select words based on sentiment
-    words = sentiment_words[sentiment]
-    
-    for i in range(3):
-        source = np.random.choice(sources)
-        word = np.random.choice(words)
-        
-        title = f"{ticker} {word} amid market {np.random.choice(['volatility', 'changes', 'conditions', 'trends'])}"
-        
-        news_items.append({
-            "source": source,
-            "title": title,
-            "date": (datetime.now() - timedelta(days=i)).strftime("%Y-%m-%d"),
-            "sentiment": sentiment.lower()
-        })
-    
-    return {
-        "ticker": ticker,
-        "sentiment_score": float(sentiment_score),
-        "sentiment": sentiment,
-        "analysis": sentiment_text,
-        "news": news_items
-    }
+    return explanation_engine.prediction(ticker, prediction_data)
+
+# Occlusion/permutation attributions of the model's next-close prediction
+attribution_cache = AttributionCache()
+
+def explain_prediction(ticker, top=DEFAULT_TOP_K):
+    """Top timesteps and features behind the model's next-close prediction for ticker"""
+    model_ticker = ticker if ticker in models else 'AAPL'
+    if model_ticker not in models:
+        raise HTTPException(status_code=404, detail=f"No model available for {ticker}")
+    model = models[model_ticker]
+
+    stock_data = fetch_stock_data(ticker)
+    window = np.asarray(stock_data["window"] if "window" in stock_data else stock_data["values"], dtype=np.float32)
+    with span("attribution"):
+        attribution = attribution_cache.explain(model, window[-60:])
+
+    return {"ticker": ticker, "model": model_ticker, "model_version": model_version(model), **summarize(attribution, top)}
 
 # ================== Portfolio APIs ==================
+DEMO_HOLDINGS = [
+    {"ticker": "AAPL", "shares": 50, "avg_price": 165.27},
+    {"ticker": "NVDA", "shares": 15, "avg_price": 750.46},
+    {"ticker": "MSFT", "shares": 30, "avg_price": 375.10},
+    {"ticker": "TSLA", "shares": 20, "avg_price": 180.21},
+    {"ticker": "AMZN", "shares": 25, "avg_price": 175.42}
+]
+DEMO_NAMES = {"AAPL": "Apple Inc.", "NVDA": "NVIDIA Corp.", "MSFT": "Microsoft Corp.", "TSLA": "Tesla Inc.", "AMZN": "Amazon.com Inc."}
+
+valuation_cache = TTLCache()
+
 @app.get("/api/portfolio/demo")
 def get_demo_portfolio():
-    """Get a demo portfolio for testing"""
-    portfolio = {
-        "total_value": 42675.89,
-        "daily_change": 1856.32,
-        "percent_change": 4.55,
-        "holdings": [
-            {"name": "Apple Inc.", "symbol": "AAPL", "shares": 50, "avgPrice": 165.27, "currentPrice": 187.54, "value": 9377.00, "change": 13.48},
-            {"name": "NVIDIA Corp.", "symbol": "NVDA", "shares": 15, "avgPrice": 750.46, "currentPrice": 874.15, "value": 13112.25, "change": 16.48},
-            {"name": "Microsoft Corp.", "symbol": "MSFT", "shares": 30, "avgPrice": 375.10, "currentPrice": 404.87, "value": 12146.10, "change": 7.94},
-            {"name": "Tesla Inc.", "symbol": "TSLA", "shares": 20, "avgPrice": 180.21, "currentPrice": 175.34, "value": 3506.80, "change": -2.70},
-            {"name": "Amazon.com Inc.", "symbol": "AMZN", "shares": 25, "avgPrice": 175.42, "currentPrice": 181.34, "value": 4533.50, "change": 3.38}
-        ]
-    }
-    return portfolio
+    """Get a demo portfolio valued at the latest prices (one batched fetch and forecast)"""
+    return valuation_cache.cached(("demo", "portfolio"), lambda: value_portfolio(
+        DEMO_HOLDINGS, {**models, **lite_models}, model_bank, names=DEMO_NAMES
+    ))
+
+# Covariance matrices per (holdings, window), recomputed when a new daily bar arrives
+covariance_cache = CovarianceCache(correlation_service) if correlation_service is not None else None
+
+def parse_holdings(holdings):
+    """'AAPL:50,MSFT:30' -> {ticker: shares}; empty means the demo portfolio"""
+    if not holdings.strip():
+        return {h["ticker"]: h["shares"] for h in DEMO_HOLDINGS}
+    shares = {}
+    for part in holdings.split(","):
+        ticker, _, amount = part.partition(":")
+        try:
+            shares[ticker.strip().upper()] = shares.get(ticker.strip().upper(), 0) + float(amount)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Cannot parse holding {part.strip()!r}; expected TICKER:SHARES")
+    if any(v <= 0 for v in shares.values()):
+        raise HTTPException(status_code=400, detail="shares must be positive")
+    return shares
+
+@app.get("/api/portfolio/risk")
+def get_portfolio_risk(holdings: str = "", window: int = DEFAULT_RISK_WINDOW, days: int = 1,
+                       confidence: float = RISK_CONFIDENCE, scenarios: int = RISK_SCENARIOS):
+    """
+    VaR (historical and Monte Carlo), volatility, beta and drawdowns of a portfolio
+
+    holdings: "AAPL:50,MSFT:30" (shares, valued at the latest stored close);
+    defaults to the demo portfolio. days is the VaR horizon.
+    """
+    if covariance_cache is None:
+        raise HTTPException(status_code=503, detail="Risk analytics need the local price store")
+    if not 1 <= days <= MAX_RISK_HORIZON:
+        raise HTTPException(status_code=400, detail=f"days must be between 1 and {MAX_RISK_HORIZON}")
+    if not 0.5 <= confidence < 1:
+        raise HTTPException(status_code=400, detail="confidence must be in [0.5, 1)")
+    if not 100 <= scenarios <= MAX_RISK_SCENARIOS:
+        raise HTTPException(status_code=400, detail=f"scenarios must be between 100 and {MAX_RISK_SCENARIOS}")
+    shares = parse_holdings(holdings)
+    try:
+        entry = covariance_cache.get(shares, window)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if days >= len(entry["returns"]):
+        raise HTTPException(status_code=400, detail="days must be shorter than window")
+
+    prices = correlation_service.last_prices[[correlation_service.column[t] for t in entry["tickers"]]]
+    with span("risk"):
+        # Seeded by the bar day, so the Monte Carlo figures are stable until new data arrives
+        result = portfolio_risk(entry, prices * np.array([shares[t] for t in entry["tickers"]]),
+                                confidence, days, scenarios, np.random.default_rng(entry["day"]))
+    return {"benchmark": covariance_cache.benchmark_name, **result}
+
+def expected_returns(tickers, entry):
+    """
+    Daily expected log returns from the models' next-day forecasts and the
+    window's mean returns, on one scale (optimizer.blended_returns)
+    """
+    windows = {t: window_store.latest_window(t, 60) for t in tickers if t in models}
+    forecasts = forecast_tickers({**models, **lite_models}, windows, 1, model_bank)
+    prices = correlation_service.last_prices[[correlation_service.column[t] for t in tickers]]
+    predicted = np.array([forecasts[t]["price"][0] if t in forecasts else np.nan for t in tickers], dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        forecast = np.log(predicted / prices)
+    mu = blended_returns(forecast, entry["mean"], entry["cov"], len(entry["returns"]))
+    return mu, np.isfinite(forecast), prices
+
+@app.get("/api/portfolio/optimize")
+def optimize_portfolio(tickers: str = "", method: str = "mean_variance", risk_aversion: float = DEFAULT_RISK_AVERSION,
+                       window: int = DEFAULT_RISK_WINDOW, value: float = 0.0):
+    """
+    Long-only allocation over a candidate ticker set
+
+    method: mean_variance (model forecasts blended into shrunk historical
+    means as expected returns) or risk_parity (equal risk contributions).
+    Mean-variance weights stay concentrated when expected returns differ by
+    more than risk_aversion x daily variance; raise risk_aversion (or lower
+    VELORA_FORECAST_IC) for broader allocations. tickers defaults to the demo
+    portfolio; value > 0 adds dollar amounts and shares at the latest close.
+    """
+    if covariance_cache is None:
+        raise HTTPException(status_code=503, detail="Portfolio optimization needs the local price store")
+    if method not in OPTIMIZER_METHODS:
+        raise HTTPException(status_code=400, detail=f"method must be one of {list(OPTIMIZER_METHODS)}")
+    if risk_aversion <= 0 or value < 0:
+        raise HTTPException(status_code=400, detail="risk_aversion must be positive and value non-negative")
+    names = list(dict.fromkeys(t.strip().upper() for t in tickers.split(",") if t.strip())) or [h["ticker"] for h in DEMO_HOLDINGS]
+    if not 2 <= len(names) <= MAX_OPTIMIZER_TICKERS:
+        raise HTTPException(status_code=400, detail=f"between 2 and {MAX_OPTIMIZER_TICKERS} tickers are required")
+    try:
+        entry = covariance_cache.get(names, window)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    with span("expected_returns"):
+        mu, forecast, prices = expected_returns(entry["tickers"], entry)
+    with span("optimize"):
+        if method == "mean_variance":
+            weights, iterations = mean_variance(mu, entry["cov"], risk_aversion)
+        else:
+            weights, iterations = risk_parity(entry["cov"])
+
+    result = allocation_summary(entry["tickers"], weights, mu, entry["cov"], prices, value)
+    for row in result["weights"]:
+        row["source"] = "forecast" if forecast[entry["tickers"].index(row["ticker"])] else "historical"
+    return {"method": method, "window_days": window, "iterations": iterations, **result}
 
 # ================== 🎯 Stock Prediction API ==================
 @app.post("/api/predict")
-def predict_stock(request: StockRequest):
+def predict_stock(request: StockRequest, http_request: Request, profile: bool = False):
+    """
+    Prediction with explanation and sentiment
+
+    Send Accept: application/msgpack or application/vnd.velora.columnar+json
+    for the compact columnar encoding, and If-None-Match with a previous ETag
+    to get 304 Not Modified when the prediction has not changed. ?profile=1
+    adds a per-stage timing breakdown under "profile".
+    """
     ticker = request.ticker.upper()  # Ensure uppercase tickers
-    prediction_data = predict_stock_price(ticker)
-    explanation = generate_explanation(ticker, prediction_data)
-    sentiment_data = analyze_sentiment(ticker)
+    if not 1 <= request.days <= MAX_FORECAST_DAYS:
+        raise HTTPException(status_code=400, detail=f"days must be between 1 and {MAX_FORECAST_DAYS}")
+    if not 0 <= request.samples <= MAX_MC_SAMPLES:
+        raise HTTPException(status_code=400, detail=f"samples must be between 0 and {MAX_MC_SAMPLES}")
+    with span("predict"):
+        prediction_data = predict_stock_price(ticker, request.days, request.samples)
+    with span("explanation"):
+        explanation = generate_explanation(ticker, prediction_data)
+    with span("sentiment"):
+        sentiment_data = analyze_sentiment(ticker)
     
     # Combine prediction and sentiment data
     result = {**prediction_data}
     result["explanation"] = explanation
     result["sentiment"] = sentiment_data
+    if profile:
+        result["profile"] = profile_breakdown()
     
-    return result
+    return encoded_response(http_request, result, compact_prediction)
+
+# Prometheus scrape endpoint: request latency per route and time per traced stage
+@app.get("/metrics")
+def metrics():
+    return metrics_response()
 
 # Simple health check endpoint
 @app.get("/api/health")
@@ -626,24 +746,116 @@ def health_check():
 # Market data endpoint
 @app.get("/api/market/summary")
 def market_summary():
-    """Get market summary data for dashboard"""
-    indices = [
-        {"name": "S&P 500", "symbol": "SPX", "price": 4982.75, "change": 0.58},
-        {"name": "NASDAQ", "symbol": "COMP", "price": 17043.81, "change": 1.25},
-        {"name": "Dow Jones", "symbol": "DJI", "price": 37863.80, "change": -0.12}
-    ]
-    
-    trending_stocks = [
-        {"name": "Apple Inc.", "symbol": "AAPL", "price": 187.54, "change": 1.85},
-        {"name": "NVIDIA Corp.", "symbol": "NVDA", "price": 874.15, "change": 2.74},
-        {"name": "Microsoft Corp.", "symbol": "MSFT", "price": 404.87, "change": 1.33},
-        {"name": "Tesla Inc.", "symbol": "TSLA", "price": 175.34, "change": -0.87}
+    """Get market summary data for dashboard (the aggregator's latest snapshot)"""
+    return Response(content=market_summary_aggregator.snapshot, media_type="application/json")
+
+@app.get("/api/correlation")
+def get_correlation(window: int = DEFAULT_CORRELATION_WINDOW, tickers: str = "", ticker: str = "", k: int = 5):
+    """
+    Rolling daily-return correlations across the ticker universe
+
+    ?ticker=AAPL&k=5 returns AAPL's k most correlated tickers; otherwise the
+    matrix for ?tickers=AAPL,MSFT,... (default: every ticker). NaN (a ticker
+    without enough history for the window) is returned as null.
+    """
+    if correlation_service is None:
+        raise HTTPException(status_code=503, detail="Correlations need the window store (python window_store.py)")
+    try:
+        correlation_service.validate_window(window)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    matrix = correlation_service.matrix(window)
+    if ticker:
+        ticker = ticker.upper()
+        if ticker not in correlation_service.column:
+            raise HTTPException(status_code=404, detail=f"No price history for {ticker}")
+        neighbors = correlation_service.neighbors(ticker, window, max(1, min(k, 100)), corr=matrix)
+        return {"ticker": ticker, "window": window,
+                "neighbors": [{"ticker": t, "correlation": round(c, 4)} for t, c in neighbors]}
+
+    names = [t.strip().upper() for t in tickers.split(",") if t.strip()] or correlation_service.tickers
+    missing = [t for t in names if t not in correlation_service.column]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"No price history for {', '.join(missing)}")
+    columns = [correlation_service.column[t] for t in names]
+    selected = np.round(matrix[np.ix_(columns, columns)].astype(np.float64), 4).astype(object)
+    selected[np.isnan(selected.astype(np.float64))] = None
+    return {"window": window, "tickers": names, "matrix": selected.tolist()}
+
+@app.get("/api/candles/{ticker}")
+def get_candles(ticker: str, timeframe: str = "1M", points: int = DEFAULT_CANDLE_POINTS, line: bool = False):
+    """
+    OHLC candles for a timeframe (1D, 1W, 1M, 3M, 6M, 1Y, 5Y, All)
+
+    At most `points` candles come back: long ranges are served from the
+    weekly/monthly level and merged into wider candles (bars_per_point), or
+    LTTB-sampled closes with ?line=1.
+    """
+    ticker = ticker.upper()
+    if timeframe not in RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"timeframe must be one of {list(RANGE_DAYS)}")
+    points = min(max(points, 3), MAX_CANDLE_POINTS)
+
+    try:
+        with span("candles"):
+            resolution, size, bars = candle_pyramid(ticker).query(RANGE_DAYS[timeframe], points, line)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error building candles for {ticker}: {e}")
+        raise HTTPException(status_code=500, detail=f"Error building candles for {ticker}")
+
+    dates = bars["time"].astype('datetime64[D]').astype(str)
+    candles = [
+        {"date": date, "open": round(o, 2), "high": round(h, 2), "low": round(l, 2), "close": round(c, 2), "volume": int(v)}
+        for date, o, h, l, c, v in zip(dates, bars["open"].tolist(), bars["high"].tolist(), bars["low"].tolist(),
+                                       bars["close"].tolist(), bars["volume"].tolist())
     ]
-    
+    return {"ticker": ticker, "timeframe": timeframe, "resolution": resolution, "bars_per_point": size, "candles": candles}
+
+@app.get("/api/explain/{ticker}")
+def get_explanation(ticker: str, top: int = DEFAULT_TOP_K):
+    """
+    What drove the model's next-close prediction
+
+    Returns the `top` input days by signed price contribution (occlusion)
+    and the features by permutation importance, with their share in percent.
+    """
+    ticker = ticker.upper()
+    try:
+        return explain_prediction(ticker, max(1, min(top, 60)))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error explaining prediction for {ticker}: {e}")
+        raise HTTPException(status_code=500, detail=f"Error explaining prediction for {ticker}")
+
+@app.get("/api/screener")
+def screen_stocks(filter: str = "", sort: str = "-predicted_change", limit: int = DEFAULT_SCREENER_LIMIT):
+    """
+    Screen the whole universe, e.g. ?filter=predicted_change > 2 and rsi < 30&sort=-predicted_change
+
+    Clauses are <field> <op> <number> joined by "and" or commas; ops are
+    > >= < <= == !=. Returns the match count and the top `limit` rows.
+    """
+    if screener_cache is None:
+        raise HTTPException(status_code=503, detail="The screener needs the window store (python window_store.py)")
+    try:
+        clauses = parse_filter(filter)
+        parse_sort(sort)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    snapshot = screener_cache.get()
+    with span("screen"):
+        count, indices = snapshot.screen(clauses, sort, min(max(limit, 1), MAX_SCREENER_LIMIT))
     return {
-        "indices": indices,
-        "trending": trending_stocks,
-        "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        "count": count,
+        "universe": len(snapshot),
+        "as_of": datetime.fromtimestamp(snapshot.built_at).strftime("%Y-%m-%d %H:%M:%S"),
+        "fields": SCREENER_FIELDS,
+        "results": snapshot.rows(indices)
     }
 
 @app.get("/api/sentiment/{ticker}")
@@ -0,0 +1,149 @@
+import os
+import sys
+import json
+import queue
+import atexit
+import logging
+import itertools
+import threading
+import logging.handlers
+from datetime import datetime, timezone
+
+# ================== Queued Logging ==================
+# Request handlers only put records on a bounded in-memory queue; a single
+# background listener thread formats them and does the file and console
+# writes, so a slow disk never adds to request latency. When the queue is
+# full the record is dropped and counted instead of blocking the caller; the
+# apps export the count on /metrics as velora_log_records_dropped_total.
+# Files get one JSON object per line (plus any `extra=` fields); the console
+# keeps the plain text format. DEBUG events are sampled per call site: the
+# first of every LOG_DEBUG_SAMPLE records from the same line is kept.
+LOG_LEVEL = os.getenv("VELORA_LOG_LEVEL", "INFO").upper()
+LOG_QUEUE_SIZE = int(os.getenv("VELORA_LOG_QUEUE_SIZE", "10000"))
+LOG_DEBUG_SAMPLE = int(os.getenv("VELORA_LOG_DEBUG_SAMPLE", "100"))
+TEXT_FORMAT = '%(asctime)s - %(levelname)s: %(message)s'
+
+# Attributes every LogRecord has; anything else came from `extra=`
+RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "sampled"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, extra fields and exception"""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES:
+                entry[key] = value
+        if getattr(record, "sampled", None):
+            entry["sample_rate"] = record.sampled
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        elif record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class DebugSampler(logging.Filter):
+    """Keep 1 in `rate` DEBUG records per call site; other levels always pass"""
+
+    def __init__(self, rate=LOG_DEBUG_SAMPLE):
+        super().__init__()
+        self.rate = max(int(rate), 1)
+        self._counters = {}
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.rate == 1:
+            return True
+        key = (record.pathname, record.lineno)
+        counter = self._counters.get(key)
+        if counter is None:
+            counter = self._counters.setdefault(key, itertools.count())
+        if next(counter) % self.rate:
+            return False
+        record.sampled = self.rate
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Render the message and traceback on the caller's thread, where the
+        # args and exc_info are still valid; extra fields stay on the record
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg, record.args, record.exc_info = record.message, None, None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class QueueWriter(logging.handlers.QueueListener):
+    """QueueListener whose stop() waits for room in a full queue rather than raising"""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+_listener = None
+_lock = threading.Lock()
+
+
+def configure_logging(path=None, level=LOG_LEVEL, console=True, stream=None, fmt=TEXT_FORMAT, queue_size=LOG_QUEUE_SIZE):
+    """
+    Route the root logger through a bounded queue to a background writer
+
+    path: JSON-lines log file (None for console only). Safe to call more
+    than once; the first call wins. Returns the queue handler.
+    """
+    global _listener
+    with _lock:
+        root = logging.getLogger()
+        if _listener is not None:
+            return next(h for h in root.handlers if isinstance(h, DroppingQueueHandler))
+
+        handlers = []
+        if path:
+            file_handler = logging.FileHandler(path)
+            file_handler.setFormatter(JsonFormatter())
+            handlers.append(file_handler)
+        if console:
+            console_handler = logging.StreamHandler(stream or sys.stderr)
+            console_handler.setFormatter(logging.Formatter(fmt))
+            handlers.append(console_handler)
+
+        queue_handler = DroppingQueueHandler(queue.Queue(queue_size))
+        queue_handler.addFilter(DebugSampler())
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        root.setLevel(level)
+
+        _listener = QueueWriter(queue_handler.queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+        return queue_handler
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
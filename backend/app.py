@@ -1,34 +1,60 @@
+import asyncio
 import numpy as np
 import pandas as pd
-import tensorflow as tf
 from fastapi import FastAPI, HTTPException, Depends, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse, JSONResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
-import yfinance as yf
 from sklearn.preprocessing import MinMaxScaler
 import json
 import os
+import sys
+import sqlite3
+import contextlib
 import logging
 from datetime import datetime, timedelta
 import jwt
 from typing import List, Dict, Any, Optional
 from uuid import uuid4
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("api.log"),
-        logging.StreamHandler()
-    ]
-)
+# Shared modules (window store, forecasting) live at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from window_store import FEATURES
+from market_data import get_provider
+from sentiment import analyze_sentiment
+from intent_router import IntentRouter
+from symbol_search import open_symbol_index
+from company_info import CompanyInfoStore
+from alerts import AlertEngine, ALERT_KINDS, alert_message
+from user_store import UserStore
+from token_cache import TokenCache
+from explanations import ExplanationEngine
+from valuation import TTLCache, value_portfolio, value_watchlist
+from forecasting import forecast_prices, DEFAULT_FORECAST_DAYS, MAX_FORECAST_DAYS
+from uncertainty import mc_forecast, has_dropout, load_mc_scale, MAX_MC_SAMPLES
+from tflite_export import load_tflite_models
+from numpy_lstm import NumpyLSTMModel, ModelBank, load_numpy_models, weights_path
+from async_logging import configure_logging
+from tracing import TracingMiddleware, span, profile_breakdown, metrics_response, REGISTRY
+
+# Configure logging: JSON lines to api.log and text to the console, written
+# by a background thread so request handlers never wait on disk
+log_handler = configure_logging("api.log", fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+REGISTRY.counter("velora_log_records_dropped_total", "Log records dropped because the logging queue was full",
+                 lambda: log_handler.dropped)
 logger = logging.getLogger("velora-ai-assistant")
 
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    """Keep company metadata warm while the server runs"""
+    company_info.start()
+    yield
+    company_info.stop()
+
 # Initialize FastAPI
-app = FastAPI(title="Velora AI Stock Assistant API")
+app = FastAPI(title="Velora AI Stock Assistant API", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -39,11 +65,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request traces and latency histograms, scraped from /metrics
+app.add_middleware(TracingMiddleware)
+
 # JWT Secret (in production, use environment variables)
 JWT_SECRET = os.getenv("JWT_SECRET", "your-secret-key-here")
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION = 24  # hours
 
+# Claims of verified tokens, reused until each token's exp
+token_cache = TokenCache()
+
+# Passwords are bcrypt hashes, as the Next.js signup route (bcryptjs) writes them
+try:
+    import bcrypt
+    BCRYPT_AVAILABLE = True
+except ImportError:
+    logger.warning("bcrypt not installed; /api/auth register and login are disabled")
+    BCRYPT_AVAILABLE = False
+
 # Serve static files
 try:
     app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -58,34 +98,68 @@ if not os.path.exists(model_path):
 
 models = {}
 
+# "keras" loads the .keras models with TensorFlow; "numpy" serves the weights
+# exported by numpy_lstm.py and never imports TensorFlow
+SERVING_BACKEND = os.getenv("VELORA_SERVING_BACKEND", "keras")
+
+try:
+    if SERVING_BACKEND == "numpy":
+        raise ImportError("NumPy serving backend selected")
+    import tensorflow as tf
+    TENSORFLOW_AVAILABLE = True
+except ImportError:
+    logger.info("Serving LSTM models with the NumPy inference kernel")
+    TENSORFLOW_AVAILABLE = False
+
 # Load all company models dynamically
 try:
-    for file in os.listdir(model_path):
-        if file.endswith(".keras") or file.endswith(".h5"):
-            ticker = file.split("_best_model")[0]  # Extract ticker symbol
-            try:
-                models[ticker] = tf.keras.models.load_model(os.path.join(model_path, file))
-                logger.info(f"Loaded model for {ticker}")
-            except Exception as e:
-                logger.error(f"Error loading model for {ticker}: {e}")
+    if not TENSORFLOW_AVAILABLE:
+        models.update(load_numpy_models(model_path))
+    else:
+        for file in os.listdir(model_path):
+            if file.endswith(".keras") or file.endswith(".h5"):
+                ticker = file.split("_best_model")[0]  # Extract ticker symbol
+                try:
+                    models[ticker] = tf.keras.models.load_model(os.path.join(model_path, file))
+                    logger.info(f"Loaded model for {ticker}")
+                except Exception as e:
+                    logger.error(f"Error loading model for {ticker}: {e}")
 except:
     logger.warning("No models found or error loading models")
 
 logger.info(f"Loaded {len(models)} stock prediction models")
 
+# Quantized TFLite exports serve point forecasts when present
+lite_models = load_tflite_models(model_path) if TENSORFLOW_AVAILABLE else {}
+logger.info(f"Loaded {len(lite_models)} TFLite models")
+
+# NumPy weights stack into cross-ticker models so a whole watchlist or
+# portfolio is forecast in one pass
+model_bank = ModelBank(models) if not TENSORFLOW_AVAILABLE else None
+
 # ================== WebSocket Manager for Chat ==================
 class ConnectionManager:
     def __init__(self):
         self.active_connections: Dict[str, WebSocket] = {}
+        # Authenticated connections per user, for pushing alerts
+        self.user_clients: Dict[str, set] = {}
+        self.loop = None
 
-    async def connect(self, websocket: WebSocket, client_id: str):
+    async def connect(self, websocket: WebSocket, client_id: str, user_id: Optional[str] = None):
         await websocket.accept()
+        self.loop = asyncio.get_running_loop()
         self.active_connections[client_id] = websocket
+        if user_id is not None:
+            self.user_clients.setdefault(user_id, set()).add(client_id)
         logger.info(f"Client {client_id[:8]}... connected. Total connections: {len(self.active_connections)}")
 
     def disconnect(self, client_id: str):
         if client_id in self.active_connections:
             del self.active_connections[client_id]
+            for user_id, clients in list(self.user_clients.items()):
+                clients.discard(client_id)
+                if not clients:
+                    del self.user_clients[user_id]
             logger.info(f"Client {client_id[:8]}... disconnected. Remaining connections: {len(self.active_connections)}")
 
     async def send_message(self, message: str, client_id: str):
@@ -96,12 +170,27 @@ class ConnectionManager:
         for connection in self.active_connections.values():
             await connection.send_text(message)
 
+    async def send_to_user(self, message: str, user_id: str):
+        for client_id in list(self.user_clients.get(user_id, ())):
+            try:
+                await self.send_message(message, client_id)
+            except Exception as e:
+                logger.warning(f"Error pushing to client {client_id[:8]}...: {e}")
+
+    def notify_user(self, message: str, user_id: str):
+        """send_to_user from any thread (request handlers run in the threadpool)"""
+        if self.loop is None or user_id not in self.user_clients:
+            return
+        asyncio.run_coroutine_threadsafe(self.send_to_user(message, user_id), self.loop)
+
 manager = ConnectionManager()
 
 # ================== Data Models ==================
 class StockRequest(BaseModel):
     ticker: str
     period: Optional[str] = "60d"
+    days: Optional[int] = DEFAULT_FORECAST_DAYS
+    samples: Optional[int] = 0  # > 0 enables MC dropout uncertainty with this many passes
 
 class ChatMessage(BaseModel):
     message: str
@@ -120,6 +209,11 @@ class WatchlistItem(BaseModel):
     ticker: str
     user_id: str
 
+class PortfolioItem(BaseModel):
+    ticker: str
+    shares: float
+    avg_price: float
+
 # ================== Authentication ==================
 def create_access_token(data: dict):
     to_encode = data.copy()
@@ -128,6 +222,9 @@ def create_access_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGORITHM)
     return encoded_jwt
 
+def decode_access_token(token):
+    return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+
 async def get_current_user(request: Request):
     credentials_exception = HTTPException(
         status_code=401,
@@ -142,7 +239,7 @@ async def get_current_user(request: Request):
     token = token.replace("Bearer ", "")
     
     try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        payload = token_cache.verify(token, decode_access_token)
         user_id: str = payload.get("sub")
         if user_id is None:
             raise credentials_exception
@@ -154,8 +251,7 @@ async def get_current_user(request: Request):
 def fetch_stock_data(ticker, period="60d"):
     """Fetch historical stock data for prediction"""
     try:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period=period)
+        hist = get_provider().history(ticker, period=period)
         if hist.empty:
             logger.warning(f"No data found for ticker {ticker}")
             raise HTTPException(status_code=404, detail=f"No data found for ticker {ticker}")
@@ -164,35 +260,11 @@ def fetch_stock_data(ticker, period="60d"):
         logger.error(f"Error fetching data for {ticker}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error fetching data for {ticker}: {str(e)}")
 
-def preprocess_stock_data(data, look_back=60):
-    """Prepare stock data for LSTM prediction"""
-    try:
-        # Extract closing prices
-        close_prices = data["Close"].values
-        
-        # Normalize the data
-        scaler = MinMaxScaler(feature_range=(0, 1))
-        scaled_data = scaler.fit_transform(close_prices.reshape(-1, 1))
-        
-        # If we don't have enough data, pad with the earliest available data
-        if len(scaled_data) < look_back:
-            padding = np.repeat(scaled_data[0], look_back - len(scaled_data))
-            scaled_data = np.concatenate((padding.reshape(-1, 1), scaled_data))
-            
-        # Take the last look_back days
-        model_input = scaled_data[-look_back:].reshape(1, look_back, 1)
-        
-        return model_input, scaler, close_prices[-1]
-    except Exception as e:
-        logger.error(f"Error preprocessing data: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error preprocessing data: {str(e)}")
-
-def generate_mock_prediction(ticker, days=3):
+def generate_mock_prediction(ticker, days=DEFAULT_FORECAST_DAYS):
     """Generate mock prediction when no model is available"""
     try:
-        # Get current price from Yahoo Finance
-        stock = yf.Ticker(ticker)
-        data = stock.history(period="5d")
+        # Get current price from the market data provider
+        data = get_provider().history(ticker, period="5d")
         
         if data.empty:
             logger.warning(f"No data found for ticker {ticker}")
@@ -272,12 +344,17 @@ def generate_mock_prediction(ticker, days=3):
             "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
 
-def predict_stock_price(ticker, days=3):
+def predict_stock_price(ticker, days=DEFAULT_FORECAST_DAYS, samples=0):
     """Predict stock price for the next several days"""
     if ticker not in models:
         # Try to load the model if not already loaded
         model_file = os.path.join(model_path, f"{ticker}_best_model.keras")
-        if not os.path.exists(model_file):
+        if not TENSORFLOW_AVAILABLE:
+            model_file = weights_path(ticker, model_path)
+            if not os.path.exists(model_file):
+                logger.warning(f"No model found for {ticker}, using default prediction")
+                return generate_mock_prediction(ticker, days)
+        elif not os.path.exists(model_file):
             model_file = os.path.join(model_path, f"{ticker}_best_model.h5")
             if not os.path.exists(model_file):
                 logger.warning(f"No model found for {ticker}, using default prediction")
@@ -285,7 +362,10 @@ def predict_stock_price(ticker, days=3):
                 return generate_mock_prediction(ticker, days)
         
         try:
-            models[ticker] = tf.keras.models.load_model(model_file)
+            if TENSORFLOW_AVAILABLE:
+                models[ticker] = tf.keras.models.load_model(model_file)
+            else:
+                models[ticker] = NumpyLSTMModel.load(model_file)
             logger.info(f"Loaded model for {ticker}")
         except Exception as e:
             logger.error(f"Error loading model for {ticker}: {e}")
@@ -293,37 +373,28 @@ def predict_stock_price(ticker, days=3):
     
     try:
         # Fetch historical data
-        data = fetch_stock_data(ticker, period="120d")
+        with span("fetch"):
+            data = fetch_stock_data(ticker, period="120d")
         
-        # Preprocess data
-        model_input, scaler, last_price = preprocess_stock_data(data)
-        
-        # Make prediction
-        model = models[ticker]
-        raw_predictions = model.predict(model_input, verbose=0)
+        # Roll the model forward for every requested day in one batched call
+        window = data.reindex(columns=FEATURES).ffill().fillna(0).values[-60:]
+        with span("forecast"):
+            if samples and has_dropout(models[ticker]):
+                forecast = mc_forecast(models[ticker], window, days, samples, load_mc_scale(ticker, model_path))
+                uncertainty = {"method": "mc_dropout", "samples": samples}
+            else:
+                forecast = forecast_prices(lite_models.get(ticker, models[ticker]), window, days)
+                uncertainty = {"method": "volatility", "samples": 0}
+        # Per-request event; sampled (VELORA_LOG_DEBUG_SAMPLE) when DEBUG is enabled
+        logger.debug(f"Forecast {ticker} for {days} days", extra={"ticker": ticker, "days": days, "method": uncertainty["method"]})
+        last_price = float(data["Close"].iloc[-1])
         
-        # Process predictions
         predictions = []
-        predicted_values = scaler.inverse_transform(raw_predictions)
-        
-        # Calculate confidence levels based on model uncertainty
-        # In a real system, this would use proper uncertainty estimation
-        confidence_base = 95  # Base confidence percentage
-        confidence_decay = 5   # Percentage points to reduce per day
-        
         current_date = datetime.now()
         
-        for i in range(days):
+        for i in range(len(forecast["price"])):
             prediction_date = (current_date + timedelta(days=i+1)).strftime("%Y-%m-%d")
-            confidence = max(50, confidence_base - (i * confidence_decay))  # Decay confidence over time
-            
-            # Calculate prediction price - this is simplified
-            # In a real system, you'd use the actual model output for each day
-            if i < len(predicted_values):
-                predicted_price = float(predicted_values[0][i])
-            else:
-                # For days beyond model output, extrapolate
-                predicted_price = float(predicted_values[0][-1]) * (1 + (0.01 * np.random.randn()))
+            predicted_price = float(forecast["price"][i])
             
             # Determine if it's a buy/sell/hold recommendation
             price_change_pct = (predicted_price - last_price) / last_price * 100
@@ -339,10 +410,15 @@ def predict_stock_price(ticker, days=3):
                 "date": prediction_date,
                 "price": round(predicted_price, 2),
                 "change_percent": round(price_change_pct, 2),
-                "confidence": confidence,
+                "confidence": round(float(forecast["confidence"][i]), 1),
+                "lower": round(float(forecast["lower"][i]), 2),
+                "upper": round(float(forecast["upper"][i]), 2),
                 "recommendation": recommendation
             })
         
+        previous_close = float(data["Close"].iloc[-2]) if len(data) > 1 else None
+        check_alerts(ticker, last_price, previous_close, predictions[0]["change_percent"] if predictions else None)
+        
         # Also include historical data for charting
         historical = []
         for date, row in data.tail(30).iterrows():
@@ -356,6 +432,7 @@ def predict_stock_price(ticker, days=3):
             "current_price": round(last_price, 2),
             "predictions": predictions,
             "historical": historical,
+            "uncertainty": uncertainty,
             "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
         
@@ -366,100 +443,75 @@ def predict_stock_price(ticker, days=3):
         return generate_mock_prediction(ticker, days)
 
 def get_stock_info(ticker):
-    """Get company information and summary for a stock"""
-    try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
-        
-        # Extract relevant company information
-        return {
-            "name": info.get("longName", "Unknown"),
-            "sector": info.get("sector", "Unknown"),
-            "industry": info.get("industry", "Unknown"),
-            "country": info.get("country", "Unknown"),
-            "website": info.get("website", ""),
-            "market_cap": info.get("marketCap", 0),
-            "pe_ratio": info.get("trailingPE", 0),
-            "description": info.get("longBusinessSummary", "No description available.")
-        }
-    except Exception as e:
-        logger.error(f"Error fetching info for {ticker}: {str(e)}")
-        return {
-            "name": ticker,
-            "sector": "Unknown",
-            "industry": "Unknown",
-            "description": "Could not retrieve company information."
-        }
+    """Get company information and summary for a stock (from the company metadata store)"""
+    info = company_info.get(ticker)
+    if info is not None:
+        return info
+
+    symbol = symbol_index.get(ticker)
+    return {
+        "name": symbol["name"] if symbol else ticker,
+        "sector": "Unknown",
+        "industry": "Unknown",
+        "description": "Could not retrieve company information."
+    }
 
 # ================== AI Assistant (Chatbot) Logic ==================
-# In a production system, this would likely use a language model API
+# Symbol master index behind /api/search; also the company names the chat
+# router recognizes
+symbol_index = open_symbol_index()
+
+# Compiled once: keyword automaton plus a ticker/company-name trie over the
+# symbol master and every ticker with a model
+intent_router = IntentRouter(symbol_index.records + [{"ticker": t} for t in models])
+
+# Company metadata for get_stock_info, persisted to data/company_info.json and
+# refreshed in the background for every symbol master and model ticker
+company_info = CompanyInfoStore(universe=dict.fromkeys([r["ticker"] for r in symbol_index.records] + list(models)))
+
+# Explanations fill precompiled templates with the trend, volatility and
+# momentum labels from indicators.describe (vectorized NumPy over the
+# recent closes), memoized per (ticker, prediction snapshot)
+explanation_engine = ExplanationEngine()
+
 def generate_stock_explanation(ticker, prediction_data):
     """Generate natural language explanation for stock predictions"""
     try:
         company_info = get_stock_info(ticker)
         company_name = company_info.get("name", ticker)
         sector = company_info.get("sector", "Unknown")
-        
-        current_price = prediction_data.get("current_price", 0)
-        predictions = prediction_data.get("predictions", [])
-        
-        if not predictions:
-            return f"I currently don't have enough data to explain the prediction for {company_name} ({ticker})."
-        
-        # Get the prediction for tomorrow (first day)
-        tomorrow = predictions[0]
-        price = tomorrow.get("price", 0)
-        change_pct = tomorrow.get("change_percent", 0)
-        confidence = tomorrow.get("confidence", 0)
-        recommendation = tomorrow.get("recommendation", "HOLD")
-        
-        # Generate explanation based on prediction data
-        explanation = f"Based on our LSTM model analysis, {company_name} ({ticker}) is currently trading at ${current_price}. "
-        
-        if change_pct > 0:
-            explanation += f"Our model predicts the price will increase by {change_pct:.2f}% to ${price:.2f} tomorrow. "
-        elif change_pct < 0:
-            explanation += f"Our model predicts the price will decrease by {abs(change_pct):.2f}% to ${price:.2f} tomorrow. "
-        else:
-            explanation += f"Our model predicts the price will remain stable at around ${price:.2f} tomorrow. "
-        
-        explanation += f"The confidence level for this prediction is {confidence}%. "
-        
-        # Add recommendation
-        if recommendation == "BUY":
-            explanation += "Based on this analysis, our system suggests this stock may be a good buying opportunity. "
-        elif recommendation == "SELL":
-            explanation += "Based on this analysis, our system suggests this may be a good time to consider selling. "
-        else:
-            explanation += "Based on this analysis, our system suggests holding this position for now. "
-        
-        # Add sector context
-        explanation += f"Note that {company_name} operates in the {sector} sector, which should be considered in your investment decisions."
-        
-        # Disclaimer
-        explanation += "\n\nPlease note that all predictions are based on historical data and market patterns, and should not be considered as financial advice."
-        
-        return explanation
+        return explanation_engine.chat(ticker, prediction_data, company_name, sector)
     
     except Exception as e:
         logger.error(f"Error generating explanation for {ticker}: {str(e)}")
         return f"I'm having trouble generating an explanation for {ticker} at the moment. Please try again later."
 
-def process_chat_message(message, ticker=None):
-    """Process incoming chat messages and generate responses"""
-    message = message.lower().strip()
+def process_chat_message(message, ticker=None, prediction_data=None, parsed=None, explanation=None):
+    """
+    Process incoming chat messages and generate responses
+
+    parsed, explanation: the message's intent_router.route result and the
+    ticker's explanation, when the caller has already computed them.
+    """
+    # Intents and ticker mentions come from a single pass over the message
+    if parsed is None:
+        parsed = intent_router.route(message)
+    if not ticker and parsed.tickers:
+        ticker = parsed.tickers[0]
     
     # If we have an active ticker, prioritize that context
     if ticker:
+        intent = parsed.intent(with_ticker=True)
         try:
-            # Get prediction data
-            prediction_data = predict_stock_price(ticker)
+            # Get prediction data unless the caller already has it
+            if prediction_data is None:
+                prediction_data = predict_stock_price(ticker)
             
             # Handle different types of questions
-            if "explain" in message or "why" in message or "how" in message or "analysis" in message:
-                return generate_stock_explanation(ticker, prediction_data)
+            if intent == "explain":
+                return explanation if explanation is not None else generate_stock_explanation(ticker, prediction_data)
                 
-            elif "price" in message or "predict" in message or "forecast" in message:
+            elif intent == "price":
                 predictions = prediction_data.get("predictions", [])
                 if not predictions:
                     return f"I don't have enough data to predict {ticker}'s price movement."
@@ -469,7 +521,7 @@ def process_chat_message(message, ticker=None):
                     response += f"• {pred['date']}: ${pred['price']} ({'+' if pred['change_percent'] > 0 else ''}{pred['change_percent']}%) - {pred['recommendation']}\n"
                 return response
                 
-            elif "confidence" in message or "accuracy" in message or "certain" in message:
+            elif intent == "confidence":
                 predictions = prediction_data.get("predictions", [])
                 if not predictions:
                     return f"I don't have confidence metrics available for {ticker} at the moment."
@@ -477,7 +529,7 @@ def process_chat_message(message, ticker=None):
                 avg_confidence = sum(p["confidence"] for p in predictions) / len(predictions)
                 return f"My predictions for {ticker} have an average confidence level of {avg_confidence:.1f}%. The confidence decreases the further into the future we predict."
                 
-            elif "buy" in message or "sell" in message or "invest" in message or "recommend" in message:
+            elif intent == "recommend":
                 predictions = prediction_data.get("predictions", [])
                 if not predictions:
                     return f"I don't have enough data to make a recommendation for {ticker}."
@@ -503,22 +555,23 @@ def process_chat_message(message, ticker=None):
             return f"I encountered an issue while analyzing {ticker}. Please try again later."
     
     # General questions without ticker context
-    if "how do you" in message or "how does your" in message or "how are predictions" in message:
+    intent = parsed.intent(with_ticker=False)
+    if intent == "how_it_works":
         return "I use Long Short-Term Memory (LSTM) neural networks to make stock predictions. This deep learning approach is well-suited for time series forecasting as it can learn patterns in historical price data. My models consider factors like historical prices, trading volume, and market trends to generate predictions."
     
-    elif "accuracy" in message or "how accurate" in message:
+    elif intent == "accuracy":
         return "My prediction accuracy varies by stock and time horizon. Generally, short-term predictions (1-3 days) tend to be more accurate than longer-term forecasts. On average, my predictions achieve 70-85% directional accuracy for major stocks in stable market conditions. Every prediction includes a confidence score to help you gauge reliability."
     
-    elif "which stocks" in message or "what stocks" in message or "recommend stocks" in message:
+    elif intent == "stock_picks":
         return "I don't provide general stock recommendations as proper investment advice should consider your personal financial situation, goals, and risk tolerance. I can, however, analyze specific stocks you're interested in and provide predictions based on historical data patterns."
     
-    elif "hello" in message or "hi" in message or "hey" in message:
+    elif intent == "greeting":
         return "Hello! I'm your AI stock prediction assistant. I can help analyze stock trends, explain price forecasts, and answer questions about specific stocks. What would you like to know today?"
     
-    elif "thank" in message:
+    elif intent == "thanks":
         return "You're welcome! If you have any other questions about stocks or predictions, feel free to ask."
     
-    elif "help" in message:
+    elif intent == "help":
         return """I can help you with:
 1. Stock price predictions for specific tickers
 2. Explanations of why a stock might move in a certain direction
@@ -537,9 +590,65 @@ Try asking something like:
         return "I'm your AI stock prediction assistant. I can analyze specific stocks, explain price predictions, and answer questions about market trends. To get started, ask me about a specific stock ticker like AAPL, MSFT, or GOOGL."
 
 # ================== WebSocket Chat Endpoint ==================
+# Predictions and explanations are synchronous and can take hundreds of
+# milliseconds, so chat work runs in the threadpool and never blocks the event
+# loop. Each message is acknowledged immediately and its results stream back
+# as separate frames tagged with the message id:
+#   ack -> prediction -> explanation -> sentiment -> bot_response
+CHAT_MAX_INFLIGHT = int(os.getenv("VELORA_CHAT_MAX_INFLIGHT", "4"))
+
+async def send_chat_frame(client_id, frame_type, message_id, **fields):
+    await manager.send_message(
+        json.dumps({
+            "type": frame_type,
+            "id": message_id,
+            **fields,
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }, default=str),
+        client_id
+    )
+
+async def stream_chat_response(client_id, message_id, user_message, ticker, inflight, parsed=None):
+    """Run one chat message off the event loop, streaming partial results as they are ready"""
+    async with inflight:
+        try:
+            prediction_data = explanation = None
+            if ticker:
+                try:
+                    prediction_data = await run_in_threadpool(predict_stock_price, ticker)
+                except Exception as e:
+                    logger.error(f"Error in chat prediction for {ticker}: {str(e)}")
+                    await send_chat_frame(client_id, "bot_response", message_id,
+                                          message=f"I encountered an issue while analyzing {ticker}. Please try again later.")
+                    return
+                
+                # Price first: it is what the user is waiting for
+                await send_chat_frame(client_id, "prediction", message_id,
+                                      ticker=ticker,
+                                      current_price=prediction_data.get("current_price"),
+                                      predictions=prediction_data.get("predictions", []))
+                
+                explanation = await run_in_threadpool(generate_stock_explanation, ticker, prediction_data)
+                await send_chat_frame(client_id, "explanation", message_id, ticker=ticker, message=explanation)
+                
+                sentiment_data = await run_in_threadpool(analyze_sentiment, ticker)
+                await send_chat_frame(client_id, "sentiment", message_id,
+                                      ticker=ticker,
+                                      sentiment=sentiment_data["sentiment"],
+                                      sentiment_score=sentiment_data["sentiment_score"],
+                                      message=sentiment_data["analysis"])
+            
+            response = await run_in_threadpool(process_chat_message, user_message, ticker, prediction_data, parsed, explanation)
+            await send_chat_frame(client_id, "bot_response", message_id, message=response)
+        except Exception as e:
+            # The client may have disconnected mid-stream
+            logger.error(f"Error streaming chat response to client {client_id}: {str(e)}")
+
 @app.websocket("/ws/chat/{client_id}")
 async def websocket_endpoint(websocket: WebSocket, client_id: str):
     await manager.connect(websocket, client_id)
+    inflight = asyncio.Semaphore(CHAT_MAX_INFLIGHT)
+    tasks = set()
     try:
         while True:
             data = await websocket.receive_text()
@@ -548,21 +657,11 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
                 # Parse incoming message
                 message_data = json.loads(data)
                 user_message = message_data.get("message", "")
-                ticker = message_data.get("ticker")  # Optional ticker context
-                
-                # Generate response
-                response = process_chat_message(user_message, ticker)
-                
-                # Send response
-                await manager.send_message(
-                    json.dumps({
-                        "type": "bot_response",
-                        "message": response,
-                        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    }),
-                    client_id
-                )
-                
+                # Optional ticker context, else the first ticker the message names;
+                # the routed message is passed down so it is parsed only once
+                parsed = intent_router.route(user_message)
+                ticker = message_data.get("ticker") or (parsed.tickers[0] if parsed.tickers else None)
+                message_id = str(message_data.get("id") or uuid4())
             except json.JSONDecodeError:
                 logger.error(f"Invalid JSON received from client {client_id}")
                 await manager.send_message(
@@ -572,8 +671,22 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
                     }),
                     client_id
                 )
+                continue
+            
+            # Acknowledge right away, then stream the response from a background task
+            await send_chat_frame(client_id, "ack", message_id)
+            task = asyncio.create_task(
+                stream_chat_response(client_id, message_id, user_message, ticker.upper() if ticker else None, inflight, parsed)
+            )
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
     except WebSocketDisconnect:
+        pass
+    finally:
+        # Any exit, not only a clean disconnect, drops the pending responses
         manager.disconnect(client_id)
+        for task in tasks:
+            task.cancel()
 
 # ================== API Endpoints ==================
 @app.get("/")
@@ -581,20 +694,34 @@ def read_root():
     return {"message": "Welcome to Velora AI Stock Assistant API", "version": "1.0.0"}
 
 @app.post("/api/predict")
-def predict_stock(request: StockRequest):
-    """Get stock price predictions"""
+def predict_stock(request: StockRequest, profile: bool = False):
+    """Get stock price predictions; ?profile=1 adds a per-stage timing breakdown"""
     ticker = request.ticker.upper()
-    predictions = predict_stock_price(ticker)
+    if not 1 <= request.days <= MAX_FORECAST_DAYS:
+        raise HTTPException(status_code=400, detail=f"days must be between 1 and {MAX_FORECAST_DAYS}")
+    if not 0 <= request.samples <= MAX_MC_SAMPLES:
+        raise HTTPException(status_code=400, detail=f"samples must be between 0 and {MAX_MC_SAMPLES}")
+    with span("predict"):
+        predictions = predict_stock_price(ticker, request.days, request.samples)
+    if profile:
+        predictions["profile"] = profile_breakdown()
     return predictions
 
 @app.post("/api/explain")
 def explain_prediction(request: StockRequest):
     """Get natural language explanation for stock prediction"""
     ticker = request.ticker.upper()
-    predictions = predict_stock_price(ticker)
-    explanation = generate_stock_explanation(ticker, predictions)
+    with span("predict"):
+        predictions = predict_stock_price(ticker)
+    with span("explanation"):
+        explanation = generate_stock_explanation(ticker, predictions)
     return {"ticker": ticker, "explanation": explanation}
 
+@app.get("/metrics")
+def metrics():
+    """Prometheus scrape endpoint: request latency per route and time per traced stage"""
+    return metrics_response()
+
 @app.post("/api/chat")
 def chat(message: ChatMessage):
     """Non-WebSocket chat endpoint for simple integrations"""
@@ -609,55 +736,62 @@ def get_stock_details(ticker: str):
     return info
 
 @app.get("/api/search")
-def search_stocks(q: str):
-    """Search for stocks by name or ticker"""
-    # This is a simplified implementation
-    # In a real app, you would use a proper stock search API or database
+def search_stocks(q: str, limit: int = 5):
+    """Search for stocks by ticker or company name (prefix and typo tolerant)"""
     if not q or len(q) < 2:
         return {"results": []}
     
-    # Hardcoded sample data for demonstration
-    sample_stocks = [
-        {"ticker": "AAPL", "name": "Apple Inc."},
-        {"ticker": "MSFT", "name": "Microsoft Corporation"},
-        {"ticker": "GOOGL", "name": "Alphabet Inc."},
-        {"ticker": "AMZN", "name": "Amazon.com Inc."},
-        {"ticker": "TSLA", "name": "Tesla, Inc."},
-        {"ticker": "META", "name": "Meta Platforms Inc."},
-        {"ticker": "NVDA", "name": "NVIDIA Corporation"},
-        {"ticker": "JPM", "name": "JPMorgan Chase & Co."},
-        {"ticker": "V", "name": "Visa Inc."},
-        {"ticker": "WMT", "name": "Walmart Inc."}
-    ]
-    
-    # Filter results
-    q = q.lower()
-    results = [stock for stock in sample_stocks 
-              if q in stock["ticker"].lower() or q in stock["name"].lower()]
-    
-    return {"results": results[:5]}  # Limit to 5 results
+    results = symbol_index.search(q, limit=min(max(limit, 1), 50))
+    return {"results": [{"ticker": r["ticker"], "name": r["name"], "exchange": r["exchange"]} for r in results]}
 
 # ================== Authentication Endpoints ==================
 @app.post("/api/auth/register")
 def register_user(user: UserRegistration):
-    """Register a new user"""
-    # In a real app, you would validate, hash the password, and store in a database
-    user_id = str(uuid4())
+    """Register a new user in the shared user database"""
+    if not BCRYPT_AVAILABLE:
+        raise HTTPException(status_code=503, detail="Registration unavailable: bcrypt is not installed")
+    email = user.email.strip()
+    password_hash = bcrypt.hashpw(user.password.encode(), bcrypt.gensalt(10)).decode()
+    try:
+        user_id = user_store.create_user(email, user.full_name, password_hash)
+    except sqlite3.IntegrityError:
+        raise HTTPException(status_code=400, detail="Email already registered")
+    except sqlite3.Error as e:
+        logger.error(f"Error registering {email}: {e}")
+        raise HTTPException(status_code=500, detail="Error registering user")
     return {
         "message": "User registered successfully",
         "user_id": user_id,
-        "access_token": create_access_token({"sub": user_id, "email": user.email}),
+        "access_token": create_access_token({"sub": user_id, "email": email}),
         "token_type": "bearer"
     }
 
 @app.post("/api/auth/login")
 def login_user(user: UserLogin):
-    """Log in a user"""
-    # In a real app, you would validate against a database
-    # This is a mockup that always succeeds
-    user_id = str(uuid4())
+    """
+    Log in a user; the token's sub is the stored User.id for the email
+
+    Fails closed: unknown emails, rows without a bcrypt hash and wrong
+    passwords all get 401, and every login gets 503 without bcrypt.
+    """
+    if not BCRYPT_AVAILABLE:
+        raise HTTPException(status_code=503, detail="Login unavailable: bcrypt is not installed")
+    email = user.email.strip()
+    try:
+        record = user_store.user_by_email(email)
+    except sqlite3.Error as e:
+        logger.error(f"Error logging in {email}: {e}")
+        raise HTTPException(status_code=500, detail="Error logging in")
+    stored = (record or {}).get("password") or ""
+    try:
+        valid = stored.startswith("$2") and bcrypt.checkpw(user.password.encode(), stored.encode())
+    except ValueError:
+        # Malformed hash
+        valid = False
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid email or password")
     return {
-        "access_token": create_access_token({"sub": user_id, "email": user.email}),
+        "access_token": create_access_token({"sub": record["id"], "email": email}),
         "token_type": "bearer"
     }
 
@@ -672,32 +806,220 @@ def get_user_profile(user_id: str = Depends(get_current_user)):
         "membership": "Premium"
     }
 
-# ================== Watchlist Endpoints ==================
+# ================== Watchlist & Portfolio Endpoints ==================
+# Rows live in the Prisma database (prisma/dev.db); valuations are batched
+# across tickers and cached per user until the TTL passes or the user's rows change
+user_store = UserStore()
+valuation_cache = TTLCache()
+
+def serving_models():
+    return {**models, **lite_models}
+
+def company_name(ticker):
+    record = symbol_index.get(ticker)
+    return record["name"] if record else ticker
+
 @app.post("/api/watchlist/add")
 def add_to_watchlist(item: WatchlistItem, user_id: str = Depends(get_current_user)):
     """Add a stock to user's watchlist"""
-    # In a real app, you would store this in a database
-    return {"message": f"Added {item.ticker} to watchlist", "status": "success"}
+    ticker = item.ticker.upper()
+    try:
+        added = user_store.add_to_watchlist(user_id, ticker, company_name(ticker))
+    except sqlite3.Error as e:
+        logger.error(f"Error adding {ticker} to watchlist: {e}")
+        raise HTTPException(status_code=503, detail="Watchlist storage unavailable")
+    valuation_cache.invalidate(user_id)
+    if not added:
+        return {"message": f"{ticker} is already in your watchlist", "status": "success"}
+    return {"message": f"Added {ticker} to watchlist", "status": "success"}
 
 @app.get("/api/watchlist")
 def get_watchlist(user_id: str = Depends(get_current_user)):
-    """Get user's watchlist"""
-    # In a real app, you would fetch this from a database
-    # Mock data for demonstration
-    return {
-        "watchlist": [
-            {"ticker": "AAPL", "name": "Apple Inc.", "added_on": "2025-03-10"},
-            {"ticker": "MSFT", "name": "Microsoft Corporation", "added_on": "2025-03-12"},
-            {"ticker": "GOOGL", "name": "Alphabet Inc.", "added_on": "2025-03-14"}
-        ]
-    }
+    """Get user's watchlist with live quotes and next-day forecasts"""
+    def compute():
+        return {"watchlist": value_watchlist(user_store.watchlist(user_id), serving_models(), model_bank)}
+    try:
+        return valuation_cache.cached((user_id, "watchlist"), compute)
+    except sqlite3.Error as e:
+        logger.error(f"Error reading watchlist: {e}")
+        raise HTTPException(status_code=503, detail="Watchlist storage unavailable")
 
 @app.delete("/api/watchlist/{ticker}")
 def remove_from_watchlist(ticker: str, user_id: str = Depends(get_current_user)):
     """Remove a stock from user's watchlist"""
-    # In a real app, you would update a database
+    ticker = ticker.upper()
+    try:
+        removed = user_store.remove_from_watchlist(user_id, ticker)
+    except sqlite3.Error as e:
+        logger.error(f"Error removing {ticker} from watchlist: {e}")
+        raise HTTPException(status_code=503, detail="Watchlist storage unavailable")
+    valuation_cache.invalidate(user_id)
+    if not removed:
+        raise HTTPException(status_code=404, detail=f"{ticker} is not in your watchlist")
     return {"message": f"Removed {ticker} from watchlist", "status": "success"}
 
+@app.get("/api/portfolio")
+def get_portfolio(user_id: str = Depends(get_current_user)):
+    """Get user's holdings valued at the latest prices"""
+    def compute():
+        holdings = user_store.holdings(user_id)
+        portfolio = value_portfolio(holdings, serving_models(), model_bank,
+                                    names={h["ticker"]: company_name(h["ticker"]) for h in holdings})
+        user_store.update_current_prices(user_id, {row["symbol"]: row["currentPrice"] for row in portfolio["holdings"]})
+        return portfolio
+    try:
+        return valuation_cache.cached((user_id, "portfolio"), compute)
+    except sqlite3.Error as e:
+        logger.error(f"Error reading portfolio: {e}")
+        raise HTTPException(status_code=503, detail="Portfolio storage unavailable")
+
+@app.post("/api/portfolio/add")
+def add_to_portfolio(item: PortfolioItem, user_id: str = Depends(get_current_user)):
+    """Add shares to a holding (merged at the weighted average price)"""
+    ticker = item.ticker.upper()
+    if item.shares <= 0 or item.avg_price <= 0:
+        raise HTTPException(status_code=400, detail="shares and avg_price must be positive")
+    try:
+        user_store.add_holding(user_id, ticker, item.shares, item.avg_price)
+    except sqlite3.Error as e:
+        logger.error(f"Error adding {ticker} to portfolio: {e}")
+        raise HTTPException(status_code=503, detail="Portfolio storage unavailable")
+    valuation_cache.invalidate(user_id)
+    return {"message": f"Added {item.shares:g} shares of {ticker} to portfolio", "status": "success"}
+
+@app.delete("/api/portfolio/{ticker}")
+def remove_from_portfolio(ticker: str, user_id: str = Depends(get_current_user)):
+    """Remove a holding from user's portfolio"""
+    ticker = ticker.upper()
+    try:
+        removed = user_store.remove_holding(user_id, ticker)
+    except sqlite3.Error as e:
+        logger.error(f"Error removing {ticker} from portfolio: {e}")
+        raise HTTPException(status_code=503, detail="Portfolio storage unavailable")
+    valuation_cache.invalidate(user_id)
+    if not removed:
+        raise HTTPException(status_code=404, detail=f"{ticker} is not in your portfolio")
+    return {"message": f"Removed {ticker} from portfolio", "status": "success"}
+
+# ================== Price Alerts ==================
+# Rules live in the Prisma "Alert" table and are indexed in memory by ticker
+# and threshold; every price/forecast computed by predict_stock_price is fed
+# to the engine and fired alerts are pushed to the user's /ws/alerts sockets.
+# There is no background price feed: a ticker's rules are only evaluated when
+# a prediction for it is computed (/api/predict, /api/explain or chat).
+class AlertRule(BaseModel):
+    ticker: str
+    kind: str  # price_above, price_below, percent_move, prediction_change
+    threshold: float
+    repeat: Optional[bool] = False
+
+def load_alert_engine():
+    try:
+        return AlertEngine(user_store.active_alerts())
+    except sqlite3.Error as e:
+        logger.warning(f"Alert rules unavailable, starting with none: {e}")
+        return AlertEngine()
+
+alert_engine = load_alert_engine()
+logger.info(f"Loaded {len(alert_engine)} alert rules")
+
+def check_alerts(ticker, price, previous_close=None, predicted_change=None):
+    """Evaluate ticker's alert rules against a new price/forecast; fired alerts are stored and pushed"""
+    try:
+        fired = [(rule, price) for rule in alert_engine.on_price(ticker, price, previous_close)]
+        if predicted_change is not None:
+            fired += [(rule, predicted_change) for rule in alert_engine.on_prediction(ticker, predicted_change)]
+        if not fired:
+            return
+        user_store.mark_triggered([rule["id"] for rule, _ in fired], {rule["id"] for rule, _ in fired if not rule["repeat"]})
+        for rule, value in fired:
+            manager.notify_user(json.dumps({
+                "type": "alert",
+                "id": rule["id"],
+                "ticker": ticker,
+                "kind": rule["kind"],
+                "threshold": rule["threshold"],
+                "message": alert_message(rule, value),
+                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            }), rule["user_id"])
+        logger.info(f"Fired {len(fired)} alerts for {ticker}")
+    except Exception as e:
+        logger.error(f"Error evaluating alerts for {ticker}: {e}")
+
+def alert_storage_error():
+    """503 for a failed alert query, naming the pending migration when the Alert table is missing"""
+    try:
+        missing = "Alert" in user_store.missing_tables()
+    except sqlite3.Error:
+        missing = False
+    if missing:
+        return HTTPException(status_code=503, detail="Alert storage unavailable: run `npx prisma migrate deploy`")
+    return HTTPException(status_code=503, detail="Alert storage unavailable")
+
+@app.get("/api/alerts")
+def get_alerts(user_id: str = Depends(get_current_user)):
+    """List the user's alert rules"""
+    try:
+        return {"alerts": user_store.alerts(user_id)}
+    except sqlite3.Error as e:
+        logger.error(f"Error reading alerts: {e}")
+        raise alert_storage_error()
+
+@app.post("/api/alerts")
+def create_alert(rule: AlertRule, user_id: str = Depends(get_current_user)):
+    """
+    Create an alert rule; it fires the next time the metric crosses the threshold
+
+    Rules are only evaluated when a prediction for their ticker is computed
+    (/api/predict, /api/explain or a chat message about it), so a crossing
+    is noticed on the first such request after it, not as the market moves.
+    """
+    if rule.kind not in ALERT_KINDS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of {list(ALERT_KINDS)}")
+    if rule.threshold <= 0:
+        raise HTTPException(status_code=400, detail="threshold must be positive")
+    try:
+        alert = user_store.add_alert(user_id, rule.ticker.upper(), rule.kind, rule.threshold, rule.repeat)
+    except sqlite3.Error as e:
+        logger.error(f"Error creating alert: {e}")
+        raise alert_storage_error()
+    alert_engine.add(alert)
+    return {"alert": alert, "status": "success"}
+
+@app.delete("/api/alerts/{alert_id}")
+def delete_alert(alert_id: str, user_id: str = Depends(get_current_user)):
+    """Delete one of the user's alert rules"""
+    try:
+        removed = user_store.remove_alert(user_id, alert_id)
+    except sqlite3.Error as e:
+        logger.error(f"Error deleting alert: {e}")
+        raise alert_storage_error()
+    if not removed:
+        raise HTTPException(status_code=404, detail="Alert not found")
+    alert_engine.remove(alert_id)
+    return {"message": "Alert deleted", "status": "success"}
+
+@app.websocket("/ws/alerts/{client_id}")
+async def alerts_websocket(websocket: WebSocket, client_id: str, token: str = ""):
+    """
+    Push channel for fired alerts; authenticate with ?token=<access token>
+
+    Alerts are pushed as predictions for their tickers are computed (see create_alert).
+    """
+    try:
+        user_id = token_cache.verify(token, decode_access_token).get("sub")
+    except jwt.PyJWTError:
+        user_id = None
+    if not user_id:
+        await websocket.close(code=1008)
+        return
+    await manager.connect(websocket, client_id, user_id)
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        manager.disconnect(client_id)
+
 # ================== Main run function ==================
 if __name__ == "__main__":
     import uvicorn
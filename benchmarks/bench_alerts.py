@@ -0,0 +1,111 @@
+"""
+Benchmark alert evaluation per tick with the threshold index vs a linear scan
+
+Loads --rules random rules (price above/below, percent move, prediction
+change) over --tickers tickers into an AlertEngine, then replays a random
+walk of price + forecast ticks. Each tick is timed through the engine and
+through a scan of every rule of that ticker (the baseline the index replaces).
+--tickers 1 puts every rule on a single ticker (worst case).
+
+    python benchmarks/bench_alerts.py [--rules 100000] [--tickers 500] [--ticks 20000] [--json out.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from alerts import AlertEngine, ALERT_KINDS
+
+
+def make_rules(count, tickers, rng):
+    kinds = list(ALERT_KINDS)
+    rules = []
+    for i in range(count):
+        kind = kinds[i % len(kinds)]
+        threshold = rng.uniform(80, 120) if kind.startswith("price") else rng.uniform(0.5, 5)
+        rules.append({"id": f"r{i}", "user_id": f"u{i % 1000}", "ticker": tickers[i % len(tickers)],
+                      "kind": kind, "threshold": threshold, "repeat": bool(i % 2)})
+    return rules
+
+
+def scan(rules, last, ticker, price, previous_close, predicted):
+    """Baseline: test every rule of the ticker against the previous and new values"""
+    values = {"price": price, "move": abs(price - previous_close) / previous_close * 100, "prediction": abs(predicted)}
+    fired = []
+    for rule in rules:
+        metric, direction = ALERT_KINDS[rule["kind"]]
+        previous = last.get((ticker, metric))
+        value, t = values[metric], rule["threshold"]
+        if previous is not None and (previous < t <= value if direction == "above" else value <= t < previous):
+            fired.append(rule)
+    for metric, value in values.items():
+        last[(ticker, metric)] = value
+    return fired
+
+
+def run(rules=100000, tickers=500, ticks=20000, seed=0):
+    rng = np.random.default_rng(seed)
+    names = [f"T{i:04d}" for i in range(tickers)]
+    rule_list = make_rules(rules, names, rng)
+    by_ticker = {}
+    for rule in rule_list:
+        by_ticker.setdefault(rule["ticker"], []).append(rule)
+
+    start = time.perf_counter()
+    engine = AlertEngine(rule_list)
+    build_s = time.perf_counter() - start
+
+    prices = {t: 100.0 for t in names}
+    stream = []
+    for _ in range(ticks):
+        ticker = names[rng.integers(tickers)]
+        previous_close = prices[ticker]
+        prices[ticker] = max(previous_close * (1 + rng.normal(0, 0.02)), 1.0)
+        stream.append((ticker, prices[ticker], previous_close, rng.normal(0, 2)))
+
+    indexed, scanned, fired = np.empty(ticks), np.empty(ticks), 0
+    last = {}
+    for i, (ticker, price, previous_close, predicted) in enumerate(stream):
+        start = time.perf_counter()
+        fired += len(engine.on_price(ticker, price, previous_close)) + len(engine.on_prediction(ticker, predicted))
+        indexed[i] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        scan(by_ticker[ticker], last, ticker, price, previous_close, predicted)
+        scanned[i] = time.perf_counter() - start
+
+    report = {"rules": rules, "tickers": tickers, "ticks": ticks, "build_ms": build_s * 1000, "fired": fired,
+              "rules_left": len(engine)}
+    for label, timings in (("indexed", indexed), ("scan", scanned)):
+        us = timings * 1e6
+        report[f"{label}_p50_us"] = float(np.percentile(us, 50))
+        report[f"{label}_p99_us"] = float(np.percentile(us, 99))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rules", type=int, default=100000)
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--ticks", type=int, default=20000)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    report = run(args.rules, args.tickers, args.ticks)
+    print(f"{report['rules']:,} rules over {report['tickers']} tickers, {report['ticks']:,} ticks "
+          f"(index built in {report['build_ms']:.0f} ms, {report['fired']:,} alerts fired)")
+    print(f"{'':<8} {'p50 us':>10} {'p99 us':>10}")
+    for label in ("indexed", "scan"):
+        print(f"{label:<8} {report[label + '_p50_us']:>10.1f} {report[label + '_p99_us']:>10.1f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark authenticated request throughput with and without the verified-token cache
+
+Measures get_current_user's token verification on its own (tokens/s) and
+full authenticated GET /api/auth/profile requests (req/s) through the
+backend app, once with the TokenCache and once with it disabled. A pool
+of --users tokens is cycled to mimic several dashboards polling at once.
+
+    python benchmarks/bench_auth.py [--requests 2000] [--users 50] [--json out.json]
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "benchmarks"))
+from token_cache import TokenCache
+from run_suite import load_module
+
+
+def rate(fn, items, repeats=3):
+    """Best-of-repeats items per second for fn over items"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - start)
+    return len(items) / best
+
+
+def run(requests=2000, users=50, repeats=3):
+    # The NumPy backend keeps the import free of TensorFlow; auth does not touch the models
+    os.environ.setdefault("VELORA_SERVING_BACKEND", "numpy")
+    os.environ.setdefault("VELORA_MARKET_DATA", "replay")
+    backend = load_module("velora_backend", os.path.join(ROOT, "backend", "app.py"))
+    from fastapi.testclient import TestClient
+
+    tokens = [backend.create_access_token({"sub": f"user-{i}", "email": f"user{i}@example.com"}) for i in range(users)]
+    stream = [tokens[i % users] for i in range(requests)]
+    headers = [{"Authorization": f"Bearer {token}"} for token in stream]
+    client = TestClient(backend.app)
+
+    report = {"requests": requests, "users": users}
+    for label, cache in (("uncached", TokenCache(0)), ("cached", TokenCache())):
+        backend.token_cache = cache
+        report[f"verify_{label}_per_s"] = rate(lambda t: cache.verify(t, backend.decode_access_token), stream, repeats)
+        report[f"requests_{label}_per_s"] = rate(lambda h: client.get("/api/auth/profile", headers=h).raise_for_status(), headers, repeats)
+    report["cache_hits"] = backend.token_cache.stats["hits"]
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    report = run(args.requests, args.users, args.repeats)
+
+    print(f"{'':<22} {'uncached':>12} {'cached':>12} {'speedup':>8}")
+    for name, unit in (("verify", "tokens/s"), ("requests", "req/s")):
+        uncached, cached = report[f"{name}_uncached_per_s"], report[f"{name}_cached_per_s"]
+        print(f"{name + ' (' + unit + ')':<22} {uncached:>12,.0f} {cached:>12,.0f} {cached / uncached:>7.1f}x")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark prediction attributions: one batched forward pass vs one pass per perturbation
+
+Scores the occlusion and permutation perturbations of a 60-day window
+through a NumPy LSTM model, first as a single batch (explainability.attribute),
+then one forward pass per perturbed window, then from the AttributionCache.
+
+    python benchmarks/bench_explain.py [--ticker AAPL] [--repeats 5] [--json out.json]
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from numpy_lstm import NumpyLSTMModel, weights_path
+from market_data import synthetic_history
+from window_store import FEATURES
+from forecasting import prepare_windows, scale_windows, run_model
+from explainability import AttributionCache, attribute, perturbations, EXPLAIN_PERMUTATIONS
+
+
+def best_time(fn, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(ticker="AAPL", repeats=5):
+    path = os.path.join(ROOT, weights_path(ticker))
+    if not os.path.exists(path):
+        raise SystemExit(f"{path} not found; export weights with python numpy_lstm.py")
+    model = NumpyLSTMModel.load(path)
+    window = synthetic_history(ticker, days=90).reindex(columns=FEATURES).to_numpy(dtype=np.float32)[-60:]
+
+    scaled = scale_windows(prepare_windows(model, window[None]))[0][0]
+    batch = perturbations(scaled, EXPLAIN_PERMUTATIONS, np.random.default_rng(0))
+
+    def one_by_one():
+        for row in batch:
+            run_model(model, row[None])
+
+    cache = AttributionCache()
+    cache.explain(model, window)
+    return {
+        "ticker": ticker,
+        "perturbations": len(batch),
+        "batched_ms": best_time(lambda: attribute(model, window), repeats) * 1000,
+        "per_perturbation_ms": best_time(one_by_one, repeats) * 1000,
+        "cached_ms": best_time(lambda: cache.explain(model, window), repeats) * 1000
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ticker", default="AAPL")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    report = run(args.ticker, args.repeats)
+
+    print(f"{report['perturbations']} perturbed windows for {report['ticker']}")
+    for name in ("batched", "per_perturbation", "cached"):
+        print(f"{name:<18} {report[name + '_ms']:>10.2f} ms")
+    print(f"batching speedup   {report['per_perturbation_ms'] / report['batched_ms']:>10.1f}x")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
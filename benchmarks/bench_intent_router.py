@@ -0,0 +1,130 @@
+"""
+Benchmark chat intent routing throughput in messages per second
+
+Routes a generated corpus of chat messages (intents x tickers x company
+names) through IntentRouter and, for reference, through the substring
+chain process_chat_message used before the router: one lowercase per
+branch test and no ticker extraction.
+
+    python benchmarks/bench_intent_router.py [--messages 20000] [--universe 5000] [--json out.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from intent_router import IntentRouter
+
+COMPANIES = [
+    ("AAPL", "Apple Inc."), ("MSFT", "Microsoft Corporation"), ("GOOGL", "Alphabet Inc."),
+    ("AMZN", "Amazon.com Inc."), ("TSLA", "Tesla, Inc."), ("META", "Meta Platforms Inc."),
+    ("NVDA", "NVIDIA Corporation"), ("JPM", "JPMorgan Chase & Co."), ("V", "Visa Inc."), ("WMT", "Walmart Inc.")
+]
+
+TEMPLATES = [
+    "What's your prediction for {ticker}?",
+    "Explain why {name} might go up",
+    "How confident are you about ${lower}'s forecast?",
+    "Should I consider buying {ticker}?",
+    "what about {ticker}",
+    "Is {name} a good investment right now, and what is the price target?",
+    "hello there",
+    "thanks, that was helpful",
+    "How do you make your predictions?",
+    "which stocks should I look at this week",
+    "help"
+]
+
+
+def legacy_intent(message):
+    """The pre-router branch chain, kept only as a reference point"""
+    if "explain" in message.lower().strip() or "why" in message.lower().strip() or "how" in message.lower().strip() or "analysis" in message.lower().strip():
+        return "explain"
+    if "price" in message.lower().strip() or "predict" in message.lower().strip() or "forecast" in message.lower().strip():
+        return "price"
+    if "confidence" in message.lower().strip() or "accuracy" in message.lower().strip() or "certain" in message.lower().strip():
+        return "confidence"
+    if "buy" in message.lower().strip() or "sell" in message.lower().strip() or "invest" in message.lower().strip() or "recommend" in message.lower().strip():
+        return "recommend"
+    return None
+
+
+def build_universe(size, seed=0):
+    """The real companies plus synthetic symbols up to `size` entries"""
+    rng = np.random.default_rng(seed)
+    letters = np.array(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+    universe = [{"ticker": t, "name": n} for t, n in COMPANIES]
+    seen = {t for t, _ in COMPANIES}
+    while len(universe) < size:
+        ticker = "".join(rng.choice(letters, rng.integers(2, 6)))
+        if ticker in seen:
+            continue
+        seen.add(ticker)
+        universe.append({"ticker": ticker, "name": f"{ticker.title()}tron Systems Inc."})
+    return universe
+
+
+def build_corpus(count, seed=0):
+    rng = np.random.default_rng(seed)
+    corpus = []
+    for i in range(count):
+        ticker, name = COMPANIES[rng.integers(len(COMPANIES))]
+        template = TEMPLATES[i % len(TEMPLATES)]
+        corpus.append(template.format(ticker=ticker, name=name.split()[0].rstrip(","), lower=ticker.lower()))
+    return corpus
+
+
+def messages_per_second(fn, corpus, repeats=3):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for message in corpus:
+            fn(message)
+        best = min(best, time.perf_counter() - start)
+    return len(corpus) / best
+
+
+def run(messages=20000, universe_size=5000, repeats=3):
+    universe = build_universe(universe_size)
+    start = time.perf_counter()
+    router = IntentRouter(universe)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    corpus = build_corpus(messages)
+    extracted = sum(1 for message in corpus if router.route(message).tickers)
+
+    return {
+        "messages": messages,
+        "universe": universe_size,
+        "build_ms": build_ms,
+        "router_msgs_per_s": messages_per_second(router.route, corpus, repeats),
+        "legacy_msgs_per_s": messages_per_second(legacy_intent, corpus, repeats),
+        "messages_with_ticker": extracted
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--universe", type=int, default=5000)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    report = run(args.messages, args.universe, args.repeats)
+
+    print(f"Router built over {report['universe']} symbols in {report['build_ms']:.1f} ms")
+    print(f"IntentRouter.route: {report['router_msgs_per_s']:>12,.0f} msgs/s (intents + tickers)")
+    print(f"Legacy substring chain: {report['legacy_msgs_per_s']:>8,.0f} msgs/s (intent only)")
+    print(f"Tickers extracted from {report['messages_with_ticker']}/{report['messages']} messages")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
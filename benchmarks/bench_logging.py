@@ -0,0 +1,112 @@
+"""
+Benchmark request latency with synchronous file logging vs the queued writer
+
+Each simulated request does a little work and logs --logs-per-request
+lines. The file handler stalls for --stall-ms on every --stall-every-th
+write to mimic disk flushes. With a plain FileHandler the stall lands on
+whichever request is logging; with async_logging's queue handler only the
+background writer waits. Reports p50/p99/max request latency per mode.
+
+    python benchmarks/bench_logging.py [--requests 5000] [--stall-ms 10] [--json out.json]
+"""
+import os
+import sys
+import json
+import time
+import queue
+import logging
+import argparse
+import tempfile
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from async_logging import DroppingQueueHandler, QueueWriter, JsonFormatter, LOG_QUEUE_SIZE
+
+
+class StallingFileHandler(logging.FileHandler):
+    """FileHandler that sleeps on every `every`-th write, like a disk flush"""
+
+    def __init__(self, path, every, stall_ms):
+        super().__init__(path)
+        self.every = every
+        self.stall = stall_ms / 1000
+        self.count = 0
+
+    def emit(self, record):
+        self.count += 1
+        if self.every and self.count % self.every == 0:
+            time.sleep(self.stall)
+        super().emit(record)
+
+
+def simulate(logger, requests, logs_per_request, interval_ms, work=200):
+    """Per-request latency in ms for requests arriving every interval_ms that compute a little and log"""
+    latencies = np.empty(requests)
+    values = np.random.default_rng(0).random(work)
+    for i in range(requests):
+        time.sleep(interval_ms / 1000)
+        start = time.perf_counter()
+        values.cumsum()
+        for j in range(logs_per_request):
+            logger.info(f"Request {i} step {j}", extra={"ticker": "AAPL"})
+        latencies[i] = (time.perf_counter() - start) * 1000
+    return latencies
+
+
+def run(requests=5000, logs_per_request=3, stall_every=100, stall_ms=10, interval_ms=0.5):
+    report = {"requests": requests, "logs_per_request": logs_per_request, "stall_every": stall_every, "stall_ms": stall_ms,
+              "interval_ms": interval_ms}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("sync", "queued"):
+            file_handler = StallingFileHandler(os.path.join(tmp, f"{mode}.log"), stall_every, stall_ms)
+            file_handler.setFormatter(JsonFormatter())
+
+            logger = logging.getLogger(f"bench.{mode}")
+            logger.propagate = False
+            logger.setLevel(logging.INFO)
+            listener = None
+            if mode == "sync":
+                logger.addHandler(file_handler)
+            else:
+                queue_handler = DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+                logger.addHandler(queue_handler)
+                listener = QueueWriter(queue_handler.queue, file_handler)
+                listener.start()
+
+            latencies = simulate(logger, requests, logs_per_request, interval_ms)
+            if listener is not None:
+                listener.stop()
+                report["queued_dropped"] = queue_handler.dropped
+            file_handler.close()
+
+            for p in (50, 99):
+                report[f"{mode}_p{p}_ms"] = float(np.percentile(latencies, p))
+            report[f"{mode}_max_ms"] = float(latencies.max())
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--logs-per-request", type=int, default=3)
+    parser.add_argument("--stall-every", type=int, default=100, help="Stall on every Nth file write (0 disables)")
+    parser.add_argument("--stall-ms", type=float, default=10)
+    parser.add_argument("--interval-ms", type=float, default=0.5, help="Pause between requests")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    report = run(args.requests, args.logs_per_request, args.stall_every, args.stall_ms, args.interval_ms)
+
+    print(f"{'':<8} {'p50 ms':>10} {'p99 ms':>10} {'max ms':>10}")
+    for mode in ("sync", "queued"):
+        print(f"{mode:<8} {report[mode + '_p50_ms']:>10.3f} {report[mode + '_p99_ms']:>10.3f} {report[mode + '_max_ms']:>10.3f}")
+    print(f"queued records dropped: {report['queued_dropped']}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
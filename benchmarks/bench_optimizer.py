@@ -0,0 +1,108 @@
+"""
+Benchmark the long-only mean-variance and risk-parity solvers over problem sizes
+
+Each size gets a synthetic factor-model covariance (market + sector factors
++ idiosyncratic noise, daily scale) and random expected daily returns. Times
+are the best of --repeats solves; the accuracy columns are the KKT gap of
+the mean-variance solution and the largest deviation of a risk contribution
+from 1/n. With SciPy installed, SLSQP solves the same mean-variance problems
+as a baseline for sizes up to --baseline-max.
+
+    python benchmarks/bench_optimizer.py [--sizes 10,50,200,500] [--repeats 5] [--json out.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from optimizer import mean_variance, risk_parity, risk_contributions, DEFAULT_RISK_AVERSION
+
+try:
+    from scipy.optimize import minimize
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+
+def synthetic_problem(n, rng, sectors=5):
+    market = rng.normal(1, 0.3, (n, 1)) * 0.01
+    sector = rng.normal(0, 1, (n, sectors)) * 0.005
+    cov = market @ market.T + sector @ sector.T + np.diag(rng.uniform(0.01, 0.03, n) ** 2)
+    return rng.normal(0.0005, 0.002, n), cov
+
+
+def best_time(fn, repeats):
+    best, result = float("inf"), None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def kkt_gap(mu, cov, weights, risk_aversion):
+    """Spread of the objective gradient over the support (0 at the optimum)"""
+    gradient = mu - risk_aversion * cov @ weights
+    support = weights > 1e-8
+    return float(gradient[support].max() - gradient[support].min())
+
+
+def slsqp(mu, cov, risk_aversion):
+    n = len(mu)
+    result = minimize(lambda w: 0.5 * risk_aversion * w @ cov @ w - mu @ w, np.full(n, 1 / n),
+                      jac=lambda w: risk_aversion * cov @ w - mu, method="SLSQP", bounds=[(0, 1)] * n,
+                      constraints=[{"type": "eq", "fun": lambda w: w.sum() - 1, "jac": lambda w: np.ones(n)}],
+                      options={"ftol": 1e-12, "maxiter": 1000})
+    return result.x
+
+
+def run(sizes, repeats=5, baseline_max=200, seed=0):
+    rng = np.random.default_rng(seed)
+    results = []
+    for n in sizes:
+        mu, cov = synthetic_problem(n, rng)
+        mv_s, (weights, mv_iterations) = best_time(lambda: mean_variance(mu, cov), repeats)
+        rp_s, (parity, rp_iterations) = best_time(lambda: risk_parity(cov), repeats)
+        row = {
+            "assets": n,
+            "mean_variance_ms": mv_s * 1000,
+            "mean_variance_iterations": mv_iterations,
+            "kkt_gap": kkt_gap(mu, cov, weights, DEFAULT_RISK_AVERSION),
+            "risk_parity_ms": rp_s * 1000,
+            "risk_parity_iterations": rp_iterations,
+            "risk_budget_error": float(np.abs(risk_contributions(parity, cov) - 1 / n).max())
+        }
+        if SCIPY_AVAILABLE and n <= baseline_max:
+            slsqp_s, reference = best_time(lambda: slsqp(mu, cov, DEFAULT_RISK_AVERSION), 1)
+            row["slsqp_ms"] = slsqp_s * 1000
+            row["max_weight_difference"] = float(np.abs(reference - weights).max())
+        results.append(row)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="10,50,200,500")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--baseline-max", type=int, default=200)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = run([int(s) for s in args.sizes.split(",")], args.repeats, args.baseline_max)
+    print(f"{'assets':>7} {'mv ms':>8} {'iters':>6} {'kkt gap':>9} {'rp ms':>8} {'iters':>6} {'rc error':>9} {'slsqp ms':>9} {'|dw|':>8}")
+    for row in results:
+        baseline = f"{row['slsqp_ms']:>9.1f} {row['max_weight_difference']:>8.1e}" if "slsqp_ms" in row else f"{'-':>9} {'-':>8}"
+        print(f"{row['assets']:>7} {row['mean_variance_ms']:>8.2f} {row['mean_variance_iterations']:>6} {row['kkt_gap']:>9.1e} "
+              f"{row['risk_parity_ms']:>8.2f} {row['risk_parity_iterations']:>6} {row['risk_budget_error']:>9.1e} {baseline}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark the vectorized screener on a synthetic universe
+
+Builds a --tickers x 60-day random-walk universe with random sentiment and
+forecasts, then times the indicator columns, and a filter + sort + limit
+query as NumPy masks vs a per-ticker Python loop over the same values.
+
+    python benchmarks/bench_screener.py [--tickers 5000] [--repeats 20] [--json out.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from screener import ScreenerSnapshot, FIELDS, OPERATORS, SCREENER_LOOK_BACK, indicator_columns, parse_filter
+
+QUERY = "predicted_change > 2 and rsi < 30"
+SORT = "-predicted_change"
+LIMIT = 25
+
+
+def best_time(fn, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def synthetic_universe(tickers, seed=0):
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (tickers, SCREENER_LOOK_BACK)), axis=1))
+    volumes = rng.integers(1e5, 1e8, (tickers, SCREENER_LOOK_BACK)).astype(np.float64)
+    extra = {"sentiment": rng.random(tickers), "predicted_change": rng.normal(0, 2, tickers)}
+    extra["predicted_price"] = closes[:, -1] * (1 + extra["predicted_change"] / 100)
+    return [f"T{i:05d}" for i in range(tickers)], closes, volumes, extra
+
+
+def loop_screen(rows, clauses, field, limit):
+    """Baseline: test each ticker's dict of values in Python, then sort the matches"""
+    matches = [row for row in rows if all(
+        row[f] == row[f] and OPERATORS[op](row[f], value) for f, op, value in clauses
+    )]
+    matches.sort(key=lambda row: -row[field])
+    return len(matches), matches[:limit]
+
+
+def run(tickers=5000, repeats=20):
+    names, closes, volumes, extra = synthetic_universe(tickers)
+    build_s = best_time(lambda: indicator_columns(closes, volumes), repeats)
+    snapshot = ScreenerSnapshot(names, {**indicator_columns(closes, volumes), **extra})
+    clauses = parse_filter(QUERY)
+
+    rows = [{"ticker": t, **{f: float(snapshot.columns[f][i]) for f in FIELDS}} for i, t in enumerate(names)]
+    count, _ = snapshot.screen(clauses, SORT, LIMIT)
+    assert count == loop_screen(rows, clauses, "predicted_change", LIMIT)[0]
+
+    return {
+        "tickers": tickers,
+        "query": QUERY,
+        "matches": count,
+        "indicators_ms": build_s * 1000,
+        "vectorized_ms": best_time(lambda: snapshot.screen(clauses, SORT, LIMIT), repeats) * 1000,
+        "loop_ms": best_time(lambda: loop_screen(rows, clauses, "predicted_change", LIMIT), repeats) * 1000
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tickers", type=int, default=5000)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    report = run(args.tickers, args.repeats)
+    print(f"{report['tickers']:,} tickers, '{report['query']}' -> {report['matches']} matches")
+    print(f"indicator columns  {report['indicators_ms']:>8.2f} ms")
+    print(f"screen (masks)     {report['vectorized_ms']:>8.3f} ms")
+    print(f"screen (loop)      {report['loop_ms']:>8.3f} ms  ({report['loop_ms'] / report['vectorized_ms']:.0f}x)")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark symbol search lookups over a synthetic symbol master
+
+Generates a master of --symbols tickers with multi-word company names and
+Zipf-like popularity, then reports index build time, prebuilt load time and
+lookup latency for ticker prefixes, name-token prefixes and typo'd names.
+
+    python benchmarks/bench_symbol_search.py [--symbols 10000] [--queries 5000] [--json out.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from symbol_search import SymbolIndex
+
+WORDS = ["american", "global", "first", "united", "pacific", "north", "capital", "energy", "health", "digital",
+         "systems", "micro", "bio", "therapeutics", "financial", "semiconductor", "realty", "brands", "motors",
+         "networks", "pharma", "resources", "industries", "software", "foods", "airlines", "mining", "media",
+         "insurance", "logistics", "solar", "quantum", "medical", "national", "western", "atlantic", "green",
+         "silver", "golden", "summit", "river", "apex", "vertex", "nova", "orbit", "harbor", "pioneer", "liberty"]
+SUFFIXES = ["Inc.", "Corporation", "Holdings, Inc.", "Group", "Co.", "plc", "Ltd."]
+LETTERS = np.array(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+
+
+def build_master(size, seed=0):
+    rng = np.random.default_rng(seed)
+    records, seen = [], set()
+    while len(records) < size:
+        ticker = "".join(rng.choice(LETTERS, rng.integers(1, 6)))
+        if ticker in seen:
+            continue
+        seen.add(ticker)
+        words = [w.title() for w in rng.choice(WORDS, rng.integers(1, 4), replace=False)]
+        # Give most companies one distinctive word so names are not all shared vocabulary
+        words.insert(0, "".join(rng.choice(LETTERS, rng.integers(4, 9))).title())
+        records.append({
+            "ticker": ticker,
+            "name": f"{' '.join(words)} {rng.choice(SUFFIXES)}",
+            "exchange": rng.choice(["NASDAQ", "NYSE"]),
+            "popularity": float(1000 / (len(records) + 1))
+        })
+    return records
+
+
+def typo(word, rng):
+    i = rng.integers(1, len(word) - 1)
+    return word[:i] + word[i + 1:]
+
+
+def build_queries(records, count, seed=0):
+    """Equal mix of ticker prefixes, name-token prefixes, two-word prefixes and one-deletion typos"""
+    rng = np.random.default_rng(seed)
+    queries = {"ticker_prefix": [], "name_prefix": [], "multi_word": [], "typo": []}
+    while min(len(q) for q in queries.values()) < count // 4:
+        record = records[rng.integers(len(records))]
+        words = record["name"].lower().split()
+        queries["ticker_prefix"].append(record["ticker"][:max(2, len(record["ticker"]) - 1)].lower())
+        queries["name_prefix"].append(words[0][:rng.integers(3, len(words[0]) + 1)])
+        queries["multi_word"].append(f"{words[0]} {words[1][:3]}")
+        queries["typo"].append(typo(words[0], rng))
+    return queries
+
+
+def lookup_stats(index, queries, limit):
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query, limit)
+        timings.append(time.perf_counter() - start)
+    us = np.asarray(timings) * 1e6
+    return {"p50_us": float(np.percentile(us, 50)), "p99_us": float(np.percentile(us, 99)), "mean_us": float(us.mean())}
+
+
+def run(symbols=10000, queries=5000, limit=5):
+    records = build_master(symbols)
+
+    start = time.perf_counter()
+    index = SymbolIndex(records)
+    build_s = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "symbols.index.pkl")
+        index.save(path)
+        size_mb = os.path.getsize(path) / 1e6
+        start = time.perf_counter()
+        SymbolIndex.load(path)
+        load_s = time.perf_counter() - start
+
+    report = {"symbols": symbols, "build_s": build_s, "prebuilt_load_s": load_s, "prebuilt_mb": size_mb, "lookups": {}}
+    for kind, batch in build_queries(records, queries).items():
+        report["lookups"][kind] = lookup_stats(index, batch, limit)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    report = run(args.symbols, args.queries, args.limit)
+
+    print(f"Index over {report['symbols']} symbols: built in {report['build_s']:.2f}s, "
+          f"prebuilt file {report['prebuilt_mb']:.1f} MB loads in {report['prebuilt_load_s'] * 1000:.0f} ms")
+    print(f"{'query type':<16} {'p50 us':>10} {'p99 us':>10} {'mean us':>10}")
+    for kind, stats in report["lookups"].items():
+        print(f"{kind:<16} {stats['p50_us']:>10.1f} {stats['p99_us']:>10.1f} {stats['mean_us']:>10.1f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
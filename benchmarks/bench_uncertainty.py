@@ -0,0 +1,91 @@
+"""
+Benchmark MC dropout uncertainty cost as a function of the sample count K
+
+Compares one batched (K, look_back, features) stochastic pass against K
+separate forward passes and reports the log-log slope of time vs K; a slope
+below 1 means the batched cost grows sublinearly in K.
+
+    python benchmarks/bench_uncertainty.py [--model models/AAPL_best_model.keras] [--json out.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import tensorflow as tf
+from forecasting import prepare_windows, scale_windows, run_model
+from uncertainty import mc_samples
+
+SAMPLE_COUNTS = [1, 2, 4, 8, 16, 32, 64, 128]
+
+
+def load_benchmark_model(path):
+    if path and os.path.exists(path):
+        return tf.keras.models.load_model(path)
+
+    # Same shape as app.create_dummy_models, with dropout to sample from
+    return tf.keras.Sequential([
+        tf.keras.Input((60, 1)),
+        tf.keras.layers.LSTM(50, return_sequences=True),
+        tf.keras.layers.Dropout(0.2),
+        tf.keras.layers.LSTM(50),
+        tf.keras.layers.Dropout(0.2),
+        tf.keras.layers.Dense(25),
+        tf.keras.layers.Dense(1)
+    ])
+
+
+def best_of(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(model, repeats=3, sample_counts=SAMPLE_COUNTS):
+    rng = np.random.default_rng(0)
+    window = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (1, 60, 5)), axis=1))
+    scaled, _, _ = scale_windows(prepare_windows(model, window))
+
+    # Warm up graph tracing for every batch size before timing
+    for k in sample_counts:
+        mc_samples(model, scaled, 1, k)
+    run_model(model, scaled, training=True)
+
+    results = []
+    for k in sample_counts:
+        batched = best_of(lambda: mc_samples(model, scaled, 1, k), repeats)
+        looped = best_of(lambda: [run_model(model, scaled, training=True) for _ in range(k)], repeats)
+        results.append({"samples": k, "batched_ms": batched * 1000, "looped_ms": looped * 1000})
+
+    ks = np.log([r["samples"] for r in results])
+    slope = float(np.polyfit(ks, np.log([r["batched_ms"] for r in results]), 1)[0])
+    return {"results": results, "batched_loglog_slope": slope}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default="models/AAPL_best_model.keras")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    report = run(load_benchmark_model(args.model), args.repeats)
+
+    print(f"{'K':>5} {'batched ms':>12} {'looped ms':>12} {'speedup':>9}")
+    for r in report["results"]:
+        print(f"{r['samples']:>5} {r['batched_ms']:>12.2f} {r['looped_ms']:>12.2f} {r['looped_ms'] / r['batched_ms']:>8.1f}x")
+    print(f"Batched time vs K log-log slope: {report['batched_loglog_slope']:.2f} (< 1 is sublinear)")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
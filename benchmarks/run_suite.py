@@ -0,0 +1,297 @@
+"""
+Benchmark suite for the prediction service hot path
+
+Runs offline against the replay market data provider (synthetic OHLCV,
+optional injected latency) and measures:
+  predict  single-ticker /api/predict latency (app.py)
+  batch    /api/predict throughput across tickers and batched forecast throughput
+  chat     first streamed frame and full round-trip over /ws/chat/{client_id} (backend/app.py)
+  train    StockPredictor.train_model time per ticker (train_set.py)
+  merge    merge_datasets throughput (merge.py)
+
+Results are written as JSON. With --baseline the run is compared against a
+stored result file and any metric that moved the wrong way by more than
+--threshold is flagged (exit status 1).
+
+    python benchmarks/run_suite.py [--only predict chat] [--output results.json]
+    python benchmarks/run_suite.py --save-baseline benchmarks/baseline.json
+    python benchmarks/run_suite.py --baseline benchmarks/baseline.json --threshold 0.2
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import tempfile
+import contextlib
+import importlib.util
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+# Point the window store at an empty path so every request goes through the
+# replay stand-in; window_store binds DEFAULT_STORE_PATH at import, so this
+# has to happen before anything below imports it
+os.environ["VELORA_WINDOW_STORE"] = os.path.join(tempfile.gettempdir(), "velora_bench_no_store")
+from market_data import ReplayProvider, set_provider, synthetic_history
+
+BENCHMARKS = ["predict", "batch", "chat", "train", "merge"]
+DEFAULT_THRESHOLD = 0.15
+
+
+def metric(value, unit, better="lower"):
+    return {"value": float(value), "unit": unit, "better": better}
+
+
+def latency_metrics(prefix, timings):
+    ms = np.asarray(timings) * 1000
+    return {
+        f"{prefix}_p50_ms": metric(np.percentile(ms, 50), "ms"),
+        f"{prefix}_p95_ms": metric(np.percentile(ms, 95), "ms"),
+        f"{prefix}_mean_ms": metric(ms.mean(), "ms")
+    }
+
+
+@contextlib.contextmanager
+def working_directory(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def load_module(name, path):
+    """Import a service module from the repository root, where it resolves models/ and data/"""
+    with working_directory(ROOT):
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return module
+
+
+# ================== Benchmarks ==================
+def bench_predict(service, args):
+    from fastapi.testclient import TestClient
+
+    client = TestClient(service.app)
+    body = {"ticker": args.ticker}
+    client.post("/api/predict", json=body)
+
+    timings = []
+    for _ in range(args.requests):
+        start = time.perf_counter()
+        response = client.post("/api/predict", json=body)
+        timings.append(time.perf_counter() - start)
+        response.raise_for_status()
+    return latency_metrics("predict", timings)
+
+
+def bench_batch(service, args):
+    from fastapi.testclient import TestClient
+    from forecasting import forecast_batch
+
+    client = TestClient(service.app)
+    tickers = sorted(service.models)[:args.tickers] or [args.ticker]
+    for ticker in tickers:
+        client.post("/api/predict", json={"ticker": ticker})
+
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        for ticker in tickers:
+            client.post("/api/predict", json={"ticker": ticker}).raise_for_status()
+    elapsed = time.perf_counter() - start
+    results = {"predict_throughput_rps": metric(args.rounds * len(tickers) / elapsed, "req/s", "higher")}
+
+    # Model-only throughput: one vectorized rollout over many windows
+    model = service.models.get(args.ticker) or service.models[tickers[0]]
+    windows = np.stack([
+        synthetic_history(f"W{i}", 120)[["Close", "High", "Low", "Open", "Volume"]].values[-60:]
+        for i in range(args.batch_size)
+    ])
+    forecast_batch(model, windows)
+    start = time.perf_counter()
+    forecast_batch(model, windows)
+    elapsed = time.perf_counter() - start
+    results["forecast_batch_windows_per_s"] = metric(args.batch_size / elapsed, "windows/s", "higher")
+    return results
+
+
+def bench_chat(args):
+    from fastapi.testclient import TestClient
+
+    backend = load_module("velora_backend", os.path.join(ROOT, "backend", "app.py"))
+    client = TestClient(backend.app)
+    # A ticker context routes the message through predict_stock_price
+    message = json.dumps({"message": "What's your price forecast?", "ticker": args.ticker})
+
+    def exchange(websocket):
+        """Send one message; return seconds to the first partial frame and to the final response"""
+        start = time.perf_counter()
+        websocket.send_text(message)
+        first = None
+        while True:
+            frame = json.loads(websocket.receive_text())
+            if frame["type"] != "ack" and first is None:
+                first = time.perf_counter() - start
+            if frame["type"] in ("bot_response", "error"):
+                return first, time.perf_counter() - start
+
+    first_frames, roundtrips = [], []
+    with client.websocket_connect("/ws/chat/benchmark") as websocket:
+        exchange(websocket)
+        for _ in range(args.messages):
+            first, total = exchange(websocket)
+            first_frames.append(first)
+            roundtrips.append(total)
+    return {**latency_metrics("chat_first_frame", first_frames), **latency_metrics("chat_roundtrip", roundtrips)}
+
+
+def bench_train(args):
+    from train_set import StockPredictor
+    from window_store import build_window_store, open_window_store
+    from forecasting import DEFAULT_FORECAST_DAYS
+
+    tickers = [f"TRN{i}" for i in range(args.train_tickers)]
+    frames = []
+    for ticker in tickers:
+        history = synthetic_history(ticker, args.train_days)
+        frames.append(history.reset_index().assign(Ticker=ticker))
+    data = pd.concat(frames, ignore_index=True)
+
+    with tempfile.TemporaryDirectory() as workdir, working_directory(workdir):
+        build_window_store(data, "window_store")
+        store = open_window_store("window_store")
+        timings = []
+        for ticker in tickers:
+            start = time.perf_counter()
+            StockPredictor(ticker, prediction_days=DEFAULT_FORECAST_DAYS).train_model(store)
+            timings.append(time.perf_counter() - start)
+    return {"train_seconds_per_ticker": metric(np.mean(timings), "s")}
+
+
+def bench_merge(args):
+    import merge
+
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range(end="2024-12-31", periods=args.merge_days)
+    n_tickers = max(args.merge_rows // len(dates), 1)
+
+    with tempfile.TemporaryDirectory() as workdir, working_directory(workdir):
+        os.makedirs("data")
+        pd.DataFrame({
+            "Date": np.tile(dates, n_tickers),
+            "Ticker": np.repeat([f"T{i}" for i in range(n_tickers)], len(dates)),
+            "Close": rng.random(n_tickers * len(dates)) * 100,
+            "Volume": rng.integers(1, 10**7, n_tickers * len(dates))
+        }).to_csv("data/stock_data.csv", index=False)
+        pd.DataFrame({"timestamp": dates, "rate": rng.random(len(dates))}).to_csv("data/economic_data.csv", index=False)
+        pd.DataFrame({"date": dates, "sentiment": rng.random(len(dates))}).to_csv("data/social_sentiment_data.csv", index=False)
+
+        start = time.perf_counter()
+        if not merge.merge_datasets():
+            raise RuntimeError("merge_datasets failed")
+        elapsed = time.perf_counter() - start
+    return {"merge_rows_per_s": metric(n_tickers * len(dates) / elapsed, "rows/s", "higher")}
+
+
+# ================== Baseline Comparison ==================
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Metrics that got worse than the baseline by more than threshold (a fraction)"""
+    regressions = []
+    for name, current in results["metrics"].items():
+        reference = baseline.get("metrics", {}).get(name)
+        if not reference or reference["value"] == 0:
+            continue
+        change = (current["value"] - reference["value"]) / reference["value"]
+        worse = change > threshold if current["better"] == "lower" else change < -threshold
+        if worse:
+            regressions.append({"metric": name, "baseline": reference["value"], "current": current["value"], "change": change})
+    return regressions
+
+
+def run(args):
+    selected = args.only or BENCHMARKS
+    # No store or recordings: every fetch is served from the seeded synthetic series
+    set_provider(ReplayProvider(recordings_dir=os.devnull, latency_ms=args.replay_latency_ms))
+
+    service = None
+    if {"predict", "batch"} & set(selected):
+        service = load_module("velora_app", os.path.join(ROOT, "app.py"))
+
+    runners = {
+        "predict": lambda: bench_predict(service, args),
+        "batch": lambda: bench_batch(service, args),
+        "chat": lambda: bench_chat(args),
+        "train": lambda: bench_train(args),
+        "merge": lambda: bench_merge(args)
+    }
+
+    metrics = {}
+    for name in selected:
+        start = time.perf_counter()
+        with working_directory(ROOT):
+            metrics.update(runners[name]())
+        print(f"{name:<8} done in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "benchmarks": selected,
+        "metrics": metrics
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, help="Benchmarks to run (default: all)")
+    parser.add_argument("--output", default="benchmark_results.json", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against this results file and flag regressions")
+    parser.add_argument("--save-baseline", help="Also write the results to this baseline file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed relative slowdown")
+    parser.add_argument("--ticker", default="AAPL")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--tickers", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--messages", type=int, default=50)
+    parser.add_argument("--train-tickers", type=int, default=1)
+    parser.add_argument("--train-days", type=int, default=730)
+    parser.add_argument("--merge-rows", type=int, default=200_000)
+    parser.add_argument("--merge-days", type=int, default=1000)
+    parser.add_argument("--replay-latency-ms", type=float, default=0.0, help="Simulated market data latency")
+    parser.add_argument("--verbose", action="store_true", help="Keep the services' INFO logging")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.disable(logging.INFO)
+
+    results = run(args)
+
+    print(f"{'metric':<32} {'value':>14} {'unit':<10}")
+    for name, m in results["metrics"].items():
+        print(f"{name:<32} {m['value']:>14.3f} {m['unit']:<10}")
+
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for r in regressions:
+            print(f"REGRESSION {r['metric']}: {r['baseline']:.3f} -> {r['current']:.3f} ({r['change']:+.1%})")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+import os
+import time
+import logging
+import threading
+import numpy as np
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# ================== OHLC Candle Pyramids ==================
+# Each ticker's daily bars are resampled once into weekly and monthly levels
+# (open = first, high = max, low = min, close = last, volume = sum). A request
+# takes the finest level with at most OVERSAMPLE x `points` bars in range,
+# located by binary search, then merges neighbouring bars down to the point
+# budget: OHLC min/max bucketing for candles, LTTB over closes for lines.
+# Work is proportional to the points returned, not to the years requested.
+# Window-store pyramids are pinned outside the LRU bound and kept current by
+# merging in the market summary's daily bars (today's bar is re-priced on
+# every refresh); provider pyramids are rebuilt after CANDLE_TTL.
+LEVELS = ["daily", "weekly", "monthly"]
+RANGE_DAYS = {"1D": 1, "1W": 7, "1M": 31, "3M": 92, "6M": 183, "1Y": 366, "5Y": 1827, "All": None}
+DEFAULT_CANDLE_POINTS = 300
+MAX_CANDLE_POINTS = 2000
+OVERSAMPLE = 4
+CANDLE_CACHE_SIZE = int(os.getenv("VELORA_CANDLE_CACHE_SIZE", "256"))
+CANDLE_TTL = float(os.getenv("VELORA_CANDLE_TTL", "300"))
+FIELDS = ["open", "high", "low", "close", "volume"]
+
+
+def resample(bars, keys):
+    """Merge consecutive bars sharing a key; bars is a dict of equal-length arrays including "time" """
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(keys)] - 1
+    return {
+        "time": bars["time"][starts],
+        "open": bars["open"][starts],
+        "high": np.maximum.reduceat(bars["high"], starts),
+        "low": np.minimum.reduceat(bars["low"], starts),
+        "close": bars["close"][ends],
+        "volume": np.add.reduceat(bars["volume"], starts)
+    }
+
+
+def bucket(bars, points):
+    """Min/max bucketing: merge runs of bars into at most `points` OHLC candles"""
+    n = len(bars["time"])
+    if n <= points:
+        return bars, 1
+    size = -(-n // points)
+    # Align buckets to the end so the latest candle is always complete
+    keys = (np.arange(n) + (-n) % size) // size
+    return resample(bars, keys), size
+
+
+def lttb(x, y, points):
+    """Largest-Triangle-Three-Buckets: indices of `points` samples that keep the line's shape"""
+    n = len(x)
+    if points >= n or points < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, points - 1).astype(int)
+    selected = [0]
+    for b in range(points - 2):
+        lo, hi = edges[b], edges[b + 1]
+        next_hi = edges[b + 2] if b + 2 < len(edges) else n
+        avg_x = x[hi:next_hi].mean() if next_hi > hi else x[-1]
+        avg_y = y[hi:next_hi].mean() if next_hi > hi else y[-1]
+        ax, ay = x[selected[-1]], y[selected[-1]]
+        area = np.abs((ax - avg_x) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (avg_y - ay))
+        selected.append(lo + int(area.argmax()))
+    selected.append(n - 1)
+    return np.asarray(selected)
+
+
+class CandlePyramid:
+    def __init__(self, days, ohlcv):
+        """
+        days: (n,) int day offsets since 1970-01-01, ascending; ohlcv: (n, 5)
+        Open/High/Low/Close/Volume. Builds the weekly and monthly levels.
+        """
+        days = np.asarray(days, dtype=np.int64)
+        ohlcv = np.asarray(ohlcv, dtype=np.float64)
+        daily = {"time": days, **{f: ohlcv[:, i] for i, f in enumerate(FIELDS)}}
+
+        # Weeks start on Monday (1970-01-01 was a Thursday)
+        weekly = resample(daily, (days + 3) // 7)
+        monthly = resample(daily, days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64))
+        self.levels = {"daily": daily, "weekly": weekly, "monthly": monthly}
+
+    def __len__(self):
+        return len(self.levels["daily"]["time"])
+
+    @property
+    def last_day(self):
+        return int(self.levels["daily"]["time"][-1]) if len(self) else None
+
+    def merged(self, days, ohlcv):
+        """New pyramid with these daily bars replacing any from their first day on"""
+        days = np.asarray(days, dtype=np.int64)
+        if not len(days):
+            return self
+        daily = self.levels["daily"]
+        keep = int(np.searchsorted(daily["time"], days[0]))
+        old = np.stack([daily[f][:keep] for f in FIELDS], axis=1)
+        return CandlePyramid(np.concatenate([daily["time"][:keep], days]),
+                             np.concatenate([old, np.asarray(ohlcv, dtype=np.float64)]))
+
+    def query(self, days=None, points=DEFAULT_CANDLE_POINTS, line=False):
+        """
+        Candles covering the last `days` calendar days (all history when None)
+
+        Returns (resolution, bars per point, {"time", "open", ...} arrays).
+        With line=True the closes are LTTB-sampled instead of bucketed.
+        """
+        if not len(self):
+            return "daily", 1, {key: value[:0] for key, value in self.levels["daily"].items()}
+        start_day = self.last_day - days + 1 if days else None
+
+        for level in LEVELS:
+            bars = self.levels[level]
+            lo = int(np.searchsorted(bars["time"], start_day)) if start_day is not None else 0
+            # A coarse bar that began before the range still covers its first days
+            if lo and level != "daily" and bars["time"][lo] > start_day:
+                lo -= 1
+            if len(bars["time"]) - lo <= OVERSAMPLE * points or level == LEVELS[-1]:
+                break
+        window = {key: value[lo:] for key, value in bars.items()}
+
+        if line:
+            keep = lttb(window["time"].astype(np.float64), window["close"], points)
+            return level, 1, {key: value[keep] for key, value in window.items()}
+        merged, size = bucket(window, points)
+        return level, size, merged
+
+
+def frame_bars(data):
+    """(days, ohlcv) arrays from a date-indexed Open/High/Low/Close/Volume frame"""
+    data = data.sort_index()
+    data = data[~data.index.duplicated(keep='last')]
+    days = data.index.values.astype('datetime64[D]').astype(np.int64)
+    columns = ["Open", "High", "Low", "Close", "Volume"]
+    return days, data.reindex(columns=columns).astype(float).ffill().fillna(0.0).to_numpy()
+
+
+def pyramid_from_frame(data):
+    """CandlePyramid from a date-indexed Open/High/Low/Close/Volume frame"""
+    return CandlePyramid(*frame_bars(data))
+
+
+def pyramid_from_store(store, ticker):
+    series = np.asarray(store.series(ticker), dtype=np.float64)
+    columns = [store.column(name) for name in ("Open", "High", "Low", "Close", "Volume")]
+    return CandlePyramid(np.asarray(store.dates(ticker)), series[:, columns])
+
+
+class PyramidCache:
+    def __init__(self, max_entries=CANDLE_CACHE_SIZE, ttl=CANDLE_TTL):
+        """
+        Pyramids by ticker. Pinned pyramids (the window store's) never expire
+        and do not count toward max_entries; the rest, built from the market
+        data provider, form a bounded LRU and are rebuilt after ttl.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.pinned = {}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def pin(self, ticker, pyramid):
+        with self._lock:
+            self.pinned[ticker] = pyramid
+            self._entries.pop(ticker, None)
+
+    def append_histories(self, histories):
+        """Merge recent daily bars from {ticker: date-indexed history} into the pinned pyramids"""
+        updated = 0
+        for ticker, data in histories.items():
+            pyramid = self.pinned.get(ticker)
+            if pyramid is None or data is None or data.empty:
+                continue
+            days, ohlcv = frame_bars(data)
+            # Bars from the last known day on: today's is re-priced, newer ones appended
+            new = days >= (pyramid.last_day if pyramid.last_day is not None else days[0])
+            if new.any():
+                with self._lock:
+                    self.pinned[ticker] = pyramid.merged(days[new], ohlcv[new])
+                updated += 1
+        return updated
+
+    def get(self, ticker, build):
+        """Cached pyramid for ticker, calling build() on a miss or after expiry"""
+        pinned = self.pinned.get(ticker)
+        if pinned is not None:
+            return pinned
+        with self._lock:
+            entry = self._entries.get(ticker)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(ticker)
+                return entry[1]
+
+        pyramid = build()
+        with self._lock:
+            self._entries[ticker] = (time.monotonic() + self.ttl, pyramid)
+            self._entries.move_to_end(ticker)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return pyramid
+
+    def __len__(self):
+        return len(self.pinned) + len(self._entries)
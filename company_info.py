@@ -0,0 +1,163 @@
+import os
+import json
+import time
+import logging
+import threading
+from market_data import get_provider
+
+logger = logging.getLogger(__name__)
+
+# ================== Company Metadata Store ==================
+# Ticker.info is one of the slowest Yahoo calls and company metadata changes
+# rarely. Records live in a JSON file loaded into a dict at startup, so
+# reads are a dict lookup. A background thread fetches the whole universe in
+# one provider.infos() batch on start, then every COMPANY_INFO_REFRESH_SECONDS
+# refreshes records older than COMPANY_INFO_TTL, and writes the file back
+# atomically. A ticker missing from the store is fetched once on first read
+# (persisted by the next refresh, not on the request path); a failed fetch is
+# not retried for COMPANY_INFO_RETRY_SECONDS.
+DEFAULT_COMPANY_INFO_PATH = os.getenv("VELORA_COMPANY_INFO", "data/company_info.json")
+COMPANY_INFO_TTL = float(os.getenv("VELORA_COMPANY_INFO_TTL", str(7 * 24 * 3600)))
+COMPANY_INFO_REFRESH_SECONDS = float(os.getenv("VELORA_COMPANY_INFO_REFRESH_SECONDS", "3600"))
+COMPANY_INFO_RETRY_SECONDS = 300
+COMPANY_INFO_BATCH = 50
+
+
+def company_record(info):
+    """The fields get_stock_info serves, from a Ticker.info dict"""
+    return {
+        "name": info.get("longName") or info.get("shortName") or "Unknown",
+        "sector": info.get("sector", "Unknown"),
+        "industry": info.get("industry", "Unknown"),
+        "country": info.get("country", "Unknown"),
+        "website": info.get("website", ""),
+        "market_cap": info.get("marketCap", 0),
+        "pe_ratio": info.get("trailingPE", 0),
+        "description": info.get("longBusinessSummary", "No description available.")
+    }
+
+
+class CompanyInfoStore:
+    def __init__(self, path=DEFAULT_COMPANY_INFO_PATH, universe=(), ttl=COMPANY_INFO_TTL,
+                 interval=COMPANY_INFO_REFRESH_SECONDS):
+        """
+        universe: tickers to keep warm. Records are {ticker: {"fetched_at",
+        "info"}}; path=None keeps them in memory only.
+        """
+        self.path = path
+        self.universe = list(universe)
+        self.ttl = ttl
+        self.interval = interval
+        self.records = self._load()
+        self._failed = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path) as f:
+                records = json.load(f)
+            logger.info(f"Loaded company info for {len(records)} tickers from {self.path}")
+            return records
+        except (OSError, ValueError) as e:
+            logger.error(f"Error reading company info from {self.path}: {e}")
+            return {}
+
+    def save(self):
+        if not self.path:
+            return
+        # One writer at a time: concurrent saves would share the temp file
+        with self._save_lock:
+            with self._lock:
+                payload = json.dumps(self.records, separators=(",", ":"))
+                self._dirty = False
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w") as f:
+                f.write(payload)
+            os.replace(tmp, self.path)
+
+    def __contains__(self, ticker):
+        return ticker in self.records
+
+    def __len__(self):
+        return len(self.records)
+
+    def stale(self, tickers, now=None):
+        """Tickers without a record younger than ttl"""
+        now = time.time() if now is None else now
+        return [t for t in tickers if t not in self.records or now - self.records[t]["fetched_at"] > self.ttl]
+
+    def fetch(self, tickers):
+        """Fetch and store records in batches of COMPANY_INFO_BATCH; returns how many were stored"""
+        stored = 0
+        for i in range(0, len(tickers), COMPANY_INFO_BATCH):
+            batch = tickers[i:i + COMPANY_INFO_BATCH]
+            try:
+                infos = get_provider().infos(batch)
+            except Exception as e:
+                logger.error(f"Error fetching company info for {len(batch)} tickers: {e}")
+                infos = {}
+            now = time.time()
+            with self._lock:
+                for ticker in batch:
+                    if infos.get(ticker):
+                        self.records[ticker] = {"fetched_at": now, "info": company_record(infos[ticker])}
+                        self._failed.pop(ticker, None)
+                        self._dirty = True
+                        stored += 1
+                    else:
+                        self._failed[ticker] = now
+        return stored
+
+    def get(self, ticker):
+        """Company record for ticker, or None if it has never been fetched successfully"""
+        record = self.records.get(ticker)
+        if record is not None:
+            return record["info"]
+
+        failed_at = self._failed.get(ticker)
+        if failed_at is not None and time.time() - failed_at < COMPANY_INFO_RETRY_SECONDS:
+            return None
+        self.fetch([ticker])
+        record = self.records.get(ticker)
+        return record["info"] if record is not None else None
+
+    def refresh(self):
+        """Fetch every stale universe ticker and persist the store (including records fetched on read)"""
+        start = time.perf_counter()
+        stale = self.stale(self.universe)
+        stored = self.fetch(stale) if stale else 0
+        if self._dirty:
+            self.save()
+        if not stale:
+            return 0
+        logger.info(f"Refreshed company info for {stored}/{len(stale)} tickers in {time.perf_counter() - start:.2f}s")
+        return stored
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Company info refresh failed: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="company-info", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if self._dirty:
+            self.save()
@@ -0,0 +1,241 @@
+import os
+import logging
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# ================== Cross-Ticker Correlation ==================
+# Daily log returns for the whole universe live in one aligned float32
+# (days x tickers) array; prices are forward-filled across missing days, so a
+# gap contributes a zero return. A window's correlation matrix comes from two
+# accumulators over its last `window` rows, the cross-product R'R and the
+# column sums, computed with one matmul. New daily bars update the
+# accumulators by adding the new rows and subtracting the rows that left the
+# window (O(tickers^2) per bar), with a full recompute every `window` bars to
+# bound floating-point drift. A ticker only has correlations for windows its
+# history fully covers. A bar for the last known day (today's session, still
+# trading) replaces that day's row instead of being dropped, so the final
+# close supersedes the intraday one. `version` counts every change.
+DEFAULT_CORRELATION_WINDOW = 60
+MIN_CORRELATION_WINDOW = 5
+MAX_CORRELATION_WINDOW = int(os.getenv("VELORA_CORRELATION_MAX_WINDOW", "252"))
+
+
+def forward_fill(prices):
+    """Forward-fill NaNs down each column of a (days, tickers) array"""
+    valid = ~np.isnan(prices)
+    index = np.where(valid, np.arange(len(prices))[:, None], 0)
+    np.maximum.accumulate(index, axis=0, out=index)
+    filled = prices[index, np.arange(prices.shape[1])]
+    # Rows before a column's first price stay NaN
+    filled[~np.maximum.accumulate(valid, axis=0)] = np.nan
+    return filled
+
+
+def log_returns(prices):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.log(prices[1:] / prices[:-1]).astype(np.float32)
+
+
+class CorrelationService:
+    def __init__(self, tickers, days, closes, max_window=MAX_CORRELATION_WINDOW):
+        """
+        tickers: N symbols; days: (T,) sorted int day offsets (window store
+        convention); closes: (T, N) closes with NaN where a ticker has no bar.
+        Only the last max_window returns are retained.
+        """
+        self.tickers = list(tickers)
+        self.column = {t: i for i, t in enumerate(self.tickers)}
+        self.max_window = max_window
+        self._lock = threading.Lock()
+        self._windows = {}
+
+        prices = forward_fill(np.asarray(closes, dtype=np.float64))
+        self.last_day = int(days[-1]) if len(days) else None
+        self.last_prices = prices[-1] if len(prices) else np.full(len(self.tickers), np.nan)
+        # Prices the last row's returns are measured from
+        self.base_prices = prices[-2] if len(prices) > 1 else np.full(len(self.tickers), np.nan)
+        self.version = 0
+        returns = log_returns(prices)[-max_window:] if len(prices) > 1 else np.empty((0, len(self.tickers)), np.float32)
+        self._set_returns(returns)
+
+    @classmethod
+    def from_store(cls, store, tickers=None, max_window=MAX_CORRELATION_WINDOW):
+        """Align the last max_window + 1 closes of every store ticker on the union of their dates"""
+        tickers = [t for t in (tickers or store.tickers) if t in store]
+        close_idx = store.column('Close')
+        recent = {t: (np.asarray(store.dates(t)[-(max_window + 1):]), np.asarray(store.series(t)[-(max_window + 1):, close_idx]))
+                  for t in tickers}
+        days = np.unique(np.concatenate([d for d, _ in recent.values()])) if recent else np.empty(0, np.int32)
+        days = days[-(max_window + 1):]
+
+        closes = np.full((len(days), len(tickers)), np.nan)
+        for j, ticker in enumerate(tickers):
+            ticker_days, ticker_closes = recent[ticker]
+            keep = ticker_days >= days[0]
+            closes[np.searchsorted(days, ticker_days[keep]), j] = ticker_closes[keep]
+        return cls(tickers, days, closes, max_window)
+
+    def _set_returns(self, returns):
+        self.returns = np.ascontiguousarray(returns, dtype=np.float32)
+        valid = ~np.isnan(self.returns)
+        # Row of each ticker's first return; windows starting before it are not covered
+        self.first_valid = np.where(valid.any(axis=0), valid.argmax(axis=0), len(self.returns))
+        self._filled = np.nan_to_num(self.returns, nan=0.0).astype(np.float64)
+        self._windows.clear()
+
+    def __len__(self):
+        return len(self.returns)
+
+    # ---- Incremental updates ----
+    def append(self, day, closes):
+        """
+        Add one daily bar: {ticker: close}. Tickers missing from the bar
+        carry their last price (zero return). A bar for the last known day
+        replaces it; returns False for a day older than that.
+        """
+        with self._lock:
+            if self.last_day is not None and day == self.last_day and len(self.returns):
+                return self._replace_last(closes)
+            if self.last_day is not None and day < self.last_day:
+                return False
+            prices = self.last_prices.copy()
+            for ticker, close in closes.items():
+                j = self.column.get(ticker)
+                if j is not None and close is not None and np.isfinite(close) and close > 0:
+                    prices[j] = close
+
+            row = log_returns(np.stack([self.last_prices, prices]))
+            self.base_prices, self.last_prices, self.last_day = self.last_prices, prices, int(day)
+            self.version += 1
+
+            self.returns = np.concatenate([self.returns, row])
+            self._filled = np.concatenate([self._filled, np.nan_to_num(row, nan=0.0).astype(np.float64)])
+            # A ticker's first close yields a NaN return; its coverage starts at the next row
+            self.first_valid = np.where(np.isnan(row[0]), len(self.returns), self.first_valid)
+            if len(self.returns) > 2 * self.max_window:
+                self._trim()
+            return True
+
+    def _replace_last(self, closes):
+        """Re-price the last day's row; accumulators that include it are corrected in place"""
+        prices = self.last_prices.copy()
+        changed = False
+        for ticker, close in closes.items():
+            j = self.column.get(ticker)
+            if j is not None and close is not None and np.isfinite(close) and close > 0 and close != prices[j]:
+                prices[j] = close
+                changed = True
+        if not changed:
+            return False
+
+        row = log_returns(np.stack([self.base_prices, prices]))
+        filled = np.nan_to_num(row, nan=0.0).astype(np.float64)
+        old = self._filled[-1:].copy()
+        end = len(self._filled)
+        for state in self._windows.values():
+            if state["end"] == end:
+                state["cross"] += filled.T @ filled - old.T @ old
+                state["sums"] += filled[0] - old[0]
+        self.returns[-1] = row[0]
+        self._filled[-1] = filled[0]
+        self.last_prices = prices
+        self.version += 1
+        return True
+
+    def _trim(self):
+        """Drop rows older than max_window, shifting accumulator positions to match"""
+        drop = len(self.returns) - self.max_window
+        self.returns = self.returns[drop:]
+        self._filled = self._filled[drop:]
+        self.first_valid = np.maximum(self.first_valid - drop, 0)
+        for window, state in list(self._windows.items()):
+            state["end"] -= drop
+            if state["end"] < window:
+                del self._windows[window]
+
+    def append_histories(self, histories):
+        """Append every bar from the last known day on (that day's row is re-priced) from {ticker: date-indexed history}"""
+        bars = {}
+        for ticker, data in histories.items():
+            if ticker not in self.column or data is None or data.empty:
+                continue
+            days = data.index.values.astype('datetime64[D]').astype(np.int64)
+            # The last known day is included: its bar may have moved since (an unclosed session)
+            new = days >= (self.last_day if self.last_day is not None else np.iinfo(np.int64).min)
+            for day, close in zip(days[new], data["Close"].to_numpy(dtype=float)[new]):
+                bars.setdefault(int(day), {})[ticker] = close
+        added = sum(self.append(day, bars[day]) for day in sorted(bars))
+        if added:
+            logger.info(f"Appended {added} daily bars to the correlation service")
+        return added
+
+    # ---- Queries ----
+    def _accumulators(self, window):
+        """(R'R, column sums) over the last `window` rows, brought up to date incrementally"""
+        end = len(self._filled)
+        state = self._windows.get(window)
+        if state is not None and 0 <= end - state["end"] < window and state["updates"] + end - state["end"] < window:
+            added = self._filled[state["end"]:end]
+            removed = self._filled[state["end"] - window:end - window]
+            state["cross"] += added.T @ added - removed.T @ removed
+            state["sums"] += added.sum(axis=0) - removed.sum(axis=0)
+            state["updates"] += end - state["end"]
+            state["end"] = end
+            return state["cross"], state["sums"]
+
+        block = self._filled[end - window:end]
+        state = {"cross": block.T @ block, "sums": block.sum(axis=0), "end": end, "updates": 0}
+        self._windows[window] = state
+        return state["cross"], state["sums"]
+
+    def validate_window(self, window):
+        if not MIN_CORRELATION_WINDOW <= window <= min(self.max_window, len(self.returns)):
+            raise ValueError(f"window must be between {MIN_CORRELATION_WINDOW} and {min(self.max_window, len(self.returns))}")
+
+    def window_returns(self, window, columns=None):
+        """
+        (window, columns) float64 log returns over the last `window` rows, gaps
+        as zero; also whether each column's history covers the window, and
+        the day of the last row
+        """
+        self.validate_window(window)
+        with self._lock:
+            block = self._filled[len(self._filled) - window:]
+            covered = self.first_valid <= len(self.returns) - window
+            last_day = self.last_day
+        if columns is not None:
+            block, covered = block[:, columns], covered[columns]
+        return block, covered, last_day
+
+    def matrix(self, window=DEFAULT_CORRELATION_WINDOW):
+        """(N, N) float32 correlation matrix; NaN for tickers the window does not fully cover"""
+        self.validate_window(window)
+        with self._lock:
+            cross, sums = self._accumulators(window)
+            covered = self.first_valid <= len(self.returns) - window
+
+        cov = (cross - np.outer(sums, sums) / window) / (window - 1)
+        std = np.sqrt(np.maximum(np.diag(cov), 0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = cov / np.outer(std, std)
+        usable = covered & (std > 0)
+        corr[~usable, :] = np.nan
+        corr[:, ~usable] = np.nan
+        np.clip(corr, -1.0, 1.0, out=corr)
+        return corr.astype(np.float32)
+
+    def neighbors(self, ticker, window=DEFAULT_CORRELATION_WINDOW, k=5, corr=None):
+        """The k tickers most correlated with `ticker` as [(ticker, correlation)], highest first"""
+        if ticker not in self.column:
+            raise KeyError(ticker)
+        row = (self.matrix(window) if corr is None else corr)[self.column[ticker]].astype(np.float64)
+        row[self.column[ticker]] = np.nan
+        candidates = np.flatnonzero(~np.isnan(row))
+        if not len(candidates):
+            return []
+        k = min(k, len(candidates))
+        top = candidates[np.argpartition(-row[candidates], k - 1)[:k]]
+        top = top[np.argsort(-row[top])]
+        return [(self.tickers[i], float(row[i])) for i in top]
@@ -1,11 +1,11 @@
 import pandas as pd
 import numpy as np
 import os
-import yfinance as yf
 import sqlite3
 import time
 from datetime import datetime, timedelta
 import logging
+from market_data import get_provider
 
 # Configure logging
 logging.basicConfig(
@@ -43,7 +43,7 @@ def fetch_with_retry(ticker, max_retries=3, delay=2):
     for attempt in range(max_retries):
         try:
             logger.info(f"Fetching {ticker} (attempt {attempt+1}/{max_retries})...")
-            data = yf.download(ticker, start=start_date, end=end_date, progress=False)
+            data = get_provider().download(ticker, start=start_date, end=end_date)
             
             if not data.empty:
                 logger.info(f"✓ Successfully fetched {len(data)} rows for {ticker}")
@@ -0,0 +1,152 @@
+import os
+import hashlib
+import logging
+import threading
+import weakref
+import numpy as np
+from collections import OrderedDict
+from window_store import FEATURES
+from forecasting import prepare_windows, scale_windows, run_model
+
+logger = logging.getLogger(__name__)
+
+# ================== Prediction Attributions ==================
+# Explains a model's next-close prediction for one input window. Every
+# perturbation of the scaled window is stacked into one batch and scored with
+# a single forward pass:
+#   timesteps  occlusion: row t replaced by the window's per-feature mean;
+#              contribution = f(x) - f(x with row t occluded), signed
+#   features   permutation importance: column j shuffled across timesteps
+#              EXPLAIN_PERMUTATIONS times; importance = mean |f(x) - f(x')|
+# Only forward passes are needed, so the same code serves the Keras and NumPy
+# backends. Permutations are seeded from the input digest, making results
+# deterministic, and are cached by (model version, input digest) in a bounded
+# LRU.
+EXPLAIN_PERMUTATIONS = int(os.getenv("VELORA_EXPLAIN_PERMUTATIONS", "8"))
+EXPLAIN_CACHE_SIZE = int(os.getenv("VELORA_EXPLAIN_CACHE_SIZE", "512"))
+DEFAULT_TOP_K = 5
+
+_versions = weakref.WeakKeyDictionary()
+
+
+def model_version(model):
+    """Short digest of a model's weights, computed once per model object"""
+    version = _versions.get(model)
+    if version is None:
+        arrays = model.arrays.values() if hasattr(model, "arrays") else model.get_weights()
+        digest = hashlib.sha256()
+        for array in arrays:
+            digest.update(np.ascontiguousarray(array, dtype=np.float32).tobytes())
+        version = digest.hexdigest()[:16]
+        _versions[model] = version
+    return version
+
+
+def input_digest(window):
+    return hashlib.sha256(np.ascontiguousarray(window, dtype=np.float32).tobytes()).hexdigest()
+
+
+def perturbations(scaled, permutations, rng):
+    """
+    Batch of perturbed copies of one scaled (look_back, features) window
+
+    Row 0 is the original, rows 1..look_back occlude one timestep each, and
+    the rest hold `permutations` shuffles per feature (feature-major).
+    """
+    look_back, n_features = scaled.shape
+    batch = np.repeat(scaled[None], 1 + look_back + n_features * permutations, axis=0)
+
+    steps = np.arange(look_back)
+    batch[1 + steps, steps] = scaled.mean(axis=0)
+
+    order = rng.permuted(np.tile(steps, (n_features * permutations, 1)), axis=1)
+    rows = 1 + look_back + np.arange(n_features * permutations)
+    columns = np.repeat(np.arange(n_features), permutations)
+    batch[rows[:, None], steps, columns[:, None]] = scaled[order, columns[:, None]]
+    return batch
+
+
+def attribute(model, window, permutations=EXPLAIN_PERMUTATIONS):
+    """
+    Timestep and feature attributions for the next-close prediction of one raw window
+
+    Returns {"prediction", "timesteps": (look_back,) signed price contributions
+    (oldest first), "features": (n_features,) importances in price units,
+    "feature_names"}.
+    """
+    window = prepare_windows(model, np.asarray(window)[None])
+    scaled, low, width = scale_windows(window)
+    scaled = scaled[0]
+    look_back, n_features = scaled.shape
+
+    rng = np.random.default_rng(int(input_digest(window)[:16], 16))
+    batch = perturbations(scaled, permutations, rng)
+    outputs = run_model(model, batch)[:, 0]
+
+    close_idx = FEATURES.index('Close')
+    scale = float(width[0, 0, close_idx])
+    deltas = (outputs[0] - outputs[1:]) * scale
+    permuted = np.abs(deltas[look_back:]).reshape(n_features, permutations)
+
+    return {
+        "prediction": float(outputs[0] * scale + low[0, 0, close_idx]),
+        "timesteps": deltas[:look_back].astype(np.float64),
+        "features": permuted.mean(axis=1).astype(np.float64),
+        "feature_names": FEATURES[:n_features]
+    }
+
+
+def summarize(attribution, top=DEFAULT_TOP_K):
+    """JSON-ready top-k timesteps (by |contribution|) and features with their share of total importance"""
+    timesteps = attribution["timesteps"]
+    look_back = len(timesteps)
+    k = min(top, look_back)
+    strongest = np.argpartition(-np.abs(timesteps), k - 1)[:k]
+    strongest = strongest[np.argsort(-np.abs(timesteps[strongest]))]
+
+    importances = attribution["features"]
+    total = importances.sum()
+    shares = importances / total * 100 if total > 0 else np.zeros_like(importances)
+    features = sorted(zip(attribution["feature_names"], importances, shares), key=lambda item: -item[1])
+
+    return {
+        "prediction": round(attribution["prediction"], 2),
+        "timesteps": [
+            {"days_ago": int(look_back - 1 - i), "contribution": round(float(timesteps[i]), 4)}
+            for i in strongest
+        ],
+        "features": [
+            {"name": name, "importance": round(float(value), 4), "share": round(float(share), 1)}
+            for name, value, share in features[:top]
+        ]
+    }
+
+
+class AttributionCache:
+    def __init__(self, max_entries=EXPLAIN_CACHE_SIZE, permutations=EXPLAIN_PERMUTATIONS):
+        self.max_entries = max_entries
+        self.permutations = permutations
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def explain(self, model, window):
+        """attribute() for (model, window), reusing the result for identical weights and inputs"""
+        key = (model_version(model), input_digest(prepare_windows(model, np.asarray(window)[None])))
+        with self._lock:
+            attribution = self._entries.get(key)
+            if attribution is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return attribution
+            self.stats["misses"] += 1
+
+        attribution = attribute(model, window, self.permutations)
+        with self._lock:
+            self._entries[key] = attribution
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return attribution
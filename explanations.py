@@ -0,0 +1,192 @@
+import os
+import logging
+import threading
+from collections import OrderedDict
+from indicators import describe
+
+logger = logging.getLogger(__name__)
+
+# ================== Explanation Engine ==================
+# Explanation text is assembled from fixed sentences that only depend on the
+# recommendation, the direction of the move and whether recent prices are
+# known. Every combination is concatenated into one format string at import
+# time, so a request fills a single template with format_map instead of
+# building the text piece by piece. Trend, volatility and momentum come from
+# the vectorized indicators module. Rendered text is memoized per
+# (ticker, prediction snapshot), where the snapshot is the tuple of inputs the
+# text depends on; a new forecast or price gives a new snapshot.
+EXPLANATION_CACHE_SIZE = int(os.getenv("VELORA_EXPLANATION_CACHE_SIZE", "1024"))
+RECENT_DAYS = 10
+
+_TREND = (
+    "Recent price action shows a {trend} trend with {volatility} volatility "
+    "and {momentum} momentum. "
+)
+
+_PREDICTION_OPENING = {
+    "BUY": (
+        "Based on our AI model analysis, {ticker} shows strong bullish indicators "
+        "with a predicted price increase of {percent_change:.2f}%. "
+        "The model forecasts the price to rise from ${current_price:.2f} to ${predicted_price:.2f} "
+        "in the short term. "
+    ),
+    "SELL": (
+        "Our AI model indicates potential bearish movement for {ticker}, "
+        "with a predicted price decrease of {abs_change:.2f}%. "
+        "The forecast shows a decline from ${current_price:.2f} to ${predicted_price:.2f} "
+        "in the short term. "
+    ),
+    "HOLD": (
+        "For {ticker}, our AI model predicts relatively stable price action "
+        "with a moderate change of {percent_change:.2f}%. "
+        "The forecast suggests the price may move from ${current_price:.2f} to ${predicted_price:.2f}. "
+    )
+}
+
+_PREDICTION_CLOSING = {
+    "BUY": (
+        "Technical indicators suggest strong buying pressure, and our AI system detects favorable market conditions. "
+        "Consider buying if aligned with your investment strategy and risk tolerance."
+    ),
+    "SELL": (
+        "Technical analysis reveals selling pressure, and our AI system identifies potential resistance levels ahead. "
+        "Consider reducing exposure if this aligns with your investment goals and risk management strategy."
+    ),
+    "HOLD": (
+        "The analysis indicates a relatively balanced market with equilibrium between buying and selling pressure. "
+        "Holding current positions may be appropriate while monitoring market developments."
+    )
+}
+
+# (recommendation, has recent prices) -> format string
+PREDICTION_TEMPLATES = {
+    (recommendation, with_trend): _PREDICTION_OPENING[recommendation] + (_TREND if with_trend else "") + _PREDICTION_CLOSING[recommendation]
+    for recommendation in _PREDICTION_OPENING
+    for with_trend in (True, False)
+}
+
+_CHAT_MOVE = {
+    "up": "Our model predicts the price will increase by {abs_change:.2f}% to ${price:.2f} tomorrow. ",
+    "down": "Our model predicts the price will decrease by {abs_change:.2f}% to ${price:.2f} tomorrow. ",
+    "flat": "Our model predicts the price will remain stable at around ${price:.2f} tomorrow. "
+}
+
+_CHAT_RECOMMENDATION = {
+    "BUY": "Based on this analysis, our system suggests this stock may be a good buying opportunity. ",
+    "SELL": "Based on this analysis, our system suggests this may be a good time to consider selling. ",
+    "HOLD": "Based on this analysis, our system suggests holding this position for now. "
+}
+
+# (direction, recommendation) -> format string
+CHAT_TEMPLATES = {
+    (direction, recommendation): (
+        "Based on our LSTM model analysis, {company_name} ({ticker}) is currently trading at ${current_price}. "
+        + _CHAT_MOVE[direction]
+        + "The confidence level for this prediction is {confidence}%. "
+        + _CHAT_RECOMMENDATION[recommendation]
+        + "Note that {company_name} operates in the {sector} sector, which should be considered in your investment decisions."
+        + "\n\nPlease note that all predictions are based on historical data and market patterns, and should not be considered as financial advice."
+    )
+    for direction in _CHAT_MOVE
+    for recommendation in _CHAT_RECOMMENDATION
+}
+
+
+def prediction_snapshot(prediction_data):
+    """Inputs the prediction explanation depends on, as a hashable tuple"""
+    historical = prediction_data.get("historical", [])
+    recent = tuple(item["price"] for item in historical[-RECENT_DAYS:]) if len(historical) >= RECENT_DAYS else ()
+    return (
+        prediction_data["current_price"],
+        prediction_data["predicted_price"],
+        prediction_data["percent_change"],
+        prediction_data["recommendation"],
+        recent
+    )
+
+
+def render_prediction(ticker, snapshot):
+    current_price, predicted_price, percent_change, recommendation, recent = snapshot
+    values = {
+        "ticker": ticker,
+        "current_price": current_price,
+        "predicted_price": predicted_price,
+        "percent_change": percent_change,
+        "abs_change": abs(percent_change)
+    }
+    if recent:
+        values.update(describe(recent))
+    template = PREDICTION_TEMPLATES[(recommendation if recommendation in ("BUY", "SELL") else "HOLD", bool(recent))]
+    return template.format_map(values)
+
+
+def chat_snapshot(prediction_data, company_name, sector):
+    """Inputs the chat explanation depends on (next-day forecast and company), or None without forecasts"""
+    predictions = prediction_data.get("predictions", [])
+    if not predictions:
+        return None
+    tomorrow = predictions[0]
+    return (
+        prediction_data.get("current_price", 0),
+        tomorrow.get("price", 0),
+        tomorrow.get("change_percent", 0),
+        tomorrow.get("confidence", 0),
+        tomorrow.get("recommendation", "HOLD"),
+        company_name,
+        sector
+    )
+
+
+def render_chat(ticker, snapshot):
+    current_price, price, change_pct, confidence, recommendation, company_name, sector = snapshot
+    direction = "up" if change_pct > 0 else "down" if change_pct < 0 else "flat"
+    template = CHAT_TEMPLATES[(direction, recommendation if recommendation in ("BUY", "SELL") else "HOLD")]
+    return template.format_map({
+        "ticker": ticker,
+        "company_name": company_name,
+        "sector": sector,
+        "current_price": current_price,
+        "price": price,
+        "abs_change": abs(change_pct),
+        "confidence": confidence
+    })
+
+
+class ExplanationEngine:
+    def __init__(self, max_entries=EXPLANATION_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _render(self, key, render):
+        with self._lock:
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return text
+            self.stats["misses"] += 1
+
+        text = render()
+        if self.max_entries:
+            with self._lock:
+                self._entries[key] = text
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return text
+
+    def prediction(self, ticker, prediction_data):
+        """Explanation for an /api/predict result (current, predicted and recent prices)"""
+        snapshot = prediction_snapshot(prediction_data)
+        return self._render(("prediction", ticker, snapshot), lambda: render_prediction(ticker, snapshot))
+
+    def chat(self, ticker, prediction_data, company_name, sector):
+        """Chat explanation of the next-day forecast, with company context"""
+        snapshot = chat_snapshot(prediction_data, company_name, sector)
+        if snapshot is None:
+            return f"I currently don't have enough data to explain the prediction for {company_name} ({ticker})."
+        return self._render(("chat", ticker, snapshot), lambda: render_chat(ticker, snapshot))
@@ -1,6 +1,6 @@
-import yfinance as yf
 import pandas as pd
 from typing import List
+from market_data import get_provider
 
 def fetch_stock_data(stocks: List[str], period: str) -> pd.DataFrame:
     """Fetch historical stock data with technical indicators."""
@@ -9,7 +9,7 @@ def fetch_stock_data(stocks: List[str], period: str) -> pd.DataFrame:
     for stock in stocks:
         try:
             print(f"Fetching {stock}...")
-            data = yf.download(stock, period=period, progress=False)
+            data = get_provider().download(stock, period=period)
             
             # Compute indicators
             data['SMA_30'] = data['Close'].rolling(30).mean()
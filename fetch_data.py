@@ -4,7 +4,7 @@ import time
 import requests
 import numpy as np
 import pandas as pd
-import yfinance as yf
+from market_data import get_provider
 from fredapi import Fred
 from transformers import pipeline
 
@@ -67,7 +67,7 @@ def save_to_csv(df, filename):
 
 # ================== Fetch Stock Data Individually ==================
 def fetch_stock_data(symbol, start_date, end_date=None):
-    """ Fetches stock data for a single symbol from Yahoo Finance """
+    """ Fetches stock data for a single symbol from the market data provider """
     print(f"🔍 Fetching stock data for {symbol}...")
     
     if end_date is None:
@@ -75,7 +75,7 @@ def fetch_stock_data(symbol, start_date, end_date=None):
 
     for attempt in range(3):  # Retry up to 3 times
         try:
-            data = yf.download(symbol, start=start_date, end=end_date, progress=False, auto_adjust=True)
+            data = get_provider().download(symbol, start=start_date, end=end_date, auto_adjust=True)
 
             # If no data, retry
             if data.empty or "Close" not in data.columns:
@@ -0,0 +1,187 @@
+import math
+import numpy as np
+from window_store import FEATURES
+from tracing import span
+
+# ================== Multi-Horizon Forecasting ==================
+# Models map a scaled (look_back, features) window to `horizon` future closes.
+# Models trained by train_set.py have a direct multi-output head; single
+# output models are rolled out recursively by feeding predictions back in.
+DEFAULT_FORECAST_DAYS = 3
+MAX_FORECAST_DAYS = 30
+PRICE_FEATURES = ['Close', 'High', 'Low', 'Open']
+Z_95 = 1.96
+
+
+def model_input_shape(model):
+    """(look_back, n_features) expected by a model"""
+    _, look_back, n_features = model.input_shape
+    return look_back, n_features
+
+
+def model_horizon(model):
+    """Number of future closes a model emits per forward pass"""
+    return model.output_shape[-1]
+
+
+def run_model(model, x, training=False):
+    """One forward pass over a batch without Model.predict's per-call setup"""
+    return np.asarray(model(x, training=training), dtype=np.float32)
+
+
+def align_features(window, n_features):
+    """
+    Shape a raw window into the first n_features columns of FEATURES
+
+    Close-only windows (a single column) are widened by reusing the close for
+    every price column and zero volume.
+    """
+    if window.shape[-1] >= n_features:
+        return window[..., :n_features]
+
+    widened = np.zeros(window.shape[:-1] + (n_features,), dtype=np.float32)
+    for i, name in enumerate(FEATURES[:n_features]):
+        if name in PRICE_FEATURES:
+            widened[..., i] = window[..., 0]
+    return widened
+
+
+def scale_windows(windows):
+    """Min-max scale each window and feature independently; returns (scaled, low, width)"""
+    low = windows.min(axis=1, keepdims=True)
+    width = windows.max(axis=1, keepdims=True) - low
+    width = np.where(width > 0, width, 1.0).astype(np.float32)
+    return (windows - low) / width, low, width
+
+
+def rollout(model, windows, days, training=False):
+    """
+    Forecast `days` scaled closes for a batch of scaled windows
+
+    Each forward pass covers the whole batch and yields `horizon` steps; the
+    predicted closes are appended to the window (price columns take the
+    prediction, other columns carry the last row forward) until `days` steps
+    are filled. With training=True dropout stays active, so every batch row
+    follows its own stochastic path.
+    """
+    batch, _, n_features = windows.shape
+    horizon = model_horizon(model)
+    price_cols = [i for i, name in enumerate(FEATURES[:n_features]) if name in PRICE_FEATURES]
+
+    out = np.empty((batch, days), dtype=np.float32)
+    x = np.ascontiguousarray(windows, dtype=np.float32)
+    step = 0
+    while step < days:
+        pred = run_model(model, x, training)
+        take = min(horizon, days - step)
+        out[:, step:step + take] = pred[:, :take]
+        step += take
+
+        if step < days:
+            new_rows = np.repeat(x[:, -1:, :], take, axis=1)
+            new_rows[:, :, price_cols] = pred[:, :take, None]
+            x = np.concatenate([x[:, take:], new_rows], axis=1)
+
+    return out
+
+
+def step_uncertainty(closes, prices, days):
+    """
+    Per-step 95% interval and directional confidence from realized volatility
+
+    closes: (batch, look_back) raw closes, prices: (batch, days) forecasts.
+    Log-return volatility is scaled by sqrt(h) for step h.
+    """
+    returns = np.diff(np.log(np.maximum(closes, 1e-8)), axis=1)
+    sigma = returns.std(axis=1, keepdims=True) if returns.shape[1] > 1 else np.zeros((len(closes), 1))
+    sigma_h = np.maximum(sigma * np.sqrt(np.arange(1, days + 1)), 1e-6)
+
+    lower = prices * np.exp(-Z_95 * sigma_h)
+    upper = prices * np.exp(Z_95 * sigma_h)
+
+    # Probability that the realized move has the predicted sign
+    drift = np.abs(np.log(np.maximum(prices, 1e-8) / closes[:, -1:]))
+    erf = np.frompyfunc(math.erf, 1, 1)
+    confidence = 50.0 * (1.0 + erf(drift / (sigma_h * math.sqrt(2))).astype(np.float64))
+
+    return lower, upper, sigma_h, confidence
+
+
+def clamp_days(days):
+    return int(min(max(days, 1), MAX_FORECAST_DAYS))
+
+
+def prepare_windows(model, windows):
+    """Align raw windows to the model's (look_back, features), padding short ones with their first row"""
+    look_back, n_features = model_input_shape(model)
+
+    windows = np.asarray(windows, dtype=np.float32)
+    if windows.ndim == 2:
+        windows = windows[:, :, None]
+    windows = align_features(windows, n_features)[:, -look_back:]
+    if windows.shape[1] < look_back:
+        padding = np.repeat(windows[:, :1], look_back - windows.shape[1], axis=1)
+        windows = np.concatenate([padding, windows], axis=1)
+    return windows
+
+
+def forecast_batch(model, windows, days=DEFAULT_FORECAST_DAYS):
+    """
+    Forecast `days` closes for a batch of raw windows in one vectorized rollout
+
+    windows: (batch, look_back, features) in FEATURES order, or (batch, look_back)
+    closes. Returns a dict of (batch, days) arrays: price, lower, upper, sigma,
+    confidence.
+    """
+    days = clamp_days(days)
+    with span("scale"):
+        windows = prepare_windows(model, windows)
+        scaled, low, width = scale_windows(windows)
+    with span("inference"):
+        scaled_prices = rollout(model, scaled, days)
+
+    close_idx = FEATURES.index('Close')
+    prices = scaled_prices * width[:, :, close_idx] + low[:, :, close_idx]
+    closes = windows[:, :, close_idx]
+    with span("uncertainty"):
+        lower, upper, sigma, confidence = step_uncertainty(closes, prices, days)
+
+    return {
+        "price": prices,
+        "lower": lower,
+        "upper": upper,
+        "sigma": sigma,
+        "confidence": confidence
+    }
+
+
+def forecast_prices(model, window, days=DEFAULT_FORECAST_DAYS):
+    """Forecast a single raw (look_back, features) or (look_back,) window; returns (days,) arrays"""
+    result = forecast_batch(model, np.asarray(window)[None], days)
+    return {key: value[0] for key, value in result.items()}
+
+
+def forecast_tickers(models, windows, days=DEFAULT_FORECAST_DAYS, bank=None):
+    """
+    Forecast one raw window per ticker, each through that ticker's model
+
+    windows: {ticker: (look_back, features) array}. Tickers held by `bank` (a
+    numpy_lstm.ModelBank) share a single stacked rollout; the rest get one
+    forward pass each. Returns {ticker: dict of (days,) arrays}.
+    """
+    results = {}
+    banked = [t for t in windows if bank is not None and t in bank]
+    if banked:
+        try:
+            selection = bank.select(banked)
+            stacked = np.concatenate([prepare_windows(selection, windows[t][None]) for t in banked])
+            batch = forecast_batch(selection, stacked, days)
+            for row, ticker in enumerate(banked):
+                results[ticker] = {key: value[row] for key, value in batch.items()}
+        except ValueError:
+            results = {}
+
+    for ticker, window in windows.items():
+        if ticker not in results and ticker in models:
+            results[ticker] = forecast_prices(models[ticker], window, days)
+    return results
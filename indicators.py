@@ -0,0 +1,63 @@
+import numpy as np
+
+# ================== Price Indicators ==================
+# Vectorized indicators over the last axis of a (..., days) close array, so
+# one call covers a single series or a whole universe of tickers. Labels use
+# the thresholds the explanation text has always used.
+HIGH_VOLATILITY = 1.5
+MODERATE_VOLATILITY = 0.7
+MOMENTUM_THRESHOLD = 0.01
+MOMENTUM_LAG = 2
+RSI_WINDOW = 14
+
+
+def percent_changes(closes):
+    closes = np.asarray(closes, dtype=np.float64)
+    return np.diff(closes, axis=-1) / closes[..., :-1] * 100
+
+
+def volatility(closes):
+    """Mean absolute day-over-day move in percent"""
+    return np.abs(percent_changes(closes)).mean(axis=-1)
+
+
+def momentum(closes, lag=MOMENTUM_LAG):
+    """Fractional change over the last `lag` days"""
+    closes = np.asarray(closes, dtype=np.float64)
+    return (closes[..., -1] - closes[..., -1 - lag]) / closes[..., -1 - lag]
+
+
+def sma(closes, window):
+    """Mean of the last `window` closes"""
+    return np.asarray(closes, dtype=np.float64)[..., -window:].mean(axis=-1)
+
+
+def rsi(closes, window=RSI_WINDOW):
+    """Latest RSI from simple-average gains and losses over the last `window` moves (as extract_stock_data.compute_rsi)"""
+    delta = np.diff(np.asarray(closes, dtype=np.float64)[..., -(window + 1):], axis=-1)
+    gain = np.clip(delta, 0, None).mean(axis=-1)
+    loss = np.clip(-delta, 0, None).mean(axis=-1)
+    return 100 - 100 / (1 + gain / np.where(loss == 0, 1e-10, loss))
+
+
+def trend_label(closes):
+    closes = np.asarray(closes)
+    return np.where(closes[..., -1] > closes[..., 0], "upward", "downward")
+
+
+def volatility_label(value):
+    return np.where(value > HIGH_VOLATILITY, "high", np.where(value > MODERATE_VOLATILITY, "moderate", "low"))
+
+
+def momentum_label(value):
+    return np.where(value > MOMENTUM_THRESHOLD, "increasing", np.where(value < -MOMENTUM_THRESHOLD, "decreasing", "stable"))
+
+
+def describe(closes):
+    """Trend, volatility and momentum labels for one close series (at least MOMENTUM_LAG + 1 days)"""
+    closes = np.asarray(closes, dtype=np.float64)
+    return {
+        "trend": str(trend_label(closes)),
+        "volatility": str(volatility_label(volatility(closes))),
+        "momentum": str(momentum_label(momentum(closes)))
+    }
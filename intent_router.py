@@ -0,0 +1,214 @@
+import re
+import logging
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# ================== Chat Intent Router ==================
+# One pass over a chat message yields its intents and the tickers it names:
+#   - keywords and phrases are matched by a precompiled Aho-Corasick automaton
+#     over the lowercased text. Stems ("predict") match at a word start, so
+#     "prediction" counts; exact words ("hi") need a boundary on both sides.
+#   - tickers come from cashtags ($aapl), upper-case tokens (AAPL), company
+#     names ("apple", "jpmorgan chase") through a token trie built from the
+#     search universe, and lower- or mixed-case tokens (aapl) that are not
+#     also everyday words.
+# Intents are grouped by context: TICKER_INTENTS apply when a ticker is in
+# play, GENERAL_INTENTS otherwise. Each list is in priority order.
+TICKER_INTENTS = [
+    ("explain", ["explain", "why=", "how=", "analysis", "analyze", "analyse"]),
+    ("price", ["price", "predict", "forecast"]),
+    ("confidence", ["confiden", "accura", "certain"]),
+    ("recommend", ["buy=", "buying", "sell=", "selling", "invest", "recommend"])
+]
+
+GENERAL_INTENTS = [
+    ("how_it_works", ["how do you", "how does your", "how are predictions"]),
+    ("accuracy", ["accuracy", "how accurate"]),
+    ("stock_picks", ["which stocks", "what stocks", "recommend stocks"]),
+    ("greeting", ["hello", "hi=", "hey="]),
+    ("thanks", ["thank"]),
+    ("help", ["help"])
+]
+
+# Words that look like tickers when typed in capitals but rarely mean one
+TICKER_STOPWORDS = {"I", "A", "AM", "AN", "AND", "ARE", "AT", "BE", "BUY", "CAN", "DO", "FOR", "GO", "HI", "HOW",
+                    "IF", "IN", "IS", "IT", "ME", "MY", "NO", "NOW", "OF", "OK", "ON", "OR", "SELL", "SO", "THE",
+                    "TO", "UP", "US", "WE", "WHAT", "WHY", "AI", "USA", "CEO", "EPS", "ETF", "IPO"}
+
+# Lower-case words that are also tickers ("now", "all", "low"); typed in
+# lower case they are read as words, in capitals or with a $ as tickers
+COMMON_WORDS = {t.lower() for t in TICKER_STOPWORDS} | {
+    "all", "any", "are", "big", "car", "cat", "day", "has", "hold", "home", "key", "life", "low", "love", "main",
+    "man", "new", "now", "one", "open", "out", "play", "post", "real", "run", "safe", "see", "ship", "site", "snow",
+    "star", "team", "tech", "top", "true", "two", "very", "was", "well", "work", "you", "fast", "good", "best"
+}
+
+NAME_SUFFIXES = {"inc", "incorporated", "corp", "corporation", "co", "company", "ltd", "limited", "plc", "llc",
+                 "group", "holdings", "the", "com", "class", "platforms"}
+
+TOKEN_PATTERN = re.compile(r"\$?[A-Za-z][A-Za-z0-9]*(?:[.&'-][A-Za-z0-9]+)*")
+
+
+class KeywordAutomaton:
+    def __init__(self, keywords):
+        """
+        Aho-Corasick automaton over (pattern, payload) pairs
+
+        A trailing "=" on a pattern marks an exact word; otherwise the
+        pattern is a stem that only needs a word boundary on the left.
+        """
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+
+        for pattern, payload in keywords:
+            exact = pattern.endswith("=")
+            pattern = pattern.rstrip("=").lower()
+            node = 0
+            for char in pattern:
+                nxt = self.goto[node].get(char)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][char] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                node = nxt
+            self.output[node].append((len(pattern), exact, payload))
+
+        # Breadth-first failure links; outputs are merged along them
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, nxt in self.goto[node].items():
+                queue.append(nxt)
+                state = self.fail[node]
+                while state and char not in self.goto[state]:
+                    state = self.fail[state]
+                self.fail[nxt] = self.goto[state].get(char, 0)
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+
+    def matches(self, text):
+        """Payloads of every keyword occurrence in text (already lowercased)"""
+        found = set()
+        goto, fail, output = self.goto, self.fail, self.output
+        node = 0
+        last = len(text) - 1
+        for i, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for length, exact, payload in output[node]:
+                start = i - length + 1
+                if start > 0 and text[start - 1].isalnum():
+                    continue
+                if exact and i < last and text[i + 1].isalnum():
+                    continue
+                found.add(payload)
+        return found
+
+
+def name_tokens(name):
+    """Lowercase company-name tokens without legal suffixes: "Amazon.com Inc." -> ["amazon"]"""
+    tokens = [t.lower() for t in re.findall(r"[A-Za-z0-9]+", name.replace(".com", ""))]
+    return [t for t in tokens if t not in NAME_SUFFIXES]
+
+
+class ParsedMessage:
+    __slots__ = ("text", "ticker_intents", "general_intents", "tickers")
+
+    def __init__(self, text, ticker_intents, general_intents, tickers):
+        self.text = text
+        self.ticker_intents = ticker_intents
+        self.general_intents = general_intents
+        self.tickers = tickers
+
+    def intent(self, with_ticker):
+        """Highest-priority intent for the context, or None"""
+        intents = TICKER_INTENTS if with_ticker else GENERAL_INTENTS
+        matched = self.ticker_intents if with_ticker else self.general_intents
+        for name, _ in intents:
+            if name in matched:
+                return name
+        return None
+
+
+class IntentRouter:
+    def __init__(self, universe=()):
+        """
+        Compile the keyword automaton and the ticker/company-name trie
+
+        universe: iterable of {"ticker", "name"} dicts (the search universe).
+        """
+        keywords = [(kw, ("ticker", name)) for name, kws in TICKER_INTENTS for kw in kws]
+        keywords += [(kw, ("general", name)) for name, kws in GENERAL_INTENTS for kw in kws]
+        self.automaton = KeywordAutomaton(keywords)
+
+        self.tickers = set()
+        self.name_trie = {}
+        for item in universe:
+            self.add_symbol(item["ticker"], item.get("name", ""))
+
+    def add_symbol(self, ticker, name=""):
+        ticker = ticker.upper()
+        self.tickers.add(ticker)
+        tokens = name_tokens(name)
+        if not tokens:
+            return
+        node = self.name_trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node.setdefault("$", ticker)
+
+        # The first word alone is an alias ("jpmorgan"), dropped once two
+        # companies share it ("american", "first")
+        alias = self.name_trie[tokens[0]]
+        if alias.get("~", ticker) != ticker:
+            ticker = None
+        alias["~"] = ticker
+
+    def route(self, message):
+        """Intents and mentioned tickers (in order of appearance) for a raw message"""
+        text = message.strip()
+        lowered = text.lower()
+
+        ticker_intents, general_intents = set(), set()
+        for context, name in self.automaton.matches(lowered):
+            (ticker_intents if context == "ticker" else general_intents).add(name)
+
+        tickers = []
+        tokens = TOKEN_PATTERN.findall(text)
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+            symbol = token.lstrip("$").upper()
+
+            if token.startswith("$") and symbol in self.tickers:
+                match, width = symbol, 1
+            elif token.isupper() and len(token) > 1 and symbol in self.tickers and symbol not in TICKER_STOPWORDS:
+                match, width = symbol, 1
+            else:
+                # Longest company name starting at this token
+                match, width = None, 1
+                node = self.name_trie
+                for j in range(i, len(tokens)):
+                    node = node.get(tokens[j].lower())
+                    if node is None:
+                        break
+                    found = node.get("$") or (node.get("~") if j == i else None)
+                    if found:
+                        match, width = found, j - i + 1
+                if match is None and len(symbol) > 1 and symbol in self.tickers and token.lower() not in COMMON_WORDS:
+                    match = symbol
+
+            if match and match not in tickers:
+                tickers.append(match)
+            i += width
+
+        return ParsedMessage(lowered, ticker_intents, general_intents, tickers)
+
+    def extract_ticker(self, message):
+        """First ticker a message names, or None"""
+        tickers = self.route(message).tickers
+        return tickers[0] if tickers else None
@@ -0,0 +1,244 @@
+import os
+import re
+import time
+import zlib
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from window_store import FEATURES, open_window_store
+
+logger = logging.getLogger(__name__)
+
+# ================== Market Data Providers ==================
+# Every OHLCV/company-info fetch goes through get_provider():
+#   yfinance  Yahoo Finance (default)
+#   replay    local, deterministic: the window store, then recorded CSVs in
+#             data/stocks/<TICKER>.csv, then a seeded synthetic series, with
+#             optional latency and failure injection for load tests
+MARKET_DATA_PROVIDER = os.getenv("VELORA_MARKET_DATA", "yfinance")
+REPLAY_RECORDINGS_DIR = os.getenv("VELORA_REPLAY_RECORDINGS", "data/stocks")
+REPLAY_LATENCY_MS = float(os.getenv("VELORA_REPLAY_LATENCY_MS", "0"))
+REPLAY_JITTER_MS = float(os.getenv("VELORA_REPLAY_JITTER_MS", "0"))
+REPLAY_FAILURE_RATE = float(os.getenv("VELORA_REPLAY_FAILURE_RATE", "0"))
+REPLAY_SEED = int(os.getenv("VELORA_REPLAY_SEED", "0"))
+SYNTHETIC_HISTORY_DAYS = 365 * 10
+
+PERIOD_DAYS = {"d": 1, "wk": 7, "mo": 30, "y": 365}
+
+
+class MarketDataError(Exception):
+    """Raised by a provider when a fetch fails (including injected failures)"""
+
+
+def period_to_days(period):
+    """Calendar days covered by a yfinance-style period string ("60d", "6mo", "10y"); None for "max" """
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period or "")
+    if not match:
+        return None
+    return int(match.group(1)) * PERIOD_DAYS[match.group(2)]
+
+
+def synthetic_history(ticker, days=SYNTHETIC_HISTORY_DAYS, end=None):
+    """Business-day OHLCV frame from a random walk seeded by the ticker; identical on every call"""
+    rng = np.random.default_rng(zlib.crc32(ticker.encode()))
+    index = pd.bdate_range(end=end or pd.Timestamp.today().normalize(), periods=max(int(days * 5 / 7), 1), name="Date")
+    close = (50 + rng.random() * 400) * np.exp(np.cumsum(rng.normal(0.0003, 0.015, len(index))))
+    spread = close * rng.uniform(0.002, 0.02, len(index))
+    return pd.DataFrame({
+        "Open": close + rng.normal(0, 0.5, len(index)) * spread,
+        "High": close + spread,
+        "Low": close - spread,
+        "Close": close,
+        "Volume": rng.integers(1_000_000, 50_000_000, len(index)).astype(float)
+    }, index=index)
+
+
+def slice_history(frame, period=None, start=None, end=None):
+    """Restrict a date-indexed frame to [start, end) or the trailing period"""
+    if start is not None:
+        frame = frame[frame.index >= pd.Timestamp(start)]
+    if end is not None:
+        frame = frame[frame.index < pd.Timestamp(end)]
+    days = period_to_days(period) if start is None else None
+    if days is not None and not frame.empty:
+        frame = frame[frame.index > frame.index[-1] - pd.Timedelta(days=days)]
+    return frame
+
+
+class YFinanceProvider:
+    def __init__(self):
+        import yfinance
+        self.yf = yfinance
+
+    def history(self, ticker, period="1mo", start=None, end=None):
+        """Ticker.history: date-indexed Open/High/Low/Close/Volume"""
+        return self.yf.Ticker(ticker).history(period=period, start=start, end=end)
+
+    def download(self, ticker, start=None, end=None, period=None, auto_adjust=None):
+        """yf.download for one ticker, with yfinance's own column layout"""
+        kwargs = {"progress": False}
+        if auto_adjust is not None:
+            kwargs["auto_adjust"] = auto_adjust
+        if period is not None:
+            kwargs["period"] = period
+        return self.yf.download(ticker, start=start, end=end, **kwargs)
+
+    def histories(self, tickers, period="1mo"):
+        """Ticker.history for several tickers in one yf.download call; {ticker: frame}"""
+        if not tickers:
+            return {}
+        data = self.yf.download(list(tickers), period=period, group_by="ticker", progress=False)
+        frames = {}
+        for ticker in tickers:
+            if ticker in data.columns.get_level_values(0):
+                frames[ticker] = data[ticker].dropna(how="all")
+        return frames
+
+    def info(self, ticker):
+        return self.yf.Ticker(ticker).info
+
+    def infos(self, tickers, workers=8):
+        """Ticker.info for several tickers; Yahoo has no batch endpoint, so requests run concurrently"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        def fetch(ticker):
+            try:
+                return ticker, self.info(ticker)
+            except Exception as e:
+                logger.warning(f"Error fetching info for {ticker}: {e}")
+                return ticker, None
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return {ticker: info for ticker, info in pool.map(fetch, tickers) if info}
+
+
+class ReplayProvider:
+    def __init__(self, store=None, recordings_dir=REPLAY_RECORDINGS_DIR, latency_ms=REPLAY_LATENCY_MS,
+                 jitter_ms=REPLAY_JITTER_MS, failure_rate=REPLAY_FAILURE_RATE, seed=REPLAY_SEED):
+        """
+        Offline provider serving recorded or synthetic OHLCV
+
+        Every call sleeps latency_ms (+ uniform jitter) and fails with
+        MarketDataError at failure_rate; both draws come from a seeded RNG so
+        a run is reproducible. `stats` counts calls, failures and which
+        source served each request. Pass a WindowStore to replay from it.
+        """
+        self.store = store
+        self.recordings_dir = recordings_dir
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+        self._frames = {}
+        self.stats = {"calls": 0, "failures": 0, "store": 0, "recorded": 0, "synthetic": 0}
+
+    def _simulate_network(self):
+        with self._lock:
+            self.stats["calls"] += 1
+            delay = self.latency_ms + self.jitter_ms * self._rng.random()
+            failed = self._rng.random() < self.failure_rate
+            if failed:
+                self.stats["failures"] += 1
+        if delay > 0:
+            time.sleep(delay / 1000)
+        if failed:
+            raise MarketDataError("Injected replay failure")
+
+    def _load_frame(self, ticker):
+        if self.store is not None and ticker in self.store:
+            dates = pd.to_datetime(np.asarray(self.store.dates(ticker), dtype='datetime64[D]'))
+            # The store keeps float32; frames are float64 like provider data, so
+            # scalars pulled from them serialize as plain floats
+            frame = pd.DataFrame(np.asarray(self.store.series(ticker), dtype=np.float64), index=dates, columns=self.store.features)
+            return "store", frame.rename_axis("Date")
+
+        path = os.path.join(self.recordings_dir, f"{ticker}.csv")
+        if os.path.exists(path):
+            recorded = pd.read_csv(path)
+            date_col = next((c for c in ("Date", "Datetime", "timestamp") if c in recorded.columns), None)
+            if date_col is not None:
+                recorded.index = pd.to_datetime(recorded[date_col]).rename("Date")
+                columns = [c for c in FEATURES if c in recorded.columns]
+                if columns:
+                    frame = recorded[columns].apply(pd.to_numeric, errors='coerce').dropna()
+                    return "recorded", frame[~frame.index.duplicated()].sort_index()
+
+        return "synthetic", synthetic_history(ticker)
+
+    def frame(self, ticker):
+        """Full history for a ticker, loaded once per provider"""
+        ticker = ticker.upper()
+        cached = self._frames.get(ticker)
+        if cached is None:
+            cached = self._frames.setdefault(ticker, self._load_frame(ticker))
+        source, frame = cached
+        with self._lock:
+            self.stats[source] += 1
+        return frame
+
+    def history(self, ticker, period="1mo", start=None, end=None):
+        self._simulate_network()
+        return slice_history(self.frame(ticker), period, start, end).copy()
+
+    def download(self, ticker, start=None, end=None, period=None, auto_adjust=None):
+        self._simulate_network()
+        return slice_history(self.frame(ticker), period, start, end).copy()
+
+    def histories(self, tickers, period="1mo"):
+        """One simulated round trip for the whole batch"""
+        self._simulate_network()
+        return {ticker: slice_history(self.frame(ticker), period).copy() for ticker in tickers}
+
+    def info(self, ticker):
+        self._simulate_network()
+        return self._info(ticker.upper())
+
+    def infos(self, tickers, workers=8):
+        """One simulated round trip for the whole batch"""
+        self._simulate_network()
+        return {ticker: self._info(ticker.upper()) for ticker in tickers}
+
+    def _info(self, ticker):
+        return {
+            "symbol": ticker,
+            "longName": f"{ticker} (replay)",
+            "sector": "Unknown",
+            "industry": "Unknown",
+            "country": "Unknown",
+            "website": "",
+            "marketCap": int(self.frame(ticker)["Close"].iloc[-1] * 1e9),
+            "trailingPE": 0,
+            "longBusinessSummary": f"Replayed market data for {ticker}."
+        }
+
+
+PROVIDERS = {
+    "yfinance": YFinanceProvider,
+    "replay": lambda: ReplayProvider(store=open_window_store())
+}
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_provider():
+    """Process-wide provider selected by VELORA_MARKET_DATA, created on first use"""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                if MARKET_DATA_PROVIDER not in PROVIDERS:
+                    raise ValueError(f"Unknown market data provider {MARKET_DATA_PROVIDER}, expected one of {list(PROVIDERS)}")
+                _provider = PROVIDERS[MARKET_DATA_PROVIDER]()
+                logger.info(f"Using {MARKET_DATA_PROVIDER} market data provider")
+    return _provider
+
+
+def set_provider(provider):
+    """Swap the process-wide provider (load tests, benchmarks)"""
+    global _provider
+    with _provider_lock:
+        _provider = provider
+    return provider
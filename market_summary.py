@@ -0,0 +1,152 @@
+import os
+import json
+import time
+import logging
+import threading
+import numpy as np
+from datetime import datetime
+from market_data import get_provider
+
+logger = logging.getLogger(__name__)
+
+# ================== Market Summary Aggregator ==================
+# A background thread refreshes index quotes and the trending list every
+# SUMMARY_REFRESH_SECONDS with one batched provider call, then publishes the
+# finished response as encoded JSON bytes. Readers only take a reference to
+# the current bytes, so /api/market/summary never touches the network and a
+# snapshot can never be seen half-built.
+SUMMARY_REFRESH_SECONDS = float(os.getenv("VELORA_SUMMARY_REFRESH_SECONDS", "60"))
+TRENDING_COUNT = int(os.getenv("VELORA_TRENDING_COUNT", "4"))
+VOLUME_LOOKBACK_DAYS = 20
+
+MARKET_INDICES = [
+    {"name": "S&P 500", "symbol": "SPX", "source": "^GSPC"},
+    {"name": "NASDAQ", "symbol": "COMP", "source": "^IXIC"},
+    {"name": "Dow Jones", "symbol": "DJI", "source": "^DJI"}
+]
+
+
+def ranks(values):
+    """Rank of each value scaled to [0, 1] (ties broken by position)"""
+    if len(values) < 2:
+        return np.ones(len(values))
+    return np.argsort(np.argsort(values)) / (len(values) - 1)
+
+
+def trending_scores(change_percent, relative_volume):
+    """Equal-weight rank of absolute price move and volume against its recent average"""
+    return ranks(np.abs(change_percent)) + ranks(relative_volume)
+
+
+def encode_snapshot(payload):
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+
+class MarketSummaryAggregator:
+    def __init__(self, universe, indices=MARKET_INDICES, interval=SUMMARY_REFRESH_SECONDS, trending_count=TRENDING_COUNT):
+        """
+        universe: {ticker: company name} ranked for the trending list.
+        `snapshot` holds the latest encoded summary; until the first refresh
+        it has empty lists and last_updated None.
+        """
+        self.universe = dict(universe)
+        self.indices = indices
+        self.interval = interval
+        self.trending_count = trending_count
+        self.snapshot = encode_snapshot({"indices": [], "trending": [], "last_updated": None})
+        self.refreshed_at = None
+        # Called with each refresh's {symbol: history}, e.g. to append new daily bars
+        self.listeners = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _quotes(self, histories, symbol):
+        """(price, change %, volume, relative volume) from a daily history, or None"""
+        data = histories.get(symbol)
+        if data is None or len(data) < 2:
+            return None
+        closes = data["Close"].to_numpy(dtype=float)
+        volumes = data["Volume"].to_numpy(dtype=float) if "Volume" in data else np.zeros(len(closes))
+        average_volume = volumes[-VOLUME_LOOKBACK_DAYS - 1:-1].mean()
+        return (
+            closes[-1],
+            (closes[-1] - closes[-2]) / closes[-2] * 100 if closes[-2] else 0.0,
+            volumes[-1],
+            volumes[-1] / average_volume if average_volume > 0 else 1.0
+        )
+
+    def build(self, histories):
+        """Summary payload from {symbol: daily history}"""
+        indices = []
+        for index in self.indices:
+            quote = self._quotes(histories, index["source"])
+            if quote is not None:
+                indices.append({"name": index["name"], "symbol": index["symbol"],
+                                "price": round(quote[0], 2), "change": round(quote[1], 2)})
+
+        tickers, rows = [], []
+        for ticker in self.universe:
+            quote = self._quotes(histories, ticker)
+            if quote is not None:
+                tickers.append(ticker)
+                rows.append(quote)
+
+        trending = []
+        if rows:
+            table = np.asarray(rows)
+            scores = trending_scores(table[:, 1], table[:, 3])
+            count = min(self.trending_count, len(tickers))
+            top = np.argpartition(-scores, count - 1)[:count]
+            for i in top[np.argsort(-scores[top])]:
+                trending.append({
+                    "name": self.universe[tickers[i]],
+                    "symbol": tickers[i],
+                    "price": round(float(table[i, 0]), 2),
+                    "change": round(float(table[i, 1]), 2),
+                    "volume": int(table[i, 2]),
+                    "relative_volume": round(float(table[i, 3]), 2)
+                })
+
+        return {
+            "indices": indices,
+            "trending": trending,
+            "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+
+    def refresh(self):
+        """Fetch every index and universe ticker in one call and publish a new snapshot"""
+        start = time.perf_counter()
+        symbols = [index["source"] for index in self.indices] + list(self.universe)
+        try:
+            histories = get_provider().histories(symbols, period="2mo")
+            payload = self.build(histories)
+        except Exception as e:
+            logger.error(f"Market summary refresh failed, keeping the previous snapshot: {e}")
+            return False
+
+        self.snapshot = encode_snapshot(payload)
+        self.refreshed_at = time.time()
+        for listener in self.listeners:
+            try:
+                listener(histories)
+            except Exception as e:
+                logger.error(f"Market summary listener failed: {e}")
+        logger.info(f"Refreshed market summary for {len(symbols)} symbols in {time.perf_counter() - start:.2f}s")
+        return True
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="market-summary", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
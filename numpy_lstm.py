@@ -0,0 +1,297 @@
+import os
+import sys
+import glob
+import json
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# ================== NumPy LSTM Inference ==================
+# Serving only needs a forward pass of a small LSTM/Dense stack, so weights
+# are exported once to models/<TICKER>_weights.npz and evaluated here without
+# importing TensorFlow. Keras gate order is kept: input, forget, cell, output.
+WEIGHTS_SUFFIX = "_weights.npz"
+
+
+def _sigmoid(x):
+    return 0.5 * (1.0 + np.tanh(0.5 * x))
+
+
+def _hard_sigmoid(x):
+    return np.clip(x / 6.0 + 0.5, 0.0, 1.0)
+
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0.0),
+    "tanh": np.tanh,
+    "sigmoid": _sigmoid,
+    "hard_sigmoid": _hard_sigmoid
+}
+
+
+def weights_path(ticker, model_dir="models"):
+    return os.path.join(model_dir, f"{ticker}{WEIGHTS_SUFFIX}")
+
+
+def _activation_name(activation):
+    name = activation if isinstance(activation, str) else activation.__name__
+    if name not in ACTIVATIONS:
+        raise ValueError(f"Unsupported activation {name}")
+    return name
+
+
+def extract_layers(model):
+    """Layer specs and weight arrays from a Keras Sequential LSTM/Dense model"""
+    specs, arrays = [], {}
+    for layer in model.layers:
+        kind = layer.__class__.__name__
+        key = f"layer{len(specs)}"
+
+        if kind == "LSTM":
+            if layer.go_backwards or layer.stateful:
+                raise ValueError(f"Unsupported LSTM configuration in {layer.name}")
+            weights = layer.get_weights()
+            units = layer.units
+            arrays[f"{key}_kernel"] = weights[0]
+            arrays[f"{key}_recurrent"] = weights[1]
+            arrays[f"{key}_bias"] = weights[2] if layer.use_bias else np.zeros(4 * units, dtype=np.float32)
+            specs.append({
+                "type": "lstm",
+                "units": units,
+                "activation": _activation_name(layer.activation),
+                "recurrent_activation": _activation_name(layer.recurrent_activation),
+                "return_sequences": bool(layer.return_sequences)
+            })
+        elif kind == "Dense":
+            weights = layer.get_weights()
+            arrays[f"{key}_kernel"] = weights[0]
+            arrays[f"{key}_bias"] = weights[1] if layer.use_bias else np.zeros(layer.units, dtype=np.float32)
+            specs.append({"type": "dense", "units": layer.units, "activation": _activation_name(layer.activation)})
+        elif kind == "Dropout":
+            specs.append({"type": "dropout", "rate": float(layer.rate)})
+        elif kind == "InputLayer":
+            continue
+        else:
+            raise ValueError(f"Unsupported layer type {kind}")
+
+    return specs, arrays
+
+
+def export_weights(model, ticker, model_dir="models"):
+    """Dump a Keras model's LSTM/Dense weights to models/<TICKER>_weights.npz"""
+    specs, arrays = extract_layers(model)
+    config = {"input_shape": list(model.input_shape[1:]), "layers": specs}
+    path = weights_path(ticker, model_dir)
+    np.savez(path, config=json.dumps(config), **{k: np.asarray(v, dtype=np.float32) for k, v in arrays.items()})
+    logger.info(f"Exported NumPy weights for {ticker}")
+    return path
+
+
+class NumpyLSTMModel:
+    def __init__(self, config, arrays, stacked=False):
+        """
+        Vectorized forward pass over exported LSTM/Dense weights
+
+        Mirrors the Keras call interface (input_shape, output_shape,
+        __call__(x, training)) so forecasting and MC dropout run on it
+        unchanged. When `stacked` is set every weight array has a leading
+        ticker axis and inputs are (tickers, batch, look_back, features), so
+        several tickers' models are evaluated in the same matmuls.
+        """
+        self.config = config
+        self.arrays = arrays
+        self.stacked = stacked
+        self.input_shape = (None,) + tuple(config["input_shape"])
+        self.output_shape = (None, self._output_units())
+        self.mc_dropout = any(spec["type"] == "dropout" and spec["rate"] > 0 for spec in config["layers"])
+        self._rng = np.random.default_rng()
+
+    def _output_units(self):
+        for spec in reversed(self.config["layers"]):
+            if spec["type"] in ("lstm", "dense"):
+                return spec["units"]
+        return self.config["input_shape"][-1]
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            config = json.loads(str(data["config"]))
+            arrays = {key: data[key] for key in data.files if key != "config"}
+        return cls(config, arrays)
+
+    def _bias(self, bias, ndim):
+        """Reshape a (..., units) bias to broadcast against an ndim activation"""
+        lead = bias.shape[:-1]
+        return bias.reshape(lead + (1,) * (ndim - 1 - len(lead)) + bias.shape[-1:])
+
+    def _project(self, x, kernel):
+        """x @ kernel over every leading batch/time axis, per ticker when stacked"""
+        lead = x.shape[:1] if self.stacked else ()
+        flat = x.reshape(lead + (-1, x.shape[-1]))
+        return np.matmul(flat, kernel).reshape(x.shape[:-1] + kernel.shape[-1:])
+
+    def _lstm(self, x, key, spec):
+        units = spec["units"]
+        activation = ACTIVATIONS[spec["activation"]]
+        recurrent_activation = ACTIVATIONS[spec["recurrent_activation"]]
+        recurrent = self.arrays[f"{key}_recurrent"]
+
+        # Input projections for every timestep in one matmul: (..., batch, time, 4 * units)
+        projected = self._project(x, self.arrays[f"{key}_kernel"])
+        projected += self._bias(self.arrays[f"{key}_bias"], projected.ndim)
+
+        state_shape = x.shape[:-2] + (units,)
+        h = np.zeros(state_shape, dtype=np.float32)
+        c = np.zeros(state_shape, dtype=np.float32)
+        outputs = [] if spec["return_sequences"] else None
+
+        for t in range(x.shape[-2]):
+            z = projected[..., t, :] + np.matmul(h, recurrent)
+            i = recurrent_activation(z[..., :units])
+            f = recurrent_activation(z[..., units:2 * units])
+            g = activation(z[..., 2 * units:3 * units])
+            o = recurrent_activation(z[..., 3 * units:])
+            c = f * c + i * g
+            h = o * activation(c)
+            if outputs is not None:
+                outputs.append(h)
+
+        return np.stack(outputs, axis=-2) if outputs is not None else h
+
+    def __call__(self, x, training=False):
+        x = np.asarray(x, dtype=np.float32)
+        for index, spec in enumerate(self.config["layers"]):
+            key = f"layer{index}"
+            if spec["type"] == "lstm":
+                x = self._lstm(x, key, spec)
+            elif spec["type"] == "dense":
+                x = self._project(x, self.arrays[f"{key}_kernel"])
+                x = ACTIVATIONS[spec["activation"]](x + self._bias(self.arrays[f"{key}_bias"], x.ndim))
+            elif spec["type"] == "dropout" and training and spec["rate"] > 0:
+                keep = 1.0 - spec["rate"]
+                x = x * (self._rng.random(x.shape) < keep) / keep
+        return x.astype(np.float32, copy=False)
+
+
+def load_numpy_models(model_dir="models"):
+    """Load every exported models/<TICKER>_weights.npz"""
+    numpy_models = {}
+    for file in glob.glob(os.path.join(model_dir, f"*{WEIGHTS_SUFFIX}")):
+        ticker = os.path.basename(file)[:-len(WEIGHTS_SUFFIX)]
+        try:
+            numpy_models[ticker] = NumpyLSTMModel.load(file)
+        except Exception as e:
+            logger.error(f"Error loading NumPy weights {file}: {e}")
+    return numpy_models
+
+
+class ModelBank:
+    def __init__(self, numpy_models):
+        """
+        Per-ticker NumPy models grouped by architecture for cross-ticker batches
+
+        Tickers sharing a layer config are stacked once into NumpyLSTMModels
+        with a leading ticker axis; forward() then runs any subset of tickers
+        through a single vectorized pass per architecture group.
+        """
+        self.models = numpy_models
+        self._groups = {}
+        self._position = {}
+
+        by_config = {}
+        for ticker, model in numpy_models.items():
+            signature = json.dumps(model.config, sort_keys=True)
+            by_config.setdefault(signature, []).append(ticker)
+
+        for signature, tickers in by_config.items():
+            first = numpy_models[tickers[0]]
+            arrays = {key: np.stack([numpy_models[t].arrays[key] for t in tickers]) for key in first.arrays}
+            self._groups[signature] = (tickers, NumpyLSTMModel(first.config, arrays, stacked=True))
+            for position, ticker in enumerate(tickers):
+                self._position[ticker] = (signature, position)
+
+    def __contains__(self, ticker):
+        return ticker in self._position
+
+    def forward(self, tickers, x, training=False):
+        """
+        Evaluate each ticker's model on its own windows
+
+        x: (len(tickers), batch, look_back, features). Returns
+        (len(tickers), batch, outputs) when every ticker shares an output width.
+        """
+        x = np.asarray(x, dtype=np.float32)
+        outputs = [None] * len(tickers)
+
+        requested = {}
+        for row, ticker in enumerate(tickers):
+            signature, position = self._position[ticker]
+            requested.setdefault(signature, []).append((row, position))
+
+        for signature, members in requested.items():
+            group_tickers, stacked = self._groups[signature]
+            rows = [row for row, _ in members]
+            positions = [position for _, position in members]
+            if positions == list(range(len(group_tickers))):
+                model = stacked
+            else:
+                arrays = {key: value[positions] for key, value in stacked.arrays.items()}
+                model = NumpyLSTMModel(stacked.config, arrays, stacked=True)
+            result = model(x[rows], training)
+            for row, out in zip(rows, result):
+                outputs[row] = out
+
+        return np.stack(outputs)
+
+    def select(self, tickers):
+        return BankSelection(self, tickers)
+
+
+class BankSelection:
+    def __init__(self, bank, tickers):
+        """
+        Model-like view over a ModelBank where batch row i runs through
+        tickers[i]'s model, so forecast_batch serves many tickers in one rollout
+        """
+        shapes = {(bank.models[t].input_shape, bank.models[t].output_shape) for t in tickers}
+        if len(shapes) != 1:
+            raise ValueError(f"Tickers {list(tickers)} do not share one input/output shape")
+        self.bank = bank
+        self.tickers = list(tickers)
+        self.input_shape, self.output_shape = shapes.pop()
+        self.mc_dropout = False
+
+    def __call__(self, x, training=False):
+        return self.bank.forward(self.tickers, np.asarray(x)[:, None], training)[:, 0]
+
+
+def main():
+    """Export weights for every Keras model and check the NumPy forward pass against it"""
+    import tensorflow as tf
+
+    model_files = glob.glob(os.path.join("models", "*.keras")) + glob.glob(os.path.join("models", "*.h5"))
+    rng = np.random.default_rng(0)
+    worst = 0.0
+
+    for file in sorted(model_files):
+        ticker = os.path.basename(file).split("_")[0]
+        try:
+            model = tf.keras.models.load_model(file)
+            export_weights(model, ticker)
+            numpy_model = NumpyLSTMModel.load(weights_path(ticker))
+
+            x = rng.random((16,) + tuple(model.input_shape[1:]), dtype=np.float32)
+            diff = float(np.abs(np.asarray(model(x, training=False)) - numpy_model(x)).max())
+            worst = max(worst, diff)
+            logger.info(f"{ticker}: max abs difference vs Keras {diff:.2e}")
+        except Exception as e:
+            logger.error(f"Error exporting {file}: {e}")
+
+    logger.info(f"Exported {len(model_files)} models, worst difference {worst:.2e}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s', stream=sys.stdout)
+    main()
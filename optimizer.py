@@ -0,0 +1,146 @@
+import os
+import numpy as np
+
+# ================== Portfolio Optimizer ==================
+# Long-only, fully invested allocations over a candidate ticker set from an
+# expected daily return vector (the models' next-day forecasts) and the
+# daily covariance cached by risk.CovarianceCache.
+#   mean_variance  maximize mu'w - (risk_aversion / 2) w'Cw on the simplex by
+#                  accelerated projected gradient (FISTA with adaptive
+#                  restart); the step is 1 / L for a Gershgorin bound L on the
+#                  largest eigenvalue, so no eigendecomposition is needed
+#   risk_parity    weights whose risk contributions w_i (Cw)_i / w'Cw match a
+#                  budget (equal by default): Newton's method on the convex
+#                  0.5 y'Cy - b'log(y), then w = y / sum(y)
+# Both are a handful of (n x n) matvecs or solves, so a few hundred assets
+# solve in milliseconds.
+# A one-day model forecast is a far noisier estimate than the mean daily
+# return over the covariance window, and often 10-100x larger, so raw
+# forecasts would swamp the historical means and the variance term and pin
+# the solution to a corner. blended_returns puts both on one scale:
+#   prior  historical means shrunk toward the minimum-variance portfolio's
+#          mean (Bayes-Stein), so estimation noise in them is damped too
+#   alpha  forecasts as cross-sectional z-scores (clipped to +-FORECAST_CLIP),
+#          scaled by FORECAST_IC * each ticker's daily volatility (Grinold's
+#          alpha = IC x volatility x score), whatever the models' raw scale
+DEFAULT_RISK_AVERSION = 3.0
+FORECAST_IC = float(os.getenv("VELORA_FORECAST_IC", "0.02"))
+FORECAST_CLIP = 3.0
+OPTIMIZER_METHODS = ("mean_variance", "risk_parity")
+MAX_OPTIMIZER_TICKERS = 500
+TRADING_DAYS = 252
+
+
+def project_simplex(v):
+    """Euclidean projection of v onto {w >= 0, sum(w) == 1}"""
+    u = np.sort(v)[::-1]
+    cumulative = np.cumsum(u) - 1
+    rho = np.flatnonzero(u * np.arange(1, len(v) + 1) > cumulative)[-1]
+    return np.maximum(v - cumulative[rho] / (rho + 1), 0)
+
+
+def eigenvalue_bound(matrix):
+    """Upper bound on the largest eigenvalue of a symmetric PSD matrix (min of trace and max absolute row sum)"""
+    return float(min(np.trace(matrix), np.abs(matrix).sum(axis=1).max()))
+
+
+def mean_variance(mu, cov, risk_aversion=DEFAULT_RISK_AVERSION, max_iter=5000, tol=1e-9):
+    """Long-only mean-variance weights; returns (weights, iterations)"""
+    mu = np.asarray(mu, dtype=np.float64)
+    cov = np.asarray(cov, dtype=np.float64)
+    step = 1 / max(risk_aversion * eigenvalue_bound(cov), 1e-12)
+    w = y = np.full(len(mu), 1 / len(mu))
+    t = 1.0
+    for iteration in range(1, max_iter + 1):
+        w_next = project_simplex(y - step * (risk_aversion * (cov @ y) - mu))
+        delta = w_next - w
+        if np.abs(delta).max() < tol:
+            return w_next, iteration
+        # Restart the momentum when it points uphill
+        if delta @ (y - w_next) > 0:
+            t = 1.0
+        t_next = (1 + np.sqrt(1 + 4 * t * t)) / 2
+        y = w_next + (t - 1) / t_next * delta
+        w, t = w_next, t_next
+    return w, max_iter
+
+
+def risk_parity(cov, budget=None, max_iter=100, tol=1e-12):
+    """Long-only weights with risk contributions proportional to budget (equal if None); returns (weights, iterations)"""
+    cov = np.asarray(cov, dtype=np.float64)
+    n = len(cov)
+    budget = np.full(n, 1 / n) if budget is None else np.asarray(budget, dtype=np.float64) / np.sum(budget)
+
+    def objective(y):
+        return 0.5 * y @ cov @ y - budget @ np.log(y)
+
+    # Exact for uncorrelated assets
+    y = np.sqrt(budget / np.maximum(np.diag(cov), 1e-12))
+    value = objective(y)
+    for iteration in range(1, max_iter + 1):
+        gradient = cov @ y - budget / y
+        direction = np.linalg.solve(cov + np.diag(budget / (y * y)), gradient)
+        decrement = gradient @ direction
+        if decrement < tol:
+            break
+        # Backtrack to stay positive and decrease the objective
+        alpha = 1.0
+        while np.any(y - alpha * direction <= 0) or objective(y - alpha * direction) > value - 0.25 * alpha * decrement:
+            alpha /= 2
+            if alpha < 1e-10:
+                return y / y.sum(), iteration
+        y = y - alpha * direction
+        value = objective(y)
+    return y / y.sum(), iteration
+
+
+def shrunk_means(mean, cov, observations):
+    """Bayes-Stein: historical means shrunk toward the minimum-variance portfolio's mean"""
+    n = len(mean)
+    inverse_ones = np.linalg.solve(cov, np.ones(n))
+    grand = inverse_ones @ mean / inverse_ones.sum()
+    spread = mean - grand
+    intensity = (n + 2) / ((n + 2) + observations * (spread @ np.linalg.solve(cov, spread)))
+    return (1 - intensity) * mean + intensity * grand
+
+
+def blended_returns(forecast, mean, cov, observations, ic=FORECAST_IC):
+    """
+    Daily expected returns: shrunk historical means plus IC-scaled forecast alphas
+
+    forecast: daily log-return forecasts, NaN where a ticker has none (its
+    alpha is 0). observations: the number of returns behind mean and cov.
+    """
+    forecast = np.asarray(forecast, dtype=np.float64)
+    prior = shrunk_means(mean, cov, observations)
+    known = np.isfinite(forecast)
+    scores = np.zeros(len(forecast))
+    if known.sum() > 1 and forecast[known].std() > 0:
+        scores[known] = np.clip((forecast[known] - forecast[known].mean()) / forecast[known].std(), -FORECAST_CLIP, FORECAST_CLIP)
+    return prior + ic * np.sqrt(np.diag(cov)) * scores
+
+
+def risk_contributions(weights, cov):
+    """Share of portfolio variance from each holding (sums to 1)"""
+    marginal = cov @ weights
+    return weights * marginal / (weights @ marginal)
+
+
+def allocation_summary(tickers, weights, mu, cov, prices=None, value=0.0):
+    """JSON-ready allocation: weights, expected daily return, annualized volatility, risk shares and optional dollar amounts"""
+    contributions = np.nan_to_num(risk_contributions(weights, cov))
+    rows = []
+    for i, ticker in enumerate(tickers):
+        row = {"ticker": ticker, "weight": round(float(weights[i]), 4),
+               "expected_daily_return": round(float(mu[i]), 6),
+               "risk_contribution": round(float(contributions[i]), 4) + 0.0}
+        if value and prices is not None:
+            row["amount"] = round(float(value * weights[i]), 2)
+            row["shares"] = round(float(value * weights[i] / prices[i]), 4)
+        rows.append(row)
+    rows.sort(key=lambda row: -row["weight"])
+    return {
+        "expected_daily_return": round(float(weights @ mu), 6),
+        "volatility": round(float(np.sqrt(weights @ cov @ weights * TRADING_DAYS)), 4),
+        "weights": rows
+    }
@@ -0,0 +1,5 @@
+-- CreateIndex
+CREATE INDEX "Watchlist_userId_idx" ON "Watchlist"("userId");
+
+-- CreateIndex
+CREATE INDEX "Portfolio_userId_idx" ON "Portfolio"("userId");
@@ -0,0 +1,19 @@
+-- CreateTable
+CREATE TABLE "Alert" (
+    "id" TEXT NOT NULL PRIMARY KEY,
+    "userId" TEXT NOT NULL,
+    "ticker" TEXT NOT NULL,
+    "kind" TEXT NOT NULL,
+    "threshold" REAL NOT NULL,
+    "repeat" BOOLEAN NOT NULL DEFAULT false,
+    "active" BOOLEAN NOT NULL DEFAULT true,
+    "createdAt" DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "lastTriggeredAt" DATETIME,
+    CONSTRAINT "Alert_userId_fkey" FOREIGN KEY ("userId") REFERENCES "User" ("id") ON DELETE RESTRICT ON UPDATE CASCADE
+);
+
+-- CreateIndex
+CREATE INDEX "Alert_userId_idx" ON "Alert"("userId");
+
+-- CreateIndex
+CREATE INDEX "Alert_active_idx" ON "Alert"("active");
@@ -0,0 +1,270 @@
+import re
+import gzip
+import json
+import base64
+import hashlib
+import logging
+import numpy as np
+from fastapi import Request
+from fastapi.responses import Response
+from starlette.datastructures import Headers, MutableHeaders
+
+logger = logging.getLogger(__name__)
+
+# Attempt to import optional encoders with graceful fallback
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    logger.warning("msgpack not available. MessagePack responses are disabled.")
+    MSGPACK_AVAILABLE = False
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    logger.warning("brotli not available. Falling back to gzip compression.")
+    BROTLI_AVAILABLE = False
+
+# ================== Content Negotiation ==================
+JSON_MEDIA_TYPE = "application/json"
+COLUMNAR_MEDIA_TYPE = "application/vnd.velora.columnar+json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+DAY_KEY = re.compile(r"^day\d+$")
+
+
+def parse_quality_list(header):
+    """Parse an Accept / Accept-Encoding header into {token: q}"""
+    accepted = {}
+    for part in (header or "").split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        match = re.search(r"q=([0-9.]+)", params)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                q = 0.0
+        accepted[token] = q
+    return accepted
+
+
+def negotiate_media_type(accept):
+    """Pick the response encoding for an Accept header; JSON unless a compact type is preferred"""
+    accepted = parse_quality_list(accept)
+    offers = [COLUMNAR_MEDIA_TYPE, JSON_MEDIA_TYPE]
+    if MSGPACK_AVAILABLE:
+        offers.insert(0, MSGPACK_MEDIA_TYPE)
+
+    best, best_q = JSON_MEDIA_TYPE, 0.0
+    for offer in offers:
+        q = accepted.get(offer, 0.0)
+        if q > best_q:
+            best, best_q = offer, q
+    return best
+
+
+def float32_vector(values):
+    """Float32 column; missing values become NaN"""
+    return np.array([np.nan if v is None else v for v in values], dtype='<f4')
+
+
+def epoch_days(dates):
+    return np.array(dates, dtype='datetime64[D]').astype(np.int64)
+
+
+def compact_prediction(result):
+    """
+    Columnar form of a prediction payload
+
+    `historical` and the per-day forecast become a start day (days since
+    1970-01-01), integer day offsets and float32 vectors; the redundant dayN
+    objects are dropped since `forecast` carries the same values.
+    """
+    compact = {
+        key: value for key, value in result.items()
+        if key not in ("historical", "predictions") and not DAY_KEY.match(key)
+    }
+
+    historical = result.get("historical", [])
+    if historical:
+        days = epoch_days([item["date"] for item in historical])
+        compact["historical"] = {
+            "start_day": int(days[0]),
+            "offsets": (days - days[0]).tolist(),
+            "price": float32_vector([item["price"] for item in historical])
+        }
+
+    predictions = result.get("predictions", [])
+    if predictions:
+        days = epoch_days([item["date"] for item in predictions])
+        compact["forecast"] = {
+            "start_day": int(days[0]),
+            "offsets": (days - days[0]).tolist(),
+            "recommendation": [item["recommendation"] for item in predictions]
+        }
+        for column in ("price", "change_percent", "confidence", "lower", "upper"):
+            compact["forecast"][column] = float32_vector([item.get(column) for item in predictions])
+
+    return compact
+
+
+def _columnar_default(obj):
+    if isinstance(obj, np.ndarray):
+        return base64.b64encode(obj.astype('<f4').tobytes()).decode('ascii')
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _msgpack_default(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.astype('<f4').tobytes()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not MessagePack serializable")
+
+
+def encode_payload(payload, media_type, compact_fn=None):
+    """Serialize a payload for a negotiated media type"""
+    if media_type == JSON_MEDIA_TYPE:
+        return json.dumps(payload, default=str).encode('utf-8')
+
+    compact = compact_fn(payload) if compact_fn else payload
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return msgpack.packb(compact, default=_msgpack_default, use_bin_type=True)
+    return json.dumps(compact, default=_columnar_default, separators=(',', ':')).encode('utf-8')
+
+
+def payload_etag(payload):
+    """Weak ETag over the canonical payload, shared by every encoding of it"""
+    canonical = json.dumps(payload, sort_keys=True, default=str).encode('utf-8')
+    return f'W/"{hashlib.blake2b(canonical, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: ignore the W/ prefix on both sides
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag.removeprefix("W/") in candidates
+
+
+def encoded_response(request: Request, payload, compact_fn=None):
+    """
+    Negotiated, ETag-tagged response for a JSON-able payload
+
+    Returns 304 Not Modified when If-None-Match already names the payload.
+    """
+    media_type = negotiate_media_type(request.headers.get("accept"))
+    etag = payload_etag(payload)
+    headers = {"ETag": etag, "Vary": "Accept"}
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    return Response(
+        content=encode_payload(payload, media_type, compact_fn),
+        media_type=media_type,
+        headers=headers
+    )
+
+
+# ================== Compression Middleware ==================
+COMPRESSIBLE_TYPES = ("application/json", "application/vnd.velora", "application/msgpack",
+                      "application/javascript", "text/")
+
+
+def choose_encoding(accept_encoding):
+    """Prefer brotli, then gzip, honoring q=0 refusals"""
+    accepted = parse_quality_list(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    if BROTLI_AVAILABLE and accepted.get("br", wildcard) > 0:
+        return "br"
+    if accepted.get("gzip", wildcard) > 0:
+        return "gzip"
+    return None
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size=1024, gzip_level=6, brotli_quality=4):
+        """
+        ASGI middleware that gzip/brotli-encodes compressible responses
+
+        Bodies are buffered and only encoded once they reach minimum_size;
+        already-encoded and non-compressible responses pass through untouched.
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        chunks = []
+        passthrough = False
+
+        async def buffered_send(message):
+            nonlocal start_message, passthrough
+
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                if "content-encoding" in headers or not content_type.startswith(COMPRESSIBLE_TYPES):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start_message = message
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            await self.send_buffered(send, start_message, b"".join(chunks), encoding)
+
+        await self.app(scope, receive, buffered_send)
+
+    def compress(self, body, encoding):
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def send_buffered(self, send, start_message, body, encoding):
+        headers = MutableHeaders(raw=start_message["headers"])
+
+        if len(body) >= self.minimum_size:
+            body = self.compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers.add_vary_header("Accept-Encoding")
+            # The entity changed, so a strong validator no longer applies
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = f"W/{etag}"
+        headers["Content-Length"] = str(len(body))
+
+        await send(start_message)
+        await send({"type": "http.response.body", "body": body})
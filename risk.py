@@ -0,0 +1,187 @@
+import os
+import logging
+import threading
+import collections
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# ================== Portfolio Risk ==================
+# Risk is computed from the daily log returns the correlation service keeps
+# for the whole store universe. For a set of holdings, the mean vector,
+# covariance matrix (one matmul over the centred returns), its Cholesky
+# factor and every holding's beta against the benchmark are cached per
+# (universe, window, benchmark) and recomputed only when the service's returns
+# have changed (a new daily bar, or today's bar re-priced). On top of them:
+#   historical VaR   quantile of the P&L the current holdings would have had
+#                    over each (overlapping) horizon in the window
+#   Monte Carlo VaR  RISK_SCENARIOS correlated normal return draws, made as a
+#                    single (scenarios x holdings) matmul with the factor
+#   volatility, beta and drawdowns of the current shares held through the window
+# Returns are log returns; P&L compounds them per holding, so multi-day
+# horizons are not a square-root-of-time scaling.
+DEFAULT_RISK_WINDOW = 252
+RISK_CONFIDENCE = 0.95
+RISK_SCENARIOS = int(os.getenv("VELORA_RISK_SCENARIOS", "10000"))
+MAX_RISK_SCENARIOS = 100000
+MAX_RISK_HORIZON = 30
+RISK_BENCHMARK = os.getenv("VELORA_RISK_BENCHMARK", "SPY")
+COVARIANCE_CACHE_SIZE = 128
+TRADING_DAYS = 252
+
+
+def covariance_factor(cov):
+    """Lower-triangular L with L @ L.T == cov; falls back to an eigen square root for singular matrices"""
+    try:
+        return np.linalg.cholesky(cov)
+    except np.linalg.LinAlgError:
+        values, vectors = np.linalg.eigh(cov)
+        return vectors * np.sqrt(np.clip(values, 0, None))
+
+
+def drawdowns(path):
+    """Drawdown from the running peak along axis 0 of a value path (fractions, <= 0)"""
+    return path / np.maximum.accumulate(path, axis=0) - 1
+
+
+class CovarianceCache:
+    def __init__(self, service, benchmark=RISK_BENCHMARK, max_entries=COVARIANCE_CACHE_SIZE):
+        """
+        service: the CorrelationService whose returns are used. When benchmark
+        is not in its universe, betas are against the equal-weighted universe.
+        """
+        self.service = service
+        self.benchmark = benchmark
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def benchmark_name(self):
+        return self.benchmark if self.benchmark in self.service.column else "universe (equal weight)"
+
+    def benchmark_returns(self, window):
+        if self.benchmark in self.service.column:
+            block, covered, _ = self.service.window_returns(window, [self.service.column[self.benchmark]])
+            if covered[0]:
+                return block[:, 0]
+        block, covered, _ = self.service.window_returns(window)
+        return block[:, covered].mean(axis=1)
+
+    def get(self, tickers, window=DEFAULT_RISK_WINDOW):
+        """
+        Returns, mean, covariance, factor and betas for sorted(tickers) over
+        the last `window` days. Raises ValueError for unknown tickers, a bad
+        window, or tickers whose history does not cover the window.
+        """
+        tickers = tuple(sorted(tickers))
+        missing = [t for t in tickers if t not in self.service.column]
+        if missing:
+            raise ValueError(f"No price history for {', '.join(missing)}")
+
+        key = (tickers, window)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry["version"] == self.service.version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        version = self.service.version
+        returns, covered, day = self.service.window_returns(window, [self.service.column[t] for t in tickers])
+        if not covered.all():
+            short = [t for t, ok in zip(tickers, covered) if not ok]
+            raise ValueError(f"Less than {window} days of history for {', '.join(short)}")
+
+        mean = returns.mean(axis=0)
+        centered = returns - mean
+        cov = centered.T @ centered / (window - 1)
+        market = self.benchmark_returns(window)
+        market = market - market.mean()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            betas = centered.T @ market / (market @ market)
+
+        entry = {"tickers": tickers, "day": day, "version": version, "returns": returns, "mean": mean, "cov": cov,
+                 "factor": covariance_factor(cov), "betas": np.nan_to_num(betas)}
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    @property
+    def stats(self):
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def simulate_returns(entry, scenarios=RISK_SCENARIOS, horizon=1, rng=None):
+    """(scenarios, holdings) correlated normal log returns over `horizon` days"""
+    rng = np.random.default_rng() if rng is None else rng
+    z = rng.standard_normal((scenarios, len(entry["mean"])))
+    return horizon * entry["mean"] + np.sqrt(horizon) * (z @ entry["factor"].T)
+
+
+def value_at_risk(pnl, confidence):
+    """(VaR, expected shortfall) as positive losses from a P&L sample"""
+    var = -np.quantile(pnl, 1 - confidence)
+    tail = pnl[pnl <= -var]
+    return float(var), float(-tail.mean()) if len(tail) else float(var)
+
+
+def portfolio_risk(entry, values, confidence=RISK_CONFIDENCE, horizon=1, scenarios=RISK_SCENARIOS, rng=None):
+    """
+    Risk of holding `values` (current market value per entry ticker)
+
+    Returns JSON-ready portfolio metrics and a per-holding breakdown.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    total = values.sum()
+    weights = values / total
+    returns, cov = entry["returns"], entry["cov"]
+
+    # Historical: overlapping horizon-day log returns from one cumulative sum
+    cumulative = np.vstack([np.zeros(len(values)), np.cumsum(returns, axis=0)])
+    historical = np.expm1(cumulative[horizon:] - cumulative[:-horizon]) @ values
+    simulated = np.expm1(simulate_returns(entry, scenarios, horizon, rng)) @ values
+    historical_var, historical_es = value_at_risk(historical, confidence)
+    mc_var, mc_es = value_at_risk(simulated, confidence)
+
+    # Current shares held through the window: each holding's value path ends at today's value
+    relative = np.exp(cumulative - cumulative[-1])
+    path_drawdowns = drawdowns(relative @ values)
+    holding_drawdowns = drawdowns(relative).min(axis=0)
+
+    marginal = cov @ weights
+    variance = float(weights @ marginal)
+    holding_volatility = np.sqrt(np.diag(cov) * TRADING_DAYS)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        contributions = np.nan_to_num(weights * marginal / variance)
+
+    return {
+        "value": round(float(total), 2),
+        "confidence": confidence,
+        "horizon_days": horizon,
+        "window_days": len(returns),
+        "scenarios": scenarios,
+        "var": {
+            "historical": round(historical_var, 2),
+            "monte_carlo": round(mc_var, 2),
+            "historical_expected_shortfall": round(historical_es, 2),
+            "monte_carlo_expected_shortfall": round(mc_es, 2)
+        },
+        "volatility": round(float(np.sqrt(variance * TRADING_DAYS)), 4),
+        "beta": round(float(weights @ entry["betas"]), 4),
+        "max_drawdown": round(float(path_drawdowns.min()), 4),
+        "current_drawdown": round(float(path_drawdowns[-1]), 4),
+        "holdings": [
+            {"ticker": ticker, "value": round(float(value), 2), "weight": round(float(weight), 4),
+             "volatility": round(float(vol), 4), "beta": round(float(beta), 4),
+             "max_drawdown": round(float(dd), 4), "risk_contribution": round(float(share), 4)}
+            for ticker, value, weight, vol, beta, dd, share in zip(
+                entry["tickers"], values, weights, holding_volatility, entry["betas"], holding_drawdowns, contributions)
+        ]
+    }
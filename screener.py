@@ -0,0 +1,163 @@
+import os
+import re
+import time
+import logging
+import threading
+import operator
+import numpy as np
+from indicators import percent_changes, volatility, sma, rsi
+
+logger = logging.getLogger(__name__)
+
+# ================== Stock Screener ==================
+# The universe is kept as a columnar snapshot: one float64 array per field,
+# aligned on a ticker array, with NaN where a value is unknown (e.g. no model
+# for the ticker). A filter such as "predicted_change > 2 and rsi < 30" is
+# parsed once into (column, operator, value) clauses and evaluated as NumPy
+# boolean masks over the whole universe, then the matches are sorted by one
+# field and cut to the limit with argpartition. NaN never matches a clause.
+SCREENER_TTL = float(os.getenv("VELORA_SCREENER_TTL", "300"))
+SCREENER_LOOK_BACK = 60
+DEFAULT_SCREENER_LIMIT = 25
+MAX_SCREENER_LIMIT = 500
+
+FIELDS = {
+    "price": "Latest close",
+    "change": "Day-over-day change (%)",
+    "volume": "Latest volume",
+    "sma_20": "20-day simple moving average",
+    "sma_50": "50-day simple moving average",
+    "price_vs_sma_50": "Close relative to the 50-day average (%)",
+    "rsi": "14-day RSI",
+    "volatility": "Mean absolute daily move over 20 days (%)",
+    "momentum": "5-day change (%)",
+    "sentiment": "Sentiment score (0-1)",
+    "predicted_price": "Model's next-day close",
+    "predicted_change": "Model's next-day change (%)"
+}
+
+OPERATORS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le, "==": operator.eq, "!=": operator.ne}
+CLAUSE_PATTERN = re.compile(r"^\s*([a-z_0-9]+)\s*(>=|<=|==|!=|>|<)\s*(-?\d+(?:\.\d+)?)\s*$")
+CLAUSE_SEPARATOR = re.compile(r"\s+and\s+|,", re.IGNORECASE)
+
+
+def parse_filter(expression):
+    """'rsi < 30 and predicted_change > 2' -> [(field, op, value)]; raises ValueError"""
+    clauses = []
+    for part in CLAUSE_SEPARATOR.split(expression or ""):
+        if not part.strip():
+            continue
+        match = CLAUSE_PATTERN.match(part.lower())
+        if match is None:
+            raise ValueError(f"Cannot parse filter clause {part.strip()!r}; expected <field> <op> <number>")
+        field, op, value = match.groups()
+        if field not in FIELDS:
+            raise ValueError(f"Unknown field {field!r}; expected one of {list(FIELDS)}")
+        clauses.append((field, op, float(value)))
+    return clauses
+
+
+def parse_sort(sort):
+    """'-predicted_change' -> ('predicted_change', descending=True)"""
+    field = sort.lstrip("-+")
+    if field not in FIELDS:
+        raise ValueError(f"Unknown sort field {field!r}; expected one of {list(FIELDS)}")
+    return field, sort.startswith("-")
+
+
+def indicator_columns(closes, volumes):
+    """
+    Price and indicator columns for a (tickers, days) close matrix
+
+    Rows are right-aligned on each ticker's latest bar; shorter histories are
+    NaN-padded on the left, which leaves the affected indicators NaN.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    price = closes[:, -1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sma_50 = sma(closes, 50)
+        return {
+            "price": price,
+            "change": percent_changes(closes[:, -2:])[:, 0],
+            "volume": np.asarray(volumes, dtype=np.float64)[:, -1],
+            "sma_20": sma(closes, 20),
+            "sma_50": sma_50,
+            "price_vs_sma_50": (price / sma_50 - 1) * 100,
+            "rsi": rsi(closes),
+            "volatility": volatility(closes[:, -21:]),
+            "momentum": (price / closes[:, -6] - 1) * 100
+        }
+
+
+class ScreenerSnapshot:
+    def __init__(self, tickers, columns, built_at=None):
+        """tickers: N symbols; columns: {field: (N,) array}; missing fields are all NaN"""
+        self.tickers = np.asarray(tickers)
+        self.columns = {
+            field: np.asarray(columns[field], dtype=np.float64) if field in columns else np.full(len(self.tickers), np.nan)
+            for field in FIELDS
+        }
+        self.built_at = built_at or time.time()
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def mask(self, clauses):
+        mask = np.ones(len(self.tickers), dtype=bool)
+        for field, op, value in clauses:
+            column = self.columns[field]
+            with np.errstate(invalid='ignore'):
+                mask &= OPERATORS[op](column, value)
+            mask &= ~np.isnan(column)
+        return mask
+
+    def screen(self, clauses, sort="-predicted_change", limit=DEFAULT_SCREENER_LIMIT):
+        """(number of matches, row indices of the top `limit` matches in sort order)"""
+        matches = np.flatnonzero(self.mask(clauses))
+        field, descending = parse_sort(sort)
+        # NaN sorts last in either direction
+        keys = self.columns[field][matches]
+        keys = np.where(np.isnan(keys), np.inf, -keys if descending else keys)
+        if limit < len(matches):
+            top = np.argpartition(keys, limit - 1)[:limit]
+            top = top[np.argsort(keys[top], kind="stable")]
+        else:
+            top = np.argsort(keys, kind="stable")
+        return len(matches), matches[top]
+
+    def rows(self, indices):
+        fields = list(FIELDS)
+        values = np.round(np.stack([self.columns[f][indices] for f in fields], axis=1), 4).astype(object)
+        values[np.isnan(values.astype(np.float64))] = None
+        return [{"ticker": str(self.tickers[i]), **dict(zip(fields, row))} for i, row in zip(indices, values.tolist())]
+
+
+def store_matrix(store, tickers, column, look_back=SCREENER_LOOK_BACK):
+    """(len(tickers), look_back) matrix of a store column, right-aligned and NaN-padded"""
+    matrix = np.full((len(tickers), look_back), np.nan)
+    idx = store.column(column)
+    for row, ticker in enumerate(tickers):
+        values = np.asarray(store.series(ticker)[-look_back:, idx], dtype=np.float64)
+        if len(values):
+            matrix[row, -len(values):] = values
+    return matrix
+
+
+class ScreenerCache:
+    def __init__(self, build, ttl=SCREENER_TTL):
+        """Holds the latest snapshot from build(); rebuilt on the first request after ttl"""
+        self.build = build
+        self.ttl = ttl
+        self.snapshot = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        snapshot = self.snapshot
+        if snapshot is not None and time.time() - snapshot.built_at < self.ttl:
+            return snapshot
+        with self._lock:
+            if self.snapshot is None or time.time() - self.snapshot.built_at >= self.ttl:
+                start = time.perf_counter()
+                self.snapshot = self.build()
+                logger.info(f"Built screener snapshot for {len(self.snapshot)} tickers in {time.perf_counter() - start:.2f}s")
+            return self.snapshot
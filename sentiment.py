@@ -0,0 +1,67 @@
+import numpy as np
+from datetime import datetime, timedelta
+
+# ================== Sentiment Analysis ==================
+# Draws come from a RandomState seeded per ticker rather than the global
+# NumPy RNG: results match the original global seeding and stay consistent
+# when called concurrently from worker threads.
+def analyze_sentiment(ticker):
+    """Simple mock sentiment analysis"""
+    # Seed based on ticker for consistent results
+    rng = np.random.RandomState(sum(ord(c) for c in ticker))
+    
+    # Generate sentiment score (0-1)
+    sentiment_score = rng.beta(5, 2) if rng.rand() > 0.3 else rng.beta(2, 5)
+    
+    # Map score to sentiment label
+    if sentiment_score > 0.7:
+        sentiment = "Bullish"
+        sentiment_text = f"Market sentiment for {ticker} is very positive. Recent news and social media activity indicate strong investor confidence."
+    elif sentiment_score > 0.5:
+        sentiment = "Mildly Bullish"
+        sentiment_text = f"Market sentiment for {ticker} is cautiously optimistic. Recent coverage shows positive trends with some reservations."
+    elif sentiment_score > 0.4:
+        sentiment = "Neutral"
+        sentiment_text = f"Market sentiment for {ticker} is balanced. There is mixed news coverage without strong positive or negative signals."
+    elif sentiment_score > 0.25:
+        sentiment = "Mildly Bearish"
+        sentiment_text = f"Market sentiment for {ticker} is slightly negative. There are some concerns in recent news and social activity."
+    else:
+        sentiment = "Bearish"
+        sentiment_text = f"Market sentiment for {ticker} is negative. Recent news and social media analysis indicates significant investor concerns."
+    
+    # Generate mock news items
+    news_items = []
+    sentiment_words = {
+        "Bullish": ["gains", "growth", "outperform", "exceeds expectations", "strong results", "breakthrough", "upgrade"],
+        "Mildly Bullish": ["positive", "improving", "potential", "opportunity", "resilient", "steady growth"],
+        "Neutral": ["steady", "stable", "mixed results", "maintains", "as expected", "in line with expectations"],
+        "Mildly Bearish": ["challenges", "concerns", "slowing", "caution", "underperform", "fell short"],
+        "Bearish": ["decline", "losses", "warning", "downgrade", "risk", "sell-off", "disappointing"]
+    }
+    
+    sources = ["Bloomberg", "Financial Times", "CNBC", "Wall Street Journal", "Reuters", "Seeking Alpha", "MarketWatch"]
+    
+    # Select words based on sentiment
+    words = sentiment_words[sentiment]
+    
+    for i in range(3):
+        source = rng.choice(sources)
+        word = rng.choice(words)
+        
+        title = f"{ticker} {word} amid market {rng.choice(['volatility', 'changes', 'conditions', 'trends'])}"
+        
+        news_items.append({
+            "source": source,
+            "title": title,
+            "date": (datetime.now() - timedelta(days=i)).strftime("%Y-%m-%d"),
+            "sentiment": sentiment.lower()
+        })
+    
+    return {
+        "ticker": ticker,
+        "sentiment_score": float(sentiment_score),
+        "sentiment": sentiment,
+        "analysis": sentiment_text,
+        "news": news_items
+    }
@@ -0,0 +1,35 @@
+import { NextResponse } from 'next/server';
+
+const BACKEND_URL = process.env.VELORA_BACKEND_URL || 'http://localhost:8000';
+
+// Forwards /api/proxy/<path>?<query> to the FastAPI server at /<path>?<query>,
+// keeping the backend's status code (route.js next door only matches /api/proxy)
+async function forward(request, { params }) {
+  const { path = [] } = await params;
+  const url = new URL(request.url);
+  const targetUrl = `${BACKEND_URL}/${path.map(encodeURIComponent).join('/')}${url.search}`;
+
+  try {
+    const init = { method: request.method, headers: {} };
+    const authorization = request.headers.get('authorization');
+    if (authorization) init.headers.Authorization = authorization;
+    if (!['GET', 'HEAD'].includes(request.method)) {
+      init.headers['Content-Type'] = request.headers.get('content-type') || 'application/json';
+      init.body = await request.text();
+    }
+
+    const response = await fetch(targetUrl, init);
+    const text = await response.text();
+    try {
+      return NextResponse.json(JSON.parse(text), { status: response.status });
+    } catch {
+      return NextResponse.json({ error: text || response.statusText }, { status: response.status });
+    }
+  } catch (error) {
+    return NextResponse.json({ error: 'Proxy request failed' }, { status: 502 });
+  }
+}
+
+export const GET = forward;
+export const POST = forward;
+export const DELETE = forward;
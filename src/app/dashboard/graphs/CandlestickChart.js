@@ -1,11 +1,64 @@
 "use client";
 
-import React from "react";
+import React, { useEffect, useState } from "react";
+import TimeframeSelector from "@/components/predictions/TimeframeSelector";
+
+const WIDTH = 600;
+const HEIGHT = 240;
+
+// OHLC candles from /api/candles; the backend caps the count at `points`
+export default function CandlestickChart({ ticker = "AAPL", points = 150 }) {
+  const [timeframe, setTimeframe] = useState("1M");
+  const [candles, setCandles] = useState([]);
+  const [error, setError] = useState(null);
+
+  useEffect(() => {
+    const params = new URLSearchParams({ timeframe, points });
+    // Served by the catch-all proxy route (src/app/api/proxy/[...path])
+    fetch(`/api/proxy/api/candles/${encodeURIComponent(ticker)}?${params}`)
+      .then((response) => response.json())
+      .then((data) => {
+        if (!data.candles) throw new Error(data.detail || data.error || "No candle data");
+        setCandles(data.candles);
+        setError(null);
+      })
+      .catch((err) => setError(err.message));
+  }, [ticker, timeframe, points]);
+
+  const low = Math.min(...candles.map((c) => c.low));
+  const high = Math.max(...candles.map((c) => c.high));
+  const y = (price) => HEIGHT - ((price - low) / (high - low || 1)) * HEIGHT;
+  const step = WIDTH / Math.max(candles.length, 1);
 
-export default function CandlestickChart() {
   return (
-    <div className="w-full h-64 bg-gray-50 flex items-center justify-center">
-      <p className="text-gray-500">Candlestick Chart Placeholder</p>
+    <div className="w-full">
+      <div className="mb-2 flex justify-end">
+        <TimeframeSelector initial={timeframe} onChange={setTimeframe} />
+      </div>
+      {error || !candles.length ? (
+        <div className="w-full h-64 bg-gray-50 flex items-center justify-center">
+          <p className="text-gray-500">{error || "Loading candles..."}</p>
+        </div>
+      ) : (
+        <svg viewBox={`0 0 ${WIDTH} ${HEIGHT}`} className="w-full h-64" preserveAspectRatio="none">
+          {candles.map((c, i) => {
+            const x = i * step + step / 2;
+            const up = c.close >= c.open;
+            return (
+              <g key={c.date} className={up ? "text-green-500" : "text-red-500"}>
+                <line x1={x} x2={x} y1={y(c.high)} y2={y(c.low)} stroke="currentColor" />
+                <rect
+                  x={x - step * 0.35}
+                  width={step * 0.7}
+                  y={y(Math.max(c.open, c.close))}
+                  height={Math.max(Math.abs(y(c.open) - y(c.close)), 1)}
+                  fill="currentColor"
+                />
+              </g>
+            );
+          })}
+        </svg>
+      )}
     </div>
   );
-}
\ No newline at end of file
+}
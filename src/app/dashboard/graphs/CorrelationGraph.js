@@ -1,11 +1,47 @@
 "use client";
 
-import React from "react";
+import React, { useEffect, useState } from "react";
+
+// Most correlated tickers by daily returns, from /api/correlation
+export default function CorrelationGraph({ ticker = "AAPL", window = 60, k = 8 }) {
+  const [neighbors, setNeighbors] = useState([]);
+  const [error, setError] = useState(null);
+
+  useEffect(() => {
+    const params = new URLSearchParams({ ticker, window, k });
+    fetch(`/api/proxy/api/correlation?${params}`)
+      .then((response) => response.json())
+      .then((data) => {
+        if (!data.neighbors) throw new Error(data.detail || data.error || "No correlation data");
+        setNeighbors(data.neighbors);
+        setError(null);
+      })
+      .catch((err) => setError(err.message));
+  }, [ticker, window, k]);
+
+  if (error || !neighbors.length) {
+    return (
+      <div className="w-full h-64 bg-gray-50 flex items-center justify-center">
+        <p className="text-gray-500">{error || "Loading correlations..."}</p>
+      </div>
+    );
+  }
 
-export default function CorrelationGraph() {
   return (
-    <div className="w-full h-64 bg-gray-50 flex items-center justify-center">
-      <p className="text-gray-500">Market Correlation Graph Placeholder</p>
+    <div className="w-full h-64 overflow-y-auto">
+      <p className="mb-2 text-sm text-gray-500">{ticker} vs. {window}-day daily returns</p>
+      {neighbors.map(({ ticker: symbol, correlation }) => (
+        <div key={symbol} className="flex items-center mb-2">
+          <span className="w-16 text-sm font-medium text-gray-700">{symbol}</span>
+          <div className="flex-1 h-3 bg-gray-100 rounded">
+            <div
+              className={`h-3 rounded ${correlation >= 0 ? "bg-indigo-500" : "bg-red-400"}`}
+              style={{ width: `${Math.abs(correlation) * 100}%` }}
+            />
+          </div>
+          <span className="w-14 text-right text-sm text-gray-600">{correlation.toFixed(2)}</span>
+        </div>
+      ))}
     </div>
   );
-}
\ No newline at end of file
+}
@@ -1,39 +1,61 @@
 "use client"
 
-export default function FeatureImportance() {
-  const features = [
-    { name: 'Closing Price', importance: 35 },
-    { name: 'Trading Volume', importance: 25 },
-    { name: 'Economic Indicators', importance: 20 },
-    { name: 'Market Sentiment', importance: 15 },
-    { name: 'Technical Indicators', importance: 5 }
-  ];
+import { useEffect, useState } from 'react';
+
+// Permutation importances and key input days from /api/explain
+export default function FeatureImportance({ ticker = 'AAPL', top = 5 }) {
+  const [explanation, setExplanation] = useState(null);
+  const [error, setError] = useState(null);
+
+  useEffect(() => {
+    // Served by the catch-all proxy route (src/app/api/proxy/[...path])
+    fetch(`/api/proxy/api/explain/${encodeURIComponent(ticker)}?top=${top}`)
+      .then((response) => response.json())
+      .then((data) => {
+        if (!data.features) throw new Error(data.detail || data.error || 'No explanation available');
+        setExplanation(data);
+        setError(null);
+      })
+      .catch((err) => setError(err.message));
+  }, [ticker, top]);
+
+  if (error || !explanation) {
+    return <p className="text-sm text-gray-500">{error || 'Computing feature importance...'}</p>;
+  }
 
   return (
     <div className="space-y-4">
-      {features.map((feature, index) => (
-        <div key={index} className="flex items-center space-x-4">
+      {explanation.features.map((feature) => (
+        <div key={feature.name} className="flex items-center space-x-4">
           <div className="flex-1">
             <div className="text-sm font-medium text-gray-700">{feature.name}</div>
             <div className="w-full bg-gray-200 rounded-full h-2.5 mt-1">
               <div 
                 className="bg-indigo-600 h-2.5 rounded-full" 
-                style={{ width: `${feature.importance}%` }}
+                style={{ width: `${feature.share}%` }}
               ></div>
             </div>
           </div>
           <div className="text-sm font-semibold text-gray-600">
-            {feature.importance}%
+            {feature.share}%
           </div>
         </div>
       ))}
       
       <div className="p-4 mt-2 bg-gray-50 rounded-lg text-sm text-gray-600">
-        <p>
-          These values represent the relative importance of different features in our prediction model.
-          Closing price and trading volume typically have the strongest influence on future price movements.
+        <p className="mb-2">
+          Share of the {ticker} model&apos;s next-close prediction (${explanation.prediction}) that changes
+          when each input feature is shuffled across the 60-day window.
         </p>
+        <ul>
+          {explanation.timesteps.map((step) => (
+            <li key={step.days_ago}>
+              {step.days_ago === 0 ? 'Latest day' : `${step.days_ago} days ago`}:{' '}
+              {step.contribution >= 0 ? '+' : '-'}${Math.abs(step.contribution).toFixed(2)}
+            </li>
+          ))}
+        </ul>
       </div>
     </div>
   );
-}
\ No newline at end of file
+}
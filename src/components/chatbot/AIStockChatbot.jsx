@@ -9,6 +9,22 @@ const generateClientId = () => {
   return 'client_' + Math.random().toString(36).substring(2, 15);
 };
 
+// Frames streamed ahead of the final bot_response
+const STREAM_FRAME_TYPES = ['prediction', 'explanation', 'sentiment'];
+
+const formatStreamFrame = (data) => {
+  if (data.type === 'prediction') {
+    const next = (data.predictions || [])[0];
+    if (!next) return `Analyzing ${data.ticker}...`;
+    const sign = next.change_percent > 0 ? '+' : '';
+    return `${data.ticker}: $${next.price} (${sign}${next.change_percent}%) - ${next.recommendation}`;
+  }
+  if (data.type === 'sentiment') {
+    return `Sentiment: ${data.sentiment}. ${data.message}`;
+  }
+  return data.message;
+};
+
 const AIStockChatbot = ({ ticker }) => {
   const [messages, setMessages] = useState([
     { 
@@ -42,17 +58,29 @@ const AIStockChatbot = ({ ticker }) => {
       ws.onmessage = (event) => {
         try {
           const data = JSON.parse(event.data);
-          if (data.type === 'bot_response') {
+          if (STREAM_FRAME_TYPES.includes(data.type)) {
+            // Partial results fill a draft bubble until the final response arrives
+            const partial = formatStreamFrame(data);
+            setMessages(prev => {
+              const draft = prev.find(m => m.id === data.id);
+              if (!draft) {
+                return [...prev, { id: data.id, text: partial, isUser: false, timestamp: data.timestamp || new Date().toISOString() }];
+              }
+              return prev.map(m => m.id === data.id ? { ...m, text: `${m.text}\n\n${partial}` } : m);
+            });
+          } else if (data.type === 'bot_response') {
             setIsTyping(false);
-            setMessages(prev => [
-              ...prev,
-              {
-                id: Date.now(),
+            setMessages(prev => {
+              const final = {
+                id: data.id || Date.now(),
                 text: data.message,
                 isUser: false,
                 timestamp: data.timestamp || new Date().toISOString()
-              }
-            ]);
+              };
+              return prev.some(m => m.id === data.id)
+                ? prev.map(m => m.id === data.id ? final : m)
+                : [...prev, final];
+            });
           }
         } catch (error) {
           console.error('Error parsing WebSocket message:', error);
@@ -1,8 +1,8 @@
 "use client";
 import { useState } from 'react';
 
-export default function TimeframeSelector() {
-  const [selectedTimeframe, setSelectedTimeframe] = useState('1M');
+export default function TimeframeSelector({ initial = '1M', onChange }) {
+  const [selectedTimeframe, setSelectedTimeframe] = useState(initial);
   
   const timeframes = ['1D', '1W', '1M', '3M', '6M', '1Y', 'All'];
 
@@ -11,7 +11,10 @@ export default function TimeframeSelector() {
       {timeframes.map((timeframe) => (
         <button
           key={timeframe}
-          onClick={() => setSelectedTimeframe(timeframe)}
+          onClick={() => {
+            setSelectedTimeframe(timeframe);
+            onChange?.(timeframe);
+          }}
           className={`
             px-3 py-1 text-xs rounded-full transition-all
             ${selectedTimeframe === timeframe 
@@ -0,0 +1,237 @@
+import os
+import re
+import sys
+import time
+import heapq
+import pickle
+import bisect
+import logging
+import pandas as pd
+from intent_router import NAME_SUFFIXES, name_tokens
+
+logger = logging.getLogger(__name__)
+
+# ================== Symbol Search Index ==================
+# Built once from a symbol master CSV (ticker,name[,exchange][,popularity]),
+# or loaded from the prebuilt pickle written next to it by `python symbol_search.py`:
+#   - ticker prefix      bisect over the sorted lowercase tickers
+#   - name token prefix  bisect over the sorted lowercase company-name tokens
+#   - typo tolerance     symmetric-delete table over tickers and name tokens,
+#                        candidates verified with a bounded edit distance
+# Results rank by match tier (exact ticker, ticker prefix, name prefix, fuzzy),
+# then popularity.
+DEFAULT_SYMBOL_MASTER = os.getenv("VELORA_SYMBOL_MASTER", "data/symbols.csv")
+PREBUILT_SUFFIX = ".index.pkl"
+EXACT, TICKER_PREFIX, NAME_PREFIX, FUZZY = range(4)
+TERM_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def max_edits(term):
+    """Typos tolerated for a term: none below 3 characters, two from 8"""
+    if len(term) < 3:
+        return 0
+    return 1 if len(term) < 8 else 2
+
+
+def deletes(term, depth):
+    """Every string reachable from term by deleting up to depth characters"""
+    variants = {term}
+    frontier = {term}
+    for _ in range(depth):
+        frontier = {v[:i] + v[i + 1:] for v in frontier for i in range(len(v))}
+        variants |= frontier
+    return variants
+
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance, or limit + 1 once it is known to exceed limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def search_terms(name):
+    """Lowercase company-name tokens without legal suffixes: "Amazon.com Inc." -> ["amazon"]"""
+    return name_tokens(name) or TERM_PATTERN.findall(name.lower())
+
+
+def load_symbol_master(path=DEFAULT_SYMBOL_MASTER):
+    """Symbol records from a master CSV; the first row wins for duplicate tickers"""
+    master = pd.read_csv(path, dtype=str, keep_default_na=False)
+    master.columns = [c.strip().lower() for c in master.columns]
+    if "symbol" in master.columns and "ticker" not in master.columns:
+        master = master.rename(columns={"symbol": "ticker"})
+
+    records, seen = [], set()
+    for row in master.to_dict("records"):
+        ticker = row["ticker"].strip().upper()
+        if not ticker or ticker in seen:
+            continue
+        seen.add(ticker)
+        records.append({
+            "ticker": ticker,
+            "name": row.get("name", "").strip() or ticker,
+            "exchange": row.get("exchange", "").strip(),
+            "popularity": float(row.get("popularity") or 0)
+        })
+    return records
+
+
+class SymbolIndex:
+    def __init__(self, records):
+        """
+        Search index over symbol records ({"ticker", "name", "exchange", "popularity"})
+
+        Everything a lookup touches is precomputed here: sorted ticker and
+        name-token keys for prefix ranges, and the delete table for typos.
+        """
+        self.records = list(records)
+        self.popularity = [r.get("popularity", 0) for r in self.records]
+
+        tickers = sorted((r["ticker"].lower(), i) for i, r in enumerate(self.records))
+        self._tickers = [t for t, _ in tickers]
+        self._ticker_ids = [i for _, i in tickers]
+        self._exact = {t: i for t, i in tickers}
+
+        tokens = sorted({(t, i) for i, r in enumerate(self.records) for t in search_terms(r["name"])})
+        self._tokens = [t for t, _ in tokens]
+        self._token_ids = [i for _, i in tokens]
+
+        # term -> ids it identifies, and delete variant -> terms it came from
+        self._term_ids = {}
+        for term, i in tickers + tokens:
+            self._term_ids.setdefault(term, set()).add(i)
+        self._deletes = {}
+        for term in self._term_ids:
+            for variant in deletes(term, max_edits(term)):
+                self._deletes.setdefault(variant, []).append(term)
+
+    def __len__(self):
+        return len(self.records)
+
+    def get(self, ticker):
+        """Record for an exact ticker, or None"""
+        i = self._exact.get(ticker.lower())
+        return None if i is None else self.records[i]
+
+    @staticmethod
+    def _prefix_ids(keys, ids, prefix):
+        lo = bisect.bisect_left(keys, prefix)
+        hi = bisect.bisect_left(keys, prefix + "\uffff", lo)
+        return ids[lo:hi]
+
+    def _fuzzy_ids(self, term):
+        """Ids of tickers and name tokens within max_edits(term) of term"""
+        limit = max_edits(term)
+        if not limit:
+            return set()
+        found = set()
+        seen = set()
+        for variant in deletes(term, limit):
+            for candidate in self._deletes.get(variant, ()):
+                if candidate not in seen:
+                    seen.add(candidate)
+                    if edit_distance(term, candidate, limit) <= limit:
+                        found |= self._term_ids[candidate]
+        return found
+
+    def search(self, query, limit=10):
+        """Best-matching records for a free-text query, most relevant first"""
+        query = query.strip().lower()
+        terms = TERM_PATTERN.findall(query)
+        if not terms:
+            return []
+
+        tiers = {}
+
+        def offer(ids, tier):
+            for i in ids:
+                if tier < tiers.get(i, FUZZY + 1):
+                    tiers[i] = tier
+
+        # Tickers are matched on the whole query ("brk.b"), names token by token
+        symbol = query.replace(" ", "")
+        if symbol in self._exact:
+            offer([self._exact[symbol]], EXACT)
+        offer(self._prefix_ids(self._tickers, self._ticker_ids, symbol), TICKER_PREFIX)
+
+        name_terms = [t for t in terms if t not in NAME_SUFFIXES] or terms
+        prefix_sets = [set(self._prefix_ids(self._tokens, self._token_ids, t)) for t in name_terms]
+        offer(set.intersection(*prefix_sets), NAME_PREFIX)
+
+        if len(tiers) < limit:
+            # Each name term must match by prefix or within its typo budget
+            fuzzy = set.intersection(*(ids | self._fuzzy_ids(t) for t, ids in zip(name_terms, prefix_sets)))
+            if symbol not in name_terms:
+                fuzzy |= self._fuzzy_ids(symbol)
+            offer(fuzzy, FUZZY)
+
+        records = self.records
+        ranked = heapq.nsmallest(limit, tiers, key=lambda i: (tiers[i], -self.popularity[i], len(records[i]["ticker"]), records[i]["ticker"]))
+        return [self.records[i] for i in ranked]
+
+    def save(self, path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def load(path):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+
+def prebuilt_path(master):
+    return os.path.splitext(master)[0] + PREBUILT_SUFFIX
+
+
+def open_symbol_index(master=DEFAULT_SYMBOL_MASTER):
+    """Load the prebuilt index if it is newer than the master file, otherwise build from the master"""
+    prebuilt = prebuilt_path(master)
+    start = time.perf_counter()
+    try:
+        if os.path.exists(prebuilt) and (not os.path.exists(master) or os.path.getmtime(prebuilt) >= os.path.getmtime(master)):
+            index = SymbolIndex.load(prebuilt)
+            source = prebuilt
+        elif os.path.exists(master):
+            index = SymbolIndex(load_symbol_master(master))
+            source = master
+        else:
+            logger.warning(f"Symbol master not found at {master}; search will return no results")
+            return SymbolIndex([])
+    except Exception as e:
+        logger.error(f"Error opening symbol index from {master}: {e}")
+        return SymbolIndex([])
+
+    logger.info(f"Loaded symbol index with {len(index)} symbols from {source} in {(time.perf_counter() - start) * 1000:.1f} ms")
+    return index
+
+
+def main():
+    master = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_SYMBOL_MASTER
+    output = sys.argv[2] if len(sys.argv) > 2 else prebuilt_path(master)
+    if not os.path.exists(master):
+        logger.error(f"Symbol master not found: {master}")
+        return
+
+    start = time.perf_counter()
+    index = SymbolIndex(load_symbol_master(master))
+    index.save(output)
+    logger.info(f"Built index for {len(index)} symbols in {time.perf_counter() - start:.2f}s -> {output}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s')
+    main()
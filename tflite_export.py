@@ -0,0 +1,245 @@
+import os
+import sys
+import glob
+import json
+import time
+import queue
+import shutil
+import logging
+import tempfile
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# The interpreter is resolved lazily: serving boxes can run on tflite_runtime
+# alone, and importing this module must not pull in TensorFlow for the NumPy
+# serving backend. Export needs full TensorFlow.
+_interpreter_class = None
+
+
+def interpreter_class():
+    """tflite_runtime's Interpreter when installed, otherwise TensorFlow's"""
+    global _interpreter_class
+    if _interpreter_class is None:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+        _interpreter_class = Interpreter
+    return _interpreter_class
+
+# ================== Quantized TFLite Export ==================
+# float16: weights stored as float16, computed in float32.
+# int8:    dynamic-range quantization (int8 weights, float activations). Full
+#          integer calibration is not used because the converter cannot
+#          quantize the LSTM while-loop reliably.
+QUANTIZATION_MODES = ("float16", "int8")
+DEFAULT_QUANTIZATION = os.getenv("VELORA_TFLITE_QUANTIZATION", "float16")
+INTERPRETER_POOL_SIZE = int(os.getenv("VELORA_TFLITE_POOL_SIZE", "4"))
+
+
+def tflite_path(ticker, quantization=DEFAULT_QUANTIZATION, model_dir="models"):
+    return os.path.join(model_dir, f"{ticker}_{quantization}.tflite")
+
+
+def convert_model(model, quantization=DEFAULT_QUANTIZATION):
+    """Convert a Keras model to TFLite flatbuffer bytes with a fixed batch of one"""
+    import tensorflow as tf
+
+    if quantization not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown quantization {quantization}, expected one of {QUANTIZATION_MODES}")
+
+    # LSTM while-loops only lower to TFLite with a static batch dimension
+    _, look_back, n_features = model.input_shape
+    archive = tf.keras.export.ExportArchive()
+    archive.track(model)
+    archive.add_endpoint(
+        "serve",
+        lambda x: model(x, training=False),
+        input_signature=[tf.TensorSpec([1, look_back, n_features], tf.float32)]
+    )
+
+    export_dir = tempfile.mkdtemp(prefix="velora_export_")
+    try:
+        archive.write_out(export_dir)
+        converter = tf.lite.TFLiteConverter.from_saved_model(export_dir)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        if quantization == "float16":
+            converter.target_spec.supported_types = [tf.float16]
+        return converter.convert()
+    finally:
+        shutil.rmtree(export_dir, ignore_errors=True)
+
+
+def export_tflite(model, ticker, quantization=DEFAULT_QUANTIZATION, model_dir="models"):
+    """Write models/<TICKER>_<quantization>.tflite and return its path"""
+    path = tflite_path(ticker, quantization, model_dir)
+    flatbuffer = convert_model(model, quantization)
+    with open(path, 'wb') as f:
+        f.write(flatbuffer)
+    logger.info(f"Exported {quantization} TFLite model for {ticker} ({len(flatbuffer) / 1024:.1f} KB)")
+    return path
+
+
+class TFLitePredictor:
+    def __init__(self, path, pool_size=INTERPRETER_POOL_SIZE):
+        """
+        Thread-safe TFLite model with a pool of interpreters
+
+        Exposes input_shape/output_shape and __call__(x, training) like a Keras
+        model so the forecasting rollout can use it unchanged. Each batch row
+        is run on an interpreter checked out of the pool; interpreters are
+        created lazily up to pool_size and never shared between threads.
+        """
+        self.path = path
+        self.pool_size = pool_size
+        self._pool = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+        interpreter = self._new_interpreter()
+        input_detail = interpreter.get_input_details()[0]
+        output_detail = interpreter.get_output_details()[0]
+        self.input_shape = (None,) + tuple(int(d) for d in input_detail['shape'][1:])
+        self.output_shape = (None,) + tuple(int(d) for d in output_detail['shape'][1:])
+        self._pool.put(interpreter)
+
+    def _new_interpreter(self):
+        interpreter = interpreter_class()(model_path=self.path, num_threads=1)
+        interpreter.allocate_tensors()
+        self._created += 1
+        return interpreter
+
+    def _acquire(self):
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.pool_size:
+                return self._new_interpreter()
+        return self._pool.get()
+
+    def __call__(self, x, training=False):
+        x = np.ascontiguousarray(x, dtype=np.float32)
+        out = np.empty((len(x),) + self.output_shape[1:], dtype=np.float32)
+
+        interpreter = self._acquire()
+        try:
+            input_index = interpreter.get_input_details()[0]['index']
+            output_index = interpreter.get_output_details()[0]['index']
+            for i in range(len(x)):
+                interpreter.set_tensor(input_index, x[i:i + 1])
+                interpreter.invoke()
+                out[i] = interpreter.get_tensor(output_index)[0]
+        finally:
+            self._pool.put(interpreter)
+        return out
+
+
+def load_tflite_models(model_dir="models", quantization=DEFAULT_QUANTIZATION):
+    """Load every exported <TICKER>_<quantization>.tflite as a pooled predictor"""
+    lite_models = {}
+    files = glob.glob(os.path.join(model_dir, f"*_{quantization}.tflite"))
+    if not files:
+        return lite_models
+
+    try:
+        interpreter_class()
+    except ImportError:
+        logger.warning("No TFLite interpreter available. Quantized serving is disabled.")
+        return lite_models
+
+    for file in files:
+        ticker = os.path.basename(file)[:-len(f"_{quantization}.tflite")]
+        try:
+            lite_models[ticker] = TFLitePredictor(file)
+        except Exception as e:
+            logger.error(f"Error loading TFLite model {file}: {e}")
+    return lite_models
+
+
+# ================== Comparison Report ==================
+def sample_windows(input_shape, count=64, seed=0):
+    """Scaled evaluation windows: random-walk series min-max scaled per feature"""
+    _, look_back, n_features = input_shape
+    rng = np.random.default_rng(seed)
+    walks = np.cumsum(rng.normal(0, 1, (count, look_back, n_features)), axis=1)
+    low = walks.min(axis=1, keepdims=True)
+    span = np.maximum(walks.max(axis=1, keepdims=True) - low, 1e-6)
+    return ((walks - low) / span).astype(np.float32)
+
+
+def mean_latency_ms(fn, x, repeats=50):
+    fn(x[:1])
+    start = time.perf_counter()
+    for i in range(repeats):
+        fn(x[i % len(x):i % len(x) + 1])
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def compare_models(model, model_file, ticker, quantizations=QUANTIZATION_MODES, model_dir="models", windows=None):
+    """Accuracy drift, file size and single-window latency of each export vs the Keras model"""
+    if windows is None:
+        windows = sample_windows(model.input_shape)
+
+    reference = np.asarray(model(windows, training=False))
+    keras_latency = mean_latency_ms(lambda x: np.asarray(model(x, training=False)), windows)
+    report = {
+        "ticker": ticker,
+        "keras": {"size_kb": os.path.getsize(model_file) / 1024, "latency_ms": keras_latency},
+        "exports": {}
+    }
+
+    for quantization in quantizations:
+        path = export_tflite(model, ticker, quantization, model_dir)
+        predictor = TFLitePredictor(path, pool_size=1)
+        outputs = predictor(windows)
+        drift = np.abs(outputs - reference)
+        report["exports"][quantization] = {
+            "size_kb": os.path.getsize(path) / 1024,
+            "latency_ms": mean_latency_ms(predictor, windows),
+            "max_abs_drift": float(drift.max()),
+            "mean_abs_drift": float(drift.mean())
+        }
+    return report
+
+
+def main():
+    import argparse
+    import tensorflow as tf
+
+    parser = argparse.ArgumentParser(description="Export Keras models to quantized TFLite and compare them")
+    parser.add_argument("tickers", nargs="*", help="Tickers to export (default: every model in models/)")
+    parser.add_argument("--quantization", nargs="+", default=list(QUANTIZATION_MODES), choices=QUANTIZATION_MODES)
+    parser.add_argument("--report", default="models/tflite_report.json")
+    args = parser.parse_args()
+
+    model_files = glob.glob(os.path.join("models", "*.keras")) + glob.glob(os.path.join("models", "*.h5"))
+    reports = []
+    for file in sorted(model_files):
+        ticker = os.path.basename(file).split("_")[0]
+        if args.tickers and ticker not in args.tickers:
+            continue
+        try:
+            model = tf.keras.models.load_model(file)
+            reports.append(compare_models(model, file, ticker, args.quantization))
+        except Exception as e:
+            logger.error(f"Error exporting {file}: {e}")
+
+    print(f"{'ticker':<8} {'mode':<8} {'size KB':>9} {'keras KB':>9} {'ms':>8} {'keras ms':>9} {'max drift':>10}")
+    for report in reports:
+        for quantization, export in report["exports"].items():
+            print(f"{report['ticker']:<8} {quantization:<8} {export['size_kb']:>9.1f} {report['keras']['size_kb']:>9.1f} "
+                  f"{export['latency_ms']:>8.3f} {report['keras']['latency_ms']:>9.3f} {export['max_abs_drift']:>10.2e}")
+
+    with open(args.report, 'w') as f:
+        json.dump(reports, f, indent=2)
+    logger.info(f"Wrote comparison report for {len(reports)} models to {args.report}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s', stream=sys.stdout)
+    main()
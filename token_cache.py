@@ -0,0 +1,72 @@
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# ================== Verified Token Cache ==================
+# Dashboard polling sends the same bearer token many times a minute. The
+# claims of a token that passed full verification are kept in a bounded LRU
+# keyed by the SHA-256 digest of the token (raw tokens are never stored)
+# until the token's own `exp`, so repeat requests skip PyJWT's decode, HMAC
+# check and claim validation. Tokens without `exp` are never cached.
+TOKEN_CACHE_SIZE = int(os.getenv("VELORA_TOKEN_CACHE_SIZE", "10000"))
+
+
+def token_digest(token):
+    return hashlib.sha256(token.encode()).digest()
+
+
+class TokenCache:
+    def __init__(self, max_entries=TOKEN_CACHE_SIZE):
+        """max_entries=0 disables caching; every token is fully verified"""
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "expired": 0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, token):
+        """Cached claims for a still-valid token, or None"""
+        key = token_digest(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            claims, expires = entry
+            if expires <= time.time():
+                del self._entries[key]
+                self.stats["expired"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return claims
+
+    def put(self, token, claims):
+        expires = claims.get("exp")
+        if not self.max_entries or not isinstance(expires, (int, float)):
+            return
+        key = token_digest(token)
+        with self._lock:
+            self._entries[key] = (claims, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def verify(self, token, decode):
+        """Claims for token, from the cache or from decode(token) (which raises on invalid tokens)"""
+        claims = self.get(token) if self.max_entries else None
+        if claims is None:
+            claims = decode(token)
+            self.put(token, claims)
+        return claims
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
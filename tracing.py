@@ -0,0 +1,208 @@
+import time
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from functools import wraps
+from fastapi.responses import Response
+
+logger = logging.getLogger(__name__)
+
+# ================== Request Tracing ==================
+# Each HTTP request gets a Trace held in a context variable; span("name")
+# blocks anywhere below the endpoint time a stage, feed the per-stage
+# histogram and, when a trace is active, the request's own breakdown that
+# ?profile=1 returns. Context variables follow the request into FastAPI's
+# threadpool, so sync endpoints are traced too. Other modules can expose a
+# running total on /metrics as a counter read at scrape time.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+MAX_TRACE_SPANS = 256
+
+_current_trace = contextvars.ContextVar("velora_trace", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        """Cumulative Prometheus-style histogram, safe to observe from any thread"""
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self):
+        """(cumulative bucket counts including +Inf, sum, count)"""
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative, running = [], 0
+        for c in counts:
+            running += c
+            cumulative.append(running)
+        return cumulative, total, count
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    return ",".join(f'{key}="{_escape(value)}"' for key, value in labels)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._histograms = {}
+        self._help = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name, description, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram())
+                self._help.setdefault(name, description)
+        return histogram
+
+    def counter(self, name, description, read):
+        """Expose read(), a monotonically increasing total, as a counter"""
+        with self._lock:
+            self._counters[name] = (description, read)
+
+    def render(self):
+        """Prometheus text exposition of every counter and histogram"""
+        lines = []
+        for name, (description, read) in sorted(self._counters.items()):
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name} {read()}")
+        for name in sorted(self._help):
+            lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} histogram")
+            series = sorted((key[1], h) for key, h in list(self._histograms.items()) if key[0] == name)
+            for labels, histogram in series:
+                cumulative, total, count = histogram.snapshot()
+                bounds = [str(b) for b in histogram.buckets] + ["+Inf"]
+                for bound, value in zip(bounds, cumulative):
+                    lines.append(f"{name}_bucket{{{_format_labels(labels + (('le', bound),))}}} {value}")
+                label_text = f"{{{_format_labels(labels)}}}" if labels else ""
+                lines.append(f"{name}_sum{label_text} {total:.6f}")
+                lines.append(f"{name}_count{label_text} {count}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+class Trace:
+    def __init__(self):
+        """Ordered stage timings for one request"""
+        self.start = time.perf_counter()
+        self.spans = []
+        self.depth = 0
+
+    def breakdown(self):
+        """Per-stage timing in start order; depth shows nesting"""
+        return {
+            "total_ms": round((time.perf_counter() - self.start) * 1000, 3),
+            "stages": [
+                {"name": name, "depth": depth, "ms": round(ms, 3) if ms is not None else None}
+                for name, depth, ms in self.spans
+            ]
+        }
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name):
+    """Time a named stage into the stage histogram and the active request trace"""
+    trace = _current_trace.get()
+    index = None
+    if trace is not None and len(trace.spans) < MAX_TRACE_SPANS:
+        index = len(trace.spans)
+        trace.spans.append((name, trace.depth, None))
+        trace.depth += 1
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        REGISTRY.histogram("velora_stage_duration_seconds", "Time spent in each traced stage", stage=name).observe(duration)
+        if trace is not None and index is not None:
+            trace.depth -= 1
+            trace.spans[index] = (name, trace.spans[index][1], duration * 1000)
+
+
+def traced(name):
+    """Decorator form of span()"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def profile_breakdown():
+    """Timing breakdown of the current request, or None outside a traced request"""
+    trace = _current_trace.get()
+    return trace.breakdown() if trace is not None else None
+
+
+def metrics_response():
+    return Response(content=REGISTRY.render(), media_type=PROMETHEUS_MEDIA_TYPE)
+
+
+class TracingMiddleware:
+    def __init__(self, app):
+        """
+        ASGI middleware that opens a Trace per HTTP request and records its
+        latency by method, route template and status code
+        """
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def traced_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        token = _current_trace.set(Trace())
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, traced_send)
+        finally:
+            duration = time.perf_counter() - start
+            _current_trace.reset(token)
+            # Route templates keep label cardinality bounded; unmatched paths share one series
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            REGISTRY.histogram(
+                "velora_http_request_duration_seconds", "HTTP request latency",
+                method=scope["method"], path=path, status=status
+            ).observe(duration)
@@ -3,16 +3,15 @@ import sys
 import logging
 import numpy as np
 import pandas as pd
+from window_store import WindowStore, build_window_store, open_window_store, sliding_windows, INDEX_FILE
+from forecasting import DEFAULT_FORECAST_DAYS
+from uncertainty import calibrate_mc_scale, save_mc_scale
+from tflite_export import export_tflite, QUANTIZATION_MODES
+from numpy_lstm import export_weights
+from async_logging import configure_logging
 
-# Configurable logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s: %(message)s',
-    handlers=[
-        logging.FileHandler('training.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+# Configurable logging: JSON lines to training.log and text to stdout, via the queued writer
+configure_logging('training.log', stream=sys.stdout)
 logger = logging.getLogger(__name__)
 
 # Attempt to import machine learning libraries with graceful fallback
@@ -59,58 +58,70 @@ class StockPredictor:
         """
         logger.info(f"Preprocessing data for {self.ticker}")
         
-        # Filter data for specific ticker
-        ticker_data = data[data['Ticker'] == self.ticker]
-        
-        if ticker_data.empty:
-            logger.warning(f"No data found for ticker {self.ticker}")
-            return None, None, None, None, None, None
-        
-        # Select relevant features
-        possible_features = ['Close', 'High', 'Low', 'Open', 'Volume']
-        features = [f for f in possible_features if f in ticker_data.columns]
-        
-        if not features:
-            logger.warning(f"No usable features found for {self.ticker}")
-            return None, None, None, None, None, None
-        
-        ticker_data = ticker_data[features].copy()
-        
-        # Handle missing values
-        ticker_data = ticker_data.fillna(method='ffill').fillna(method='bfill')
-        
-        if ticker_data.isna().any().any():
-            logger.warning(f"Still have NaN values after filling for {self.ticker}")
-            ticker_data = ticker_data.dropna()
+        if isinstance(data, WindowStore):
+            # Window store arrays are already cleaned and ordered at build time
+            if self.ticker not in data:
+                logger.warning(f"No data found for ticker {self.ticker}")
+                return None, None, None, None, None, None
+            
+            features = data.features
+            values = data.series(self.ticker)
+        else:
+            # Filter data for specific ticker
+            ticker_data = data[data['Ticker'] == self.ticker]
+            
+            if ticker_data.empty:
+                logger.warning(f"No data found for ticker {self.ticker}")
+                return None, None, None, None, None, None
+            
+            # Select relevant features
+            possible_features = ['Close', 'High', 'Low', 'Open', 'Volume']
+            features = [f for f in possible_features if f in ticker_data.columns]
+            
+            if not features:
+                logger.warning(f"No usable features found for {self.ticker}")
+                return None, None, None, None, None, None
+            
+            ticker_data = ticker_data[features].copy()
+            
+            # Handle missing values
+            ticker_data = ticker_data.fillna(method='ffill').fillna(method='bfill')
+            
+            if ticker_data.isna().any().any():
+                logger.warning(f"Still have NaN values after filling for {self.ticker}")
+                ticker_data = ticker_data.dropna()
+            
+            values = ticker_data.values
         
         # Check data availability
-        if len(ticker_data) < self.look_back + self.prediction_days:
-            logger.warning(f"Not enough data for {self.ticker}: {len(ticker_data)} rows")
+        if len(values) < self.look_back + self.prediction_days:
+            logger.warning(f"Not enough data for {self.ticker}: {len(values)} rows")
             return None, None, None, None, None, None
         
         # Normalize features
         if SKLEARN_AVAILABLE:
             scalers = {}
-            data_scaled = np.zeros_like(ticker_data.values, dtype=float)
+            data_scaled = np.zeros(values.shape, dtype=np.float32)
             
             for i, col in enumerate(features):
                 scalers[col] = MinMaxScaler(feature_range=(0, 1))
-                data_scaled[:, i] = scalers[col].fit_transform(ticker_data[[col]]).flatten()
+                data_scaled[:, i] = scalers[col].fit_transform(values[:, [i]]).flatten()
         else:
             # Basic normalization without scikit-learn
-            data_scaled = (ticker_data.values - ticker_data.values.min()) / (ticker_data.values.max() - ticker_data.values.min())
+            data_scaled = ((values - values.min()) / (values.max() - values.min())).astype(np.float32)
             scalers = None
         
         # Prepare sequences for prediction
         close_idx = features.index('Close') if 'Close' in features else 0
         
-        X, y = [], []
-        for i in range(len(data_scaled) - self.look_back - self.prediction_days + 1):
-            X.append(data_scaled[i:i+self.look_back])
-            y.append(data_scaled[i+self.look_back, close_idx])
+        n_samples = len(data_scaled) - self.look_back - self.prediction_days + 1
         
-        # Convert to numpy arrays
-        X, y = np.array(X), np.array(y)
+        # Windows are strided views over data_scaled rather than stacked copies;
+        # each target row holds the next prediction_days closes
+        X = sliding_windows(data_scaled, self.look_back)[:n_samples]
+        y = np.lib.stride_tricks.sliding_window_view(
+            data_scaled[self.look_back:, close_idx], self.prediction_days
+        )[:n_samples]
         
         # Basic train-test split if scikit-learn is available
         if SKLEARN_AVAILABLE:
@@ -150,8 +161,11 @@ class StockPredictor:
             # Define model
             model = tf.keras.Sequential([
                 tf.keras.layers.LSTM(50, input_shape=(X_train.shape[1], X_train.shape[2])),
+                # Kept active at inference for MC dropout uncertainty
+                tf.keras.layers.Dropout(0.2),
                 tf.keras.layers.Dense(25, activation='relu'),
-                tf.keras.layers.Dense(1)
+                # Direct multi-horizon head: one output per forecast day
+                tf.keras.layers.Dense(self.prediction_days)
             ])
             
             model.compile(
@@ -183,6 +197,27 @@ class StockPredictor:
             with open(f'models/{self.ticker}_metrics.txt', 'w') as f:
                 f.write(f"RMSE: {rmse}\n")
             
+            # Calibrate MC dropout spread against held-out error
+            try:
+                mc_scale = calibrate_mc_scale(model, X_test, y_test)
+                save_mc_scale(self.ticker, mc_scale)
+                logger.info(f"{self.ticker} - MC dropout calibration scale: {mc_scale:.3f}")
+            except Exception as e:
+                logger.error(f"MC dropout calibration failed for {self.ticker}: {e}")
+            
+            # Quantized exports for CPU serving
+            for quantization in QUANTIZATION_MODES:
+                try:
+                    export_tflite(model, self.ticker, quantization)
+                except Exception as e:
+                    logger.error(f"{quantization} TFLite export failed for {self.ticker}: {e}")
+            
+            # Raw weights for the TensorFlow-free NumPy serving backend
+            try:
+                export_weights(model, self.ticker)
+            except Exception as e:
+                logger.error(f"NumPy weight export failed for {self.ticker}: {e}")
+            
             return True
         
         except Exception as e:
@@ -241,23 +276,38 @@ def main():
         logger.info("Please run data preparation scripts first.")
         return
     
-    # Load data
-    try:
-        data = pd.read_csv(merged_data_path)
-        logger.info(f"Loaded data with {len(data)} rows")
-    except Exception as e:
-        logger.error(f"Error loading data: {e}")
-        return
+    # Reuse the memory-mapped window store unless the merged CSV is newer
+    data = open_window_store()
+    if data is not None and os.path.getmtime(os.path.join(data.path, INDEX_FILE)) < os.path.getmtime(merged_data_path):
+        logger.info("Window store is older than merged data, rebuilding")
+        data = None
+    
+    if data is None:
+        try:
+            merged_data = pd.read_csv(merged_data_path)
+            logger.info(f"Loaded data with {len(merged_data)} rows")
+        except Exception as e:
+            logger.error(f"Error loading data: {e}")
+            return
+        
+        try:
+            build_window_store(merged_data)
+            data = open_window_store()
+        except Exception as e:
+            logger.error(f"Error building window store: {e}")
+        
+        if data is None:
+            data = merged_data
     
     # Get unique tickers
-    tickers = data['Ticker'].unique()
+    tickers = data.tickers if isinstance(data, WindowStore) else data['Ticker'].unique()
     logger.info(f"Found {len(tickers)} unique tickers")
     
     # Train models for each ticker
     success_count = 0
     for ticker in tickers:
         logger.info(f"Processing {ticker}...")
-        predictor = StockPredictor(ticker)
+        predictor = StockPredictor(ticker, prediction_days=DEFAULT_FORECAST_DAYS)
         
         if predictor.train_model(data):
             success_count += 1
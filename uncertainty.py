@@ -0,0 +1,131 @@
+import os
+import json
+import math
+import logging
+import numpy as np
+from tracing import span
+from forecasting import (
+    FEATURES, DEFAULT_FORECAST_DAYS, Z_95,
+    clamp_days, prepare_windows, scale_windows, rollout, run_model
+)
+
+logger = logging.getLogger(__name__)
+
+# ================== Monte Carlo Dropout Uncertainty ==================
+# K stochastic passes run as one batch: each window is tiled K times along the
+# batch axis and the model is called with dropout active, so K samples cost a
+# single (B*K, look_back, features) forward pass per rollout step rather than
+# K separate predict calls.
+DEFAULT_MC_SAMPLES = 30
+MAX_MC_SAMPLES = 256
+CALIBRATION_SUFFIX = "_calibration.json"
+
+_mc_scales = {}
+
+
+def has_dropout(model):
+    """True when a model has dropout that can be sampled at inference time"""
+    if hasattr(model, 'mc_dropout'):
+        return model.mc_dropout
+    for layer in getattr(model, 'layers', []):
+        if 'Dropout' in layer.__class__.__name__:
+            return True
+        if getattr(layer, 'dropout', 0) or getattr(layer, 'recurrent_dropout', 0):
+            return True
+    return False
+
+
+def mc_samples(model, scaled, days, samples):
+    """Draw (batch, samples, days) scaled forecasts from one tiled stochastic rollout"""
+    batch = scaled.shape[0]
+    tiled = np.repeat(scaled, samples, axis=0)
+    paths = rollout(model, tiled, days, training=True)
+    return paths.reshape(batch, samples, days)
+
+
+def mc_forecast_batch(model, windows, days=DEFAULT_FORECAST_DAYS, samples=DEFAULT_MC_SAMPLES, scale=1.0):
+    """
+    Forecast `days` closes with MC dropout intervals for a batch of raw windows
+
+    `scale` is the per-model calibration factor from calibrate_mc_scale that
+    maps the dropout spread onto observed forecast error. Returns a dict of
+    (batch, days) arrays: price, lower, upper, sigma, confidence.
+    """
+    days = clamp_days(days)
+    samples = int(min(max(samples, 2), MAX_MC_SAMPLES))
+    with span("scale"):
+        windows = prepare_windows(model, windows)
+        scaled, low, width = scale_windows(windows)
+    with span("inference"):
+        paths = mc_samples(model, scaled, days, samples)
+
+    close_idx = FEATURES.index('Close')
+    paths = paths * width[:, :, close_idx, None] + low[:, :, close_idx, None]
+
+    prices = paths.mean(axis=1)
+    std = np.maximum(paths.std(axis=1) * scale, 1e-6)
+    lower = prices - Z_95 * std
+    upper = prices + Z_95 * std
+
+    # Probability that the realized move has the predicted sign
+    current = windows[:, -1:, close_idx]
+    erf = np.frompyfunc(math.erf, 1, 1)
+    confidence = 50.0 * (1.0 + erf(np.abs(prices - current) / (std * math.sqrt(2))).astype(np.float64))
+
+    return {
+        "price": prices,
+        "lower": lower,
+        "upper": upper,
+        "sigma": std / np.maximum(prices, 1e-8),
+        "confidence": confidence
+    }
+
+
+def mc_forecast(model, window, days=DEFAULT_FORECAST_DAYS, samples=DEFAULT_MC_SAMPLES, scale=1.0):
+    """MC dropout forecast for a single raw window; returns (days,) arrays"""
+    result = mc_forecast_batch(model, np.asarray(window)[None], days, samples, scale)
+    return {key: value[0] for key, value in result.items()}
+
+
+def calibrate_mc_scale(model, X, y, samples=DEFAULT_MC_SAMPLES, batch_size=4096):
+    """
+    Ratio of observed RMSE to mean MC dropout std on held-out windows
+
+    X: (n, look_back, features) scaled windows, y: (n, horizon) scaled targets.
+    """
+    X = np.asarray(X, dtype=np.float32)
+    y = np.asarray(y, dtype=np.float32).reshape(len(X), -1)
+    chunk = max(1, batch_size // samples)
+
+    sq_error, variance = 0.0, 0.0
+    for start in range(0, len(X), chunk):
+        tiled = np.repeat(X[start:start + chunk], samples, axis=0)
+        preds = run_model(model, tiled, training=True).reshape(-1, samples, y.shape[1])
+        target = y[start:start + chunk]
+        sq_error += float(((preds.mean(axis=1) - target) ** 2).sum())
+        variance += float(preds.var(axis=1).sum())
+
+    if variance <= 0:
+        return 1.0
+    return math.sqrt(sq_error / variance)
+
+
+def save_mc_scale(ticker, scale, model_dir="models"):
+    with open(os.path.join(model_dir, f"{ticker}{CALIBRATION_SUFFIX}"), 'w') as f:
+        json.dump({"mc_scale": scale}, f)
+    _mc_scales[ticker] = scale
+
+
+def load_mc_scale(ticker, model_dir="models"):
+    """Calibration factor written at training time, or 1.0 if the model was never calibrated"""
+    if ticker not in _mc_scales:
+        path = os.path.join(model_dir, f"{ticker}{CALIBRATION_SUFFIX}")
+        try:
+            with open(path) as f:
+                _mc_scales[ticker] = float(json.load(f)["mc_scale"])
+        except FileNotFoundError:
+            _mc_scales[ticker] = 1.0
+        except Exception as e:
+            logger.error(f"Error reading calibration for {ticker}: {e}")
+            _mc_scales[ticker] = 1.0
+    return _mc_scales[ticker]
@@ -0,0 +1,271 @@
+import os
+import time
+import uuid
+import queue
+import sqlite3
+import logging
+import threading
+import contextlib
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+# ================== User Store ==================
+# Watchlist and Portfolio rows in the Prisma SQLite database
+# (prisma/schema.prisma), shared with the Next.js app. Tables and columns
+# follow the Prisma migrations; DateTime columns hold epoch milliseconds, as
+# Prisma writes them, and ids are generated here since Prisma fills cuid()
+# client-side. The schema itself is only changed through prisma migrate.
+# Connections enforce the schema's foreign keys, so rows can only be written
+# for a user id that exists in "User".
+DEFAULT_DB_PATH = os.getenv("VELORA_USER_DB", "prisma/dev.db")
+DB_POOL_SIZE = int(os.getenv("VELORA_DB_POOL_SIZE", "4"))
+DB_TIMEOUT = 5.0
+# Tables this module reads and writes; any missing means a migration is pending
+REQUIRED_TABLES = ("User", "Watchlist", "Portfolio", "Alert")
+
+
+def now_ms():
+    return int(time.time() * 1000)
+
+
+def format_date(value):
+    """Prisma DateTime (epoch ms, or an ISO string from older writers) as YYYY-MM-DD"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+    return str(value)[:10]
+
+
+class ConnectionPool:
+    def __init__(self, path=DEFAULT_DB_PATH, size=DB_POOL_SIZE, timeout=DB_TIMEOUT):
+        """
+        Up to `size` sqlite3 connections shared across request threads
+
+        Connections are opened on first demand and reused, so a request pays
+        for a queue get instead of opening the database file. The database
+        must already exist (it is created by prisma migrate).
+        """
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _open(self):
+        conn = sqlite3.connect(f"file:{self.path}?mode=rw", uri=True, timeout=self.timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_open = self._opened < self.size
+            if can_open:
+                self._opened += 1
+        if not can_open:
+            try:
+                return self._idle.get(timeout=self.timeout)
+            except queue.Empty:
+                raise sqlite3.OperationalError(f"No database connection free after {self.timeout}s")
+
+        try:
+            return self._open()
+        except Exception:
+            with self._lock:
+                self._opened -= 1
+            raise
+
+    @contextlib.contextmanager
+    def connection(self):
+        """Borrow a connection; its transaction commits on success and rolls back on error"""
+        conn = self._acquire()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._opened = 0
+
+
+class UserStore:
+    def __init__(self, path=DEFAULT_DB_PATH, pool_size=DB_POOL_SIZE):
+        self.path = path
+        self.pool = ConnectionPool(path, pool_size)
+        if not os.path.exists(path):
+            logger.warning(f"User database not found at {path}; run prisma migrate to create it")
+            return
+        try:
+            missing = self.missing_tables()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not inspect the user database at {path}: {e}")
+            return
+        if missing:
+            logger.warning(f"Tables {', '.join(missing)} missing from {path}; run `npx prisma migrate deploy` to apply pending migrations")
+
+    def missing_tables(self):
+        """REQUIRED_TABLES not yet created in the database"""
+        with self.pool.connection() as conn:
+            existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        return [table for table in REQUIRED_TABLES if table not in existing]
+
+    # ---- Users ----
+    def user_by_email(self, email):
+        """{"id", "email", "name", "password"} for an email, or None"""
+        with self.pool.connection() as conn:
+            row = conn.execute('SELECT id, email, name, password FROM "User" WHERE email = ?', (email,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def create_user(self, email, name, password_hash):
+        """Insert a user and return its id; raises sqlite3.IntegrityError if the email is taken"""
+        user_id = uuid.uuid4().hex
+        created = now_ms()
+        with self.pool.connection() as conn:
+            conn.execute(
+                'INSERT INTO "User" (id, email, name, password, emailVerified, createdAt, updatedAt) '
+                'VALUES (?, ?, ?, ?, 0, ?, ?)',
+                (user_id, email, name, password_hash, created, created)
+            )
+        return user_id
+
+    # ---- Watchlist ----
+    def watchlist(self, user_id):
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                'SELECT ticker, name, addedAt FROM "Watchlist" WHERE userId = ? ORDER BY addedAt',
+                (user_id,)
+            ).fetchall()
+        return [{"ticker": r["ticker"], "name": r["name"], "added_on": format_date(r["addedAt"])} for r in rows]
+
+    def add_to_watchlist(self, user_id, ticker, name):
+        """Add a ticker unless it is already listed; returns whether a row was added"""
+        with self.pool.connection() as conn:
+            exists = conn.execute(
+                'SELECT 1 FROM "Watchlist" WHERE userId = ? AND ticker = ?', (user_id, ticker)
+            ).fetchone()
+            if exists:
+                return False
+            conn.execute(
+                'INSERT INTO "Watchlist" (id, userId, ticker, name, addedAt) VALUES (?, ?, ?, ?, ?)',
+                (uuid.uuid4().hex, user_id, ticker, name, now_ms())
+            )
+        return True
+
+    def remove_from_watchlist(self, user_id, ticker):
+        with self.pool.connection() as conn:
+            cursor = conn.execute('DELETE FROM "Watchlist" WHERE userId = ? AND ticker = ?', (user_id, ticker))
+        return cursor.rowcount > 0
+
+    # ---- Portfolio ----
+    def holdings(self, user_id):
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                'SELECT ticker, shares, avgPrice, currentPrice, purchaseDate FROM "Portfolio" '
+                'WHERE userId = ? ORDER BY purchaseDate',
+                (user_id,)
+            ).fetchall()
+        return [{
+            "ticker": r["ticker"],
+            "shares": r["shares"],
+            "avg_price": r["avgPrice"],
+            "current_price": r["currentPrice"],
+            "purchase_date": format_date(r["purchaseDate"])
+        } for r in rows]
+
+    def add_holding(self, user_id, ticker, shares, avg_price):
+        """Buy into a position; an existing holding is merged at the share-weighted average price"""
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                'SELECT id, shares, avgPrice FROM "Portfolio" WHERE userId = ? AND ticker = ?', (user_id, ticker)
+            ).fetchone()
+            if row is None:
+                conn.execute(
+                    'INSERT INTO "Portfolio" (id, userId, ticker, shares, avgPrice, purchaseDate) VALUES (?, ?, ?, ?, ?, ?)',
+                    (uuid.uuid4().hex, user_id, ticker, shares, avg_price, now_ms())
+                )
+            else:
+                total = row["shares"] + shares
+                average = (row["shares"] * row["avgPrice"] + shares * avg_price) / total if total else avg_price
+                conn.execute('UPDATE "Portfolio" SET shares = ?, avgPrice = ? WHERE id = ?', (total, average, row["id"]))
+
+    def remove_holding(self, user_id, ticker):
+        with self.pool.connection() as conn:
+            cursor = conn.execute('DELETE FROM "Portfolio" WHERE userId = ? AND ticker = ?', (user_id, ticker))
+        return cursor.rowcount > 0
+
+    def update_current_prices(self, user_id, prices):
+        """Write back {ticker: price} for a user's holdings in one executemany"""
+        with self.pool.connection() as conn:
+            conn.executemany(
+                'UPDATE "Portfolio" SET currentPrice = ? WHERE userId = ? AND ticker = ?',
+                [(price, user_id, ticker) for ticker, price in prices.items()]
+            )
+
+    # ---- Alerts ----
+    def _alert(self, r):
+        return {
+            "id": r["id"],
+            "user_id": r["userId"],
+            "ticker": r["ticker"],
+            "kind": r["kind"],
+            "threshold": r["threshold"],
+            "repeat": bool(r["repeat"]),
+            "active": bool(r["active"]),
+            "created_on": format_date(r["createdAt"]),
+            "last_triggered_on": format_date(r["lastTriggeredAt"])
+        }
+
+    def alerts(self, user_id):
+        with self.pool.connection() as conn:
+            rows = conn.execute('SELECT * FROM "Alert" WHERE userId = ? ORDER BY createdAt', (user_id,)).fetchall()
+        return [self._alert(r) for r in rows]
+
+    def active_alerts(self):
+        """Every active alert rule, for loading the alert engine"""
+        with self.pool.connection() as conn:
+            rows = conn.execute('SELECT * FROM "Alert" WHERE active = 1').fetchall()
+        return [self._alert(r) for r in rows]
+
+    def add_alert(self, user_id, ticker, kind, threshold, repeat=False):
+        """Insert an active alert rule and return it"""
+        alert_id = uuid.uuid4().hex
+        with self.pool.connection() as conn:
+            conn.execute(
+                'INSERT INTO "Alert" (id, userId, ticker, kind, threshold, repeat, active, createdAt) '
+                'VALUES (?, ?, ?, ?, ?, ?, 1, ?)',
+                (alert_id, user_id, ticker, kind, threshold, int(repeat), now_ms())
+            )
+            row = conn.execute('SELECT * FROM "Alert" WHERE id = ?', (alert_id,)).fetchone()
+        return self._alert(row)
+
+    def remove_alert(self, user_id, alert_id):
+        with self.pool.connection() as conn:
+            cursor = conn.execute('DELETE FROM "Alert" WHERE userId = ? AND id = ?', (user_id, alert_id))
+        return cursor.rowcount > 0
+
+    def mark_triggered(self, alert_ids, deactivate):
+        """Stamp lastTriggeredAt on fired alerts in one executemany; deactivate the ids in `deactivate`"""
+        triggered_at = now_ms()
+        with self.pool.connection() as conn:
+            conn.executemany(
+                'UPDATE "Alert" SET lastTriggeredAt = ?, active = ? WHERE id = ?',
+                [(triggered_at, 0 if alert_id in deactivate else 1, alert_id) for alert_id in alert_ids]
+            )
@@ -0,0 +1,164 @@
+import os
+import time
+import logging
+import threading
+from window_store import FEATURES
+from market_data import get_provider
+from forecasting import forecast_tickers
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+# ================== Batched Valuation ==================
+# Valuing a watchlist or portfolio fetches every ticker's history in one
+# provider call and forecasts every ticker in one rollout (stacked per
+# architecture through a ModelBank when serving NumPy weights), instead of a
+# fetch and a model call per holding. Results are cached per user for
+# VALUATION_TTL seconds and dropped when that user's rows change.
+VALUATION_TTL = float(os.getenv("VELORA_VALUATION_TTL", "30"))
+QUOTE_PERIOD = "120d"
+
+
+def recommendation_for(change_percent):
+    if change_percent > 2:
+        return "BUY"
+    if change_percent < -2:
+        return "SELL"
+    return "HOLD"
+
+
+class TTLCache:
+    def __init__(self, ttl=VALUATION_TTL, max_entries=10000):
+        """Values keyed by (user_id, kind) that expire after ttl seconds"""
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                now = time.monotonic()
+                self._entries = {k: e for k, e in self._entries.items() if e[0] >= now}
+                if len(self._entries) >= self.max_entries:
+                    self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def cached(self, key, compute):
+        """Cached value for key, computing and storing it on a miss"""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, user_id):
+        """Drop every entry for a user (after a watchlist or portfolio write)"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == user_id]:
+                del self._entries[key]
+
+
+def quote_tickers(tickers, models, bank=None, days=1):
+    """
+    Latest price, day change and forecast for many tickers in one batch
+
+    Returns {ticker: quote}; tickers without market data map to None, tickers
+    without a model get no forecast fields.
+    """
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+    if not tickers:
+        return {}
+
+    with span("fetch"):
+        histories = get_provider().histories(tickers, period=QUOTE_PERIOD)
+
+    quotes, windows = {}, {}
+    for ticker in tickers:
+        data = histories.get(ticker)
+        if data is None or data.empty:
+            quotes[ticker] = None
+            continue
+        closes = data["Close"]
+        price = float(closes.iloc[-1])
+        previous = float(closes.iloc[-2]) if len(closes) > 1 else price
+        quotes[ticker] = {
+            "price": round(price, 2),
+            "change": round(price - previous, 2),
+            "change_percent": round((price - previous) / previous * 100, 2) if previous else 0.0
+        }
+        if ticker in models:
+            windows[ticker] = data.reindex(columns=FEATURES).ffill().fillna(0).values
+
+    with span("forecast"):
+        forecasts = forecast_tickers(models, windows, days, bank)
+
+    for ticker, forecast in forecasts.items():
+        quote = quotes[ticker]
+        predicted = float(forecast["price"][-1])
+        change_percent = (predicted - quote["price"]) / quote["price"] * 100 if quote["price"] else 0.0
+        quote.update({
+            "predicted_price": round(predicted, 2),
+            "predicted_change_percent": round(change_percent, 2),
+            "confidence": round(float(forecast["confidence"][-1]), 1),
+            "recommendation": recommendation_for(change_percent)
+        })
+    return quotes
+
+
+def value_watchlist(items, models, bank=None):
+    """Watchlist rows ({"ticker", ...}) joined with their quotes"""
+    quotes = quote_tickers([item["ticker"] for item in items], models, bank)
+    return [{**item, **(quotes.get(item["ticker"].upper()) or {})} for item in items]
+
+
+def value_portfolio(holdings, models, bank=None, names=None):
+    """
+    Market value, gain and day change for holdings ({"ticker", "shares", "avg_price"})
+
+    Holdings without a quote keep their last stored current_price (or their
+    average price) so totals stay defined.
+    """
+    names = names or {}
+    quotes = quote_tickers([h["ticker"] for h in holdings], models, bank)
+
+    rows = []
+    total_value = daily_change = 0.0
+    for holding in holdings:
+        ticker = holding["ticker"].upper()
+        quote = quotes.get(ticker) or {}
+        price = quote.get("price", holding.get("current_price") or holding["avg_price"])
+        value = holding["shares"] * price
+        total_value += value
+        daily_change += holding["shares"] * quote.get("change", 0.0)
+
+        rows.append({
+            "name": names.get(ticker, ticker),
+            "symbol": ticker,
+            "shares": holding["shares"],
+            "avgPrice": round(holding["avg_price"], 2),
+            "currentPrice": round(price, 2),
+            "value": round(value, 2),
+            "change": round((price - holding["avg_price"]) / holding["avg_price"] * 100, 2) if holding["avg_price"] else 0.0,
+            "predictedPrice": quote.get("predicted_price"),
+            "recommendation": quote.get("recommendation")
+        })
+
+    previous_value = total_value - daily_change
+    return {
+        "total_value": round(total_value, 2),
+        "daily_change": round(daily_change, 2),
+        "percent_change": round(daily_change / previous_value * 100, 2) if previous_value else 0.0,
+        "holdings": rows
+    }
@@ -0,0 +1,160 @@
+import os
+import sys
+import json
+import logging
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# ================== Window Store Layout ==================
+# <path>/index.json          feature order + per-ticker row counts and date range
+# <path>/<TICKER>.npy        float32 (rows, features), C-contiguous
+# <path>/<TICKER>_dates.npy  int32 day offsets since 1970-01-01, one per row
+DEFAULT_STORE_PATH = os.getenv("VELORA_WINDOW_STORE", "data/window_store")
+FEATURES = ['Close', 'High', 'Low', 'Open', 'Volume']
+INDEX_FILE = "index.json"
+
+
+def sliding_windows(values, look_back):
+    """Return a zero-copy (n - look_back + 1, look_back, features) view over a 2D array"""
+    windows = np.lib.stride_tricks.sliding_window_view(values, look_back, axis=0)
+    return windows.transpose(0, 2, 1)
+
+
+def save_array(path, array):
+    """
+    np.save to a temp file in the same directory, then os.replace it in
+
+    A running server may hold the old file as a read-only memmap; replacing
+    the name leaves that inode intact instead of truncating mapped pages.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def build_window_store(data, path=DEFAULT_STORE_PATH, features=FEATURES):
+    """Write one contiguous float32 array per ticker plus a small date index"""
+    os.makedirs(path, exist_ok=True)
+
+    date_col = 'Date' if 'Date' in data.columns else 'timestamp'
+    features = [f for f in features if f in data.columns]
+    index = {"features": features, "tickers": {}}
+
+    for ticker, ticker_data in data.groupby('Ticker', sort=False):
+        dates = pd.to_datetime(ticker_data[date_col], utc=True).dt.tz_localize(None).dt.normalize()
+        ticker_data = ticker_data.assign(_date=dates.values).sort_values('_date')
+        ticker_data = ticker_data.drop_duplicates('_date', keep='last')
+
+        values = ticker_data[features].apply(pd.to_numeric, errors='coerce').ffill().bfill()
+        values = np.ascontiguousarray(values.to_numpy(dtype=np.float32))
+        days = ticker_data['_date'].values.astype('datetime64[D]').astype(np.int32)
+
+        save_array(os.path.join(path, f"{ticker}.npy"), values)
+        save_array(os.path.join(path, f"{ticker}_dates.npy"), days)
+
+        index["tickers"][ticker] = {
+            "rows": int(len(values)),
+            "first_date": str(days[0].astype('datetime64[D]')),
+            "last_date": str(days[-1].astype('datetime64[D]'))
+        }
+
+    # Every file is swapped in whole, so readers never see a half-written
+    # array; the index goes last so new readers only learn the new row counts
+    # once every array is in place
+    tmp_path = os.path.join(path, INDEX_FILE + ".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f)
+    os.replace(tmp_path, os.path.join(path, INDEX_FILE))
+
+    logger.info(f"Built window store at {path} for {len(index['tickers'])} tickers")
+    return index
+
+
+class WindowStore:
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        """
+        Read-only, memory-mapped view over a window store
+
+        Opening only parses the index; per-ticker arrays are mapped on first
+        access, so resident memory grows only with the pages actually read.
+        """
+        self.path = path
+        with open(os.path.join(path, INDEX_FILE)) as f:
+            index = json.load(f)
+
+        self.features = index["features"]
+        self.index = index["tickers"]
+        self._series = {}
+        self._dates = {}
+
+    def __contains__(self, ticker):
+        return ticker in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def tickers(self):
+        return list(self.index)
+
+    def column(self, name):
+        """Position of a feature column in every ticker array"""
+        return self.features.index(name)
+
+    def series(self, ticker):
+        """Memory-mapped (rows, features) float32 array for a ticker"""
+        if ticker not in self._series:
+            self._series[ticker] = np.load(os.path.join(self.path, f"{ticker}.npy"), mmap_mode='r')
+        return self._series[ticker]
+
+    def dates(self, ticker):
+        """Memory-mapped int32 day offsets (since 1970-01-01) for a ticker"""
+        if ticker not in self._dates:
+            self._dates[ticker] = np.load(os.path.join(self.path, f"{ticker}_dates.npy"), mmap_mode='r')
+        return self._dates[ticker]
+
+    def last_date(self, ticker):
+        return np.datetime64(self.index[ticker]["last_date"])
+
+    def windows(self, ticker, look_back):
+        """All look_back-length windows for a ticker as a zero-copy view"""
+        return sliding_windows(self.series(ticker), look_back)
+
+    def latest_window(self, ticker, look_back, end_date=None):
+        """Most recent look_back rows ending at end_date (inclusive) as a zero-copy slice"""
+        series = self.series(ticker)
+        end = len(series)
+        if end_date is not None:
+            day = np.datetime64(end_date, 'D').astype(np.int32)
+            end = int(np.searchsorted(self.dates(ticker), day, side='right'))
+        return series[max(0, end - look_back):end]
+
+
+def open_window_store(path=DEFAULT_STORE_PATH):
+    """Open the window store if one has been built, otherwise return None"""
+    if not os.path.exists(os.path.join(path, INDEX_FILE)):
+        return None
+    try:
+        return WindowStore(path)
+    except Exception as e:
+        logger.error(f"Error opening window store at {path}: {e}")
+        return None
+
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 else 'data/merged_data.csv'
+    if not os.path.exists(source):
+        logger.error(f"Source data not found: {source}")
+        return
+
+    data = pd.read_csv(source)
+    logger.info(f"Loaded {len(data)} rows from {source}")
+    build_window_store(data)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s')
+    main()